@@ -1,25 +1,173 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import asyncio
+import atexit
+import concurrent.futures
+import multiprocessing
+import csv
+import io
 import json
 import re
 import logging
-from dataclasses import dataclass, asdict
-from typing import Optional, Dict, List, Any
-from urllib.parse import urljoin, urlparse, quote
+from dataclasses import dataclass, asdict, field, fields, replace
+from typing import Optional, Dict, List, Any, AsyncIterator, Callable, Tuple, Union
+from urllib.parse import urlparse, quote
 import random
 import time
 import os
+import hashlib
+import threading
+import weakref
 from dotenv import load_dotenv
 
-from playwright.async_api import async_playwright, Page, Browser
-from bs4 import BeautifulSoup, Comment
-from openai import OpenAI
+from playwright.async_api import Page, Browser, BrowserContext
+from bs4 import BeautifulSoup, CData, Comment, NavigableString
+try:
+    import lxml.html
+except ImportError:  # the BeautifulSoup cleaner is used instead
+    lxml = None
+from openai import OpenAI, AsyncOpenAI
+
+from cache import CacheBackend, CachedPage, PageCache, create_cache
+from rate_limiter import DEFAULT_RATE_LIMITS, DomainRateLimiter
+from http_fetcher import HttpFetcher
+from structured_data import extract_structured_data
+from site_rules import SiteRuleRegistry, apply_field_rules, normalize_url, propose_selectors
+from text_reducer import BlockBuilder, TextBlock, TextReducer
+from part_index import PartIndex
+from monitor import DEFAULT_MONITOR_FIELDS, UNCHANGED, MonitorStore, Snapshot
+from batch_queue import BatchQueue
+from batch_runner import BatchRunner
+from broker import create_broker
+from browser_pool import BrowserPool
+from jobs import Dispatcher, JobManager, ScrapeJob
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry, ScrapeMetrics, ScrapeTimings
+from models import (
+    PRODUCT_DATA_FIELDS, PRODUCT_FIELD_EXAMPLES, PRODUCT_FIELDS, ProductData, SearchConfig,
+    has_value, merge_product_data, missing_fields, product_fields_for, rank_results
+)
 
 # Load environment variables
 load_dotenv()
 DEFAULT_API_KEY = os.getenv('OPENAI_API_KEY')
 
+# Concurrency limits for product page scraping
+MAX_CONCURRENCY = int(os.getenv('SCRAPER_MAX_CONCURRENCY', '4'))
+PER_DOMAIN_CONCURRENCY = int(os.getenv('SCRAPER_PER_DOMAIN_CONCURRENCY', '2'))
+
+# Shared browser pool limits
+BROWSER_MAX_CONTEXTS = int(os.getenv('BROWSER_MAX_CONTEXTS', '8'))
+BROWSER_MAX_PAGES = int(os.getenv('BROWSER_MAX_PAGES', '200'))
+# Warm contexts kept for later pages of the same site, pages one context serves
+# before it is replaced, and the resident memory (MB) of this process and its
+# browsers above which idle contexts are shed and the browser recycled (0 = no limit)
+BROWSER_IDLE_CONTEXTS = int(os.getenv('BROWSER_IDLE_CONTEXTS', '4'))
+BROWSER_CONTEXT_MAX_PAGES = int(os.getenv('BROWSER_CONTEXT_MAX_PAGES', '25'))
+BROWSER_MEMORY_LIMIT_MB = int(os.getenv('BROWSER_MEMORY_LIMIT_MB', '0'))
+
+# LLM extraction cache ('memory', 'sqlite' or 'off')
+EXTRACTION_CACHE = os.getenv('EXTRACTION_CACHE', 'memory')
+EXTRACTION_CACHE_PATH = os.getenv('EXTRACTION_CACHE_PATH', 'scraper_cache.db')
+EXTRACTION_CACHE_TTL = int(os.getenv('EXTRACTION_CACHE_TTL', '86400'))
+EXTRACTION_CACHE_SIZE = int(os.getenv('EXTRACTION_CACHE_SIZE', '5000'))
+
+# Rendered product page cache ('memory', 'sqlite' or 'off'); stale pages are
+# kept up to PAGE_CACHE_MAX_STALE seconds for ETag/Last-Modified revalidation
+PAGE_CACHE = os.getenv('PAGE_CACHE', 'memory')
+PAGE_CACHE_PATH = os.getenv('PAGE_CACHE_PATH', EXTRACTION_CACHE_PATH)
+PAGE_CACHE_TTL = int(os.getenv('PAGE_CACHE_TTL', '900'))
+PAGE_CACHE_MAX_STALE = int(os.getenv('PAGE_CACHE_MAX_STALE', '86400'))
+PAGE_CACHE_SIZE = int(os.getenv('PAGE_CACHE_SIZE', '200'))
+
+# Product pages per LLM request (1 = one request per page) and the content budget per batch
+EXTRACTION_BATCH_SIZE = int(os.getenv('EXTRACTION_BATCH_SIZE', '1'))
+EXTRACTION_BATCH_MAX_CHARS = int(os.getenv('EXTRACTION_BATCH_MAX_CHARS', '24000'))
+
+# OpenAI request limits: concurrent calls per API key, seconds per call, retries on 429/5xx
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '60'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))
+
+# HTML cleaner engine: 'lxml' (fast, C parser) or 'bs4' (BeautifulSoup html.parser)
+CLEANER_ENGINE = os.getenv('CLEANER_ENGINE', 'lxml')
+
+# Cleaned page text is cut to the most product-relevant blocks within this many
+# tokens, counted for CLEANER_TOKEN_MODEL (with tiktoken when installed)
+CLEANER_TOKEN_BUDGET = int(os.getenv('CLEANER_TOKEN_BUDGET', '1500'))
+CLEANER_TOKEN_MODEL = os.getenv('CLEANER_TOKEN_MODEL', 'gpt-3.5-turbo')
+
+# Where HTML cleaning runs: 'process' (process pool), 'thread' (thread pool) or 'inline'
+CLEANER_EXECUTOR = os.getenv('CLEANER_EXECUTOR', 'process')
+CLEANER_WORKERS = int(os.getenv('CLEANER_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# Request interception: resource types and tracker/ad domains aborted during page loads.
+# RESOURCE_BLOCKING_ALLOWLIST is JSON mapping a site to hosts it needs, e.g. {"mouser.com": ["tiqcdn.com"]}
+RESOURCE_BLOCKING = os.getenv('RESOURCE_BLOCKING', 'on').lower() not in ('off', 'false', '0')
+BLOCKED_RESOURCE_TYPES = [t.strip() for t in os.getenv('BLOCKED_RESOURCE_TYPES', 'image,media,font,manifest').split(',') if t.strip()]
+BLOCKED_DOMAINS = [d.strip() for d in os.getenv('BLOCKED_DOMAINS', '').split(',') if d.strip()]
+RESOURCE_BLOCKING_ALLOWLIST = json.loads(os.getenv('RESOURCE_BLOCKING_ALLOWLIST', '{}'))
+
+# Page readiness: give up waiting after READY_TIMEOUT seconds; DOM_QUIET_MS without
+# mutations counts as settled
+READY_TIMEOUT = float(os.getenv('READY_TIMEOUT', '10'))
+DOM_QUIET_MS = int(os.getenv('DOM_QUIET_MS', '500'))
+
+# Per-domain request rates shared by all jobs: RATE_LIMITS maps a site to
+# {"rate": requests/second, "burst": n} and overrides the built-in entries
+RATE_LIMIT_DEFAULT = float(os.getenv('RATE_LIMIT_DEFAULT', '1.0'))
+RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', '2'))
+RATE_LIMITS = json.loads(os.getenv('RATE_LIMITS', '{}'))
+RATE_LIMIT_BACKOFF = float(os.getenv('RATE_LIMIT_BACKOFF', '30'))
+RESPECT_ROBOTS_TXT = os.getenv('RESPECT_ROBOTS_TXT', 'on').lower() not in ('off', 'false', '0')
+
+# Fetch product pages over plain HTTP first and render them in the browser only
+# when the HTML lacks the expected content or is a bot challenge
+HTTP_FAST_PATH = os.getenv('HTTP_FAST_PATH', 'on').lower() not in ('off', 'false', '0')
+HTTP_FETCH_TIMEOUT = float(os.getenv('HTTP_FETCH_TIMEOUT', '15'))
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '20'))
+HTTP_MAX_FALLBACKS = int(os.getenv('HTTP_MAX_FALLBACKS', '3'))
+
+# Per-site search URLs, result link selectors and field selectors; in learning mode
+# selectors that locate LLM-extracted values are adopted after enough confirmations
+SITE_RULES_PATH = os.getenv('SITE_RULES_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'site_rules.json'))
+SITE_RULES_LEARNED_PATH = os.getenv('SITE_RULES_LEARNED_PATH', 'site_rules.learned.json')
+SITE_RULES_LEARNING = os.getenv('SITE_RULES_LEARNING', 'off').lower() in ('on', 'true', '1')
+SITE_RULES_MIN_CONFIRMATIONS = int(os.getenv('SITE_RULES_MIN_CONFIRMATIONS', '3'))
+
+# Search result pages followed (via the site's next-page link) to reach max_results
+SEARCH_MAX_PAGES = int(os.getenv('SEARCH_MAX_PAGES', '5'))
+
+# Websites one request may search at once (website_urls)
+MAX_SEARCH_SITES = int(os.getenv('MAX_SEARCH_SITES', '10'))
+
+# Bulk part-list batches: queue database, JSONL result files, items scraped at once and retries
+BATCH_DB_PATH = os.getenv('BATCH_DB_PATH', 'batches.db')
+BATCH_OUTPUT_DIR = os.getenv('BATCH_OUTPUT_DIR', 'batch_results')
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '2'))
+BATCH_MAX_ITEMS = int(os.getenv('BATCH_MAX_ITEMS', '1000'))
+BATCH_MAX_ATTEMPTS = int(os.getenv('BATCH_MAX_ATTEMPTS', '3'))
+BATCH_RETRY_DELAY = float(os.getenv('BATCH_RETRY_DELAY', '30'))
+# Seconds a process may go without renewing its running items before others requeue them,
+# and whether serving processes resume interrupted batches at startup
+BATCH_LEASE_TIMEOUT = float(os.getenv('BATCH_LEASE_TIMEOUT', '120'))
+BATCH_RESUME = os.getenv('BATCH_RESUME', 'on').lower() not in ('off', 'false', '0')
+
+# Broker shared with scrape workers (redis://host:port/db or sqlite:///path); unset scrapes in-process
+SCRAPER_BROKER = os.getenv('SCRAPER_BROKER', '')
+WORKER_CONCURRENCY = int(os.getenv('WORKER_CONCURRENCY', str(MAX_CONCURRENCY)))
+
+# Monitoring mode: where the last text and product of each URL are kept (use sqlite for daily runs)
+MONITOR_STORE = os.getenv('MONITOR_STORE', 'memory')
+MONITOR_STORE_PATH = os.getenv('MONITOR_STORE_PATH', EXTRACTION_CACHE_PATH)
+MONITOR_STORE_SIZE = int(os.getenv('MONITOR_STORE_SIZE', '20000'))
+MONITOR_FIELDS = [f.strip() for f in os.getenv('MONITOR_FIELDS', ','.join(DEFAULT_MONITOR_FIELDS)).split(',') if f.strip()]
+# Changed characters up to which only the monitored fields are re-extracted, from the changed lines
+MONITOR_MAX_DIFF_CHARS = int(os.getenv('MONITOR_MAX_DIFF_CHARS', '800'))
+
+# Scrape time limit, and how long finished jobs stay available
+SCRAPE_TIMEOUT = 300
+JOB_TTL = int(os.getenv('JOB_TTL_SECONDS', '3600'))
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,30 +175,8 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app, origins=["*"])  # Enable CORS for all origins
 
-@dataclass
-class SearchConfig:
-    website_url: str
-    search_term: str
-    extract_fields: List[str]
-    max_results: int = 5
-
-@dataclass
-class ProductData:
-    product_name: Optional[str] = None
-    price: Optional[str] = None
-    condition: Optional[str] = None
-    country: Optional[str] = None
-    seller: Optional[str] = None
-    part_number: Optional[str] = None
-    manufacturer: Optional[str] = None
-    availability: Optional[str] = None
-    specifications: Optional[Dict[str, str]] = None
-    price_breaks: Optional[List[Dict[str, str]]] = None
-    datasheet_url: Optional[str] = None
-    confidence_score: Optional[float] = None
-
 class ContentCleaner:
-    def __init__(self):
+    def __init__(self, token_budget: int = CLEANER_TOKEN_BUDGET, model: str = CLEANER_TOKEN_MODEL):
         self.noise_patterns = [
             r'cookie\s+policy', r'privacy\s+policy', r'terms\s+of\s+service',
             r'newsletter\s+signup', r'follow\s+us', r'social\s+media',
@@ -61,6 +187,13 @@ class ContentCleaner:
             '.advertisement', '.ads', '.cookie-banner',
             '.newsletter', '.social-media', '.breadcrumb'
         ]
+        self.product_selectors = [
+            '[data-testid*="product"]', '.product-details', '.product-info',
+            '.item-details', '#product-description', '.part-details', '.component-info'
+        ]
+        self.main_selectors = ['main', '.main-content', '#main', '.content']
+        # Ranks text blocks and keeps the most product-relevant ones within the token budget
+        self.reducer = TextReducer(token_budget, model)
 
     def extract_clean_text(self, html_content: str, url: str) -> str:
         try:
@@ -70,100 +203,551 @@ class ContentCleaner:
                     element.decompose()
             for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
                 comment.extract()
-            main_content = self._extract_main_content(soup, url)
-            clean_text = self._clean_text(main_content)
+            blocks = self._extract_main_content(soup, url)
+            clean_text = self._clean_blocks(blocks)
             return clean_text
         except Exception as e:
             logger.error(f"Error cleaning content: {e}")
             return ""
 
-    def _extract_main_content(self, soup: BeautifulSoup, url: str) -> str:
-        product_selectors = [
-            '[data-testid*="product"]', '.product-details', '.product-info',
-            '.item-details', '#product-description', '.part-details', '.component-info'
-        ]
-        content_parts = []
-        for selector in product_selectors:
-            elements = soup.select(selector)
-            if elements:
-                for element in elements:
-                    content_parts.append(element.get_text(separator=' ', strip=True))
-        if not content_parts:
-            main_selectors = ['main', '.main-content', '#main', '.content']
-            for selector in main_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    content_parts.append(elements[0].get_text(separator=' ', strip=True))
+    def _extract_main_content(self, soup: BeautifulSoup, url: str) -> List[TextBlock]:
+        blocks = []
+        matched = False
+        for selector in self.product_selectors:
+            for element in soup.select(selector):
+                matched = True
+                blocks.extend(self._element_blocks(element))
+        if not matched:
+            for selector in self.main_selectors:
+                element = soup.select_one(selector)
+                if element is not None:
+                    matched = True
+                    blocks.extend(self._element_blocks(element))
                     break
-        if not content_parts:
+        if not matched:
             body = soup.find('body')
             if body:
-                content_parts.append(body.get_text(separator=' ', strip=True))
-        return ' '.join(content_parts)
+                blocks.extend(self._element_blocks(body))
+        return blocks
 
-    def _clean_text(self, text: str) -> str:
-        if not text:
-            return ""
+    def _element_blocks(self, element) -> List[TextBlock]:
+        """Text of an element split at block-level tags, in document order"""
+        builder = BlockBuilder()
+        stack = [(element, False)]
+        while stack:
+            node, closing = stack.pop()
+            if closing:
+                builder.end(node.name)
+            elif isinstance(node, NavigableString):
+                # Same strings as get_text(): no comments, scripts, styles, templates or ruby text
+                if type(node) in (NavigableString, CData):
+                    builder.text(node)
+            else:
+                builder.start(node.name)
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.contents))
+        return builder.finish()
+
+    def _strip_noise(self, text: str) -> str:
         for pattern in self.noise_patterns:
             text = re.sub(pattern, '', text, flags=re.IGNORECASE)
-        text = re.sub(r'\s+', ' ', text)
-        text = self._remove_repetitive_content(text)
-        words = text.split()
-        if len(words) > 1000:
-            text = ' '.join(words[:1000])
-        return text.strip()
-
-    def _remove_repetitive_content(self, text: str) -> str:
-        sentences = text.split('.')
-        seen = set()
-        unique_sentences = []
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if sentence and sentence not in seen and len(sentence) > 10:
-                seen.add(sentence)
-                unique_sentences.append(sentence)
-        return '. '.join(unique_sentences)
+        return text
+
+    def _clean_blocks(self, blocks: List[TextBlock]) -> str:
+        cleaned = []
+        for block in blocks:
+            lines = (' '.join(self._strip_noise(line).split()) for line in block.text.split('\n'))
+            text = '\n'.join(line for line in lines if line)
+            if text:
+                cleaned.append(TextBlock(text, block.kind))
+        return self.reducer.reduce(cleaned)
+
+class SelectorIndex:
+    """Simple CSS selectors (tag, .class, #id, [attr*="value"]) indexed for one-pass matching"""
+    ATTR_CONTAINS = re.compile(r'\[([\w-]+)\*="([^"]+)"\]')
+    
+    def __init__(self, selectors: List[str]):
+        self.by_tag: Dict[str, List[int]] = {}
+        self.by_class: Dict[str, List[int]] = {}
+        self.by_id: Dict[str, List[int]] = {}
+        self.attr_contains: List[Tuple[str, str, int]] = []
+        for position, selector in enumerate(selectors):
+            attr_match = self.ATTR_CONTAINS.fullmatch(selector)
+            if attr_match:
+                self.attr_contains.append((attr_match.group(1), attr_match.group(2), position))
+            elif selector.startswith('.'):
+                self.by_class.setdefault(selector[1:], []).append(position)
+            elif selector.startswith('#'):
+                self.by_id.setdefault(selector[1:], []).append(position)
+            elif selector.isalnum():
+                self.by_tag.setdefault(selector.lower(), []).append(position)
+            else:
+                raise ValueError(f"Unsupported selector: {selector}")
+                
+    def match(self, element) -> List[int]:
+        """Positions of the selectors matching an lxml element"""
+        positions = list(self.by_tag.get(element.tag, ()))
+        classes = element.get('class')
+        if classes:
+            for class_name in classes.split():
+                positions.extend(self.by_class.get(class_name, ()))
+        element_id = element.get('id')
+        if element_id is not None:
+            positions.extend(self.by_id.get(element_id, ()))
+        for attr, value, position in self.attr_contains:
+            if value in (element.get(attr) or ''):
+                positions.append(position)
+        return positions
+
+class LxmlContentCleaner(ContentCleaner):
+    """ContentCleaner built on lxml's C parser
+
+    Removes noise in a single tree walk and gates the noise regexes behind one
+    precompiled alternation. Produces the same text as ContentCleaner for
+    well-formed documents such as Playwright's page.content().
+    """
+    # Elements whose strings BeautifulSoup's get_text() leaves out
+    EXCLUDED_TEXT_TAGS = frozenset(['template', 'rt', 'rp', 'script', 'style'])
+    
+    def __init__(self, token_budget: int = CLEANER_TOKEN_BUDGET, model: str = CLEANER_TOKEN_MODEL):
+        super().__init__(token_budget, model)
+        if lxml is None:
+            raise ImportError("lxml is required for LxmlContentCleaner")
+        self._parser = lxml.html.HTMLParser(encoding='utf-8')
+        self._unwanted = SelectorIndex(self.unwanted_selectors)
+        self._product = SelectorIndex(self.product_selectors)
+        self._main = SelectorIndex(self.main_selectors)
+        self._noise_regexes = [re.compile(pattern, re.IGNORECASE) for pattern in self.noise_patterns]
+        self._any_noise = re.compile('|'.join(f'(?:{pattern})' for pattern in self.noise_patterns), re.IGNORECASE)
+        self._body_tag = re.compile(r'<body[\s>/]', re.IGNORECASE)
+        
+    def extract_clean_text(self, html_content: str, url: str) -> str:
+        try:
+            if not html_content or not html_content.strip():
+                return ""
+            root = lxml.html.document_fromstring(html_content.encode('utf-8'), parser=self._parser)
+            self._remove_unwanted(root)
+            blocks = self._extract_main_content_lxml(root, html_content)
+            return self._clean_blocks(blocks)
+        except Exception as e:
+            logger.error(f"Error cleaning content: {e}")
+            return ""
+            
+    def _remove_unwanted(self, root):
+        unwanted = [element for element in root.iter()
+                    if isinstance(element.tag, str) and self._unwanted.match(element)]
+        for element in unwanted:
+            parent = element.getparent()
+            if parent is None:
+                continue
+            # drop_tree() would glue the tail onto the preceding text; a comment keeps
+            # it a separate string, as decompose() leaves it in BeautifulSoup
+            placeholder = lxml.html.HtmlComment('')
+            placeholder.tail = element.tail
+            parent.replace(element, placeholder)
+            
+    def _extract_main_content_lxml(self, root, html_content: str) -> List[TextBlock]:
+        # Same selectors and precedence as ContentCleaner._extract_main_content, in one walk
+        product_matches = [[] for _ in self.product_selectors]
+        main_matches = [None] * len(self.main_selectors)
+        for element in root.iter():
+            if not isinstance(element.tag, str):
+                continue  # comments never reach the extracted text
+            for position in set(self._product.match(element)):
+                product_matches[position].append(element)
+            for position in self._main.match(element):
+                if main_matches[position] is None:
+                    main_matches[position] = element
+                    
+        matched = [element for matches in product_matches for element in matches]
+        if not matched:
+            matched = [element for element in main_matches if element is not None][:1]
+        if not matched:
+            # html.parser only has a <body> when the document declares one
+            body = root.find('body')
+            if body is not None and self._body_tag.search(html_content):
+                matched = [body]
+        return [block for element in matched for block in self._element_blocks(element)]
+        
+    def _element_blocks(self, element) -> List[TextBlock]:
+        """Text and tails in document order, skipping strings inside excluded elements"""
+        builder = BlockBuilder()
+        excluded = element.tag in self.EXCLUDED_TEXT_TAGS or any(
+            ancestor.tag in self.EXCLUDED_TEXT_TAGS for ancestor in element.iterancestors()
+        )
+        stack = [(element, excluded, 'start')]
+        while stack:
+            node, node_excluded, phase = stack.pop()
+            if phase == 'tail':
+                # A child's tail belongs to its parent's context
+                if node.tail and not node_excluded:
+                    builder.text(node.tail)
+            elif phase == 'end':
+                builder.end(node.tag)
+            else:
+                builder.start(node.tag)
+                if node.text and not node_excluded:
+                    builder.text(node.text)
+                stack.append((node, node_excluded, 'end'))
+                for child in reversed(node):
+                    stack.append((child, node_excluded, 'tail'))
+                    if isinstance(child.tag, str):
+                        stack.append((child, node_excluded or child.tag in self.EXCLUDED_TEXT_TAGS, 'start'))
+        return builder.finish()
+                    
+    def _strip_noise(self, text: str) -> str:
+        # One alternation scan; the ordered per-pattern passes only run when noise is present
+        if self._any_noise.search(text):
+            for regex in self._noise_regexes:
+                text = regex.sub('', text)
+        return text
+
+def create_content_cleaner(engine: str = CLEANER_ENGINE) -> ContentCleaner:
+    """Return the configured cleaner, falling back to BeautifulSoup without lxml"""
+    if engine == 'lxml':
+        if lxml is not None:
+            return LxmlContentCleaner()
+        logger.warning("lxml is not installed, using the BeautifulSoup content cleaner")
+    elif engine != 'bs4':
+        raise ValueError(f"Unknown cleaner engine: {engine}")
+    return ContentCleaner()
+
+# Cleaners cached per worker process, keyed by engine
+_worker_cleaners: Dict[str, ContentCleaner] = {}
+
+def clean_html(html_content: str, url: str, engine: str = CLEANER_ENGINE) -> str:
+    """Clean a page with the given engine; module-level so pool workers can run it"""
+    cleaner = _worker_cleaners.get(engine)
+    if cleaner is None:
+        cleaner = _worker_cleaners.setdefault(engine, create_content_cleaner(engine))
+    return cleaner.extract_clean_text(html_content, url)
+
+# Trust in values located by site rule selectors, alongside the structured data sources;
+# such values take precedence over the LLM, so only learned or verified selectors belong in rules
+SELECTOR_CONFIDENCE = 0.9
+
+def extract_known_fields(html_content: str, wanted: Optional[List[str]] = None,
+                         field_rules: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, Any]:
+    """Fields available without the LLM: embedded metadata, then site rule selectors"""
+    data = extract_structured_data(html_content, wanted)
+    pending_rules = {name: rule for name, rule in (field_rules or {}).items()
+                     if name not in data and (wanted is None or name in wanted)}
+    found = apply_field_rules(html_content, pending_rules)
+    if found:
+        known = len(data) - ('confidence_score' in data)
+        score = data.get('confidence_score', 0.0) * known + SELECTOR_CONFIDENCE * len(found)
+        data.update(found)
+        data['confidence_score'] = round(score / (known + len(found)), 2)
+    return data
+
+def process_html(html_content: str, url: str, engine: str = CLEANER_ENGINE,
+                 wanted: Optional[List[str]] = None,
+                 field_rules: Optional[Dict[str, Dict[str, str]]] = None) -> Tuple[str, Dict[str, Any]]:
+    """Clean text plus the fields known without the LLM, in one worker round trip"""
+    return clean_html(html_content, url, engine), extract_known_fields(html_content, wanted, field_rules)
+
+_cleaner_executor: Optional[concurrent.futures.Executor] = None
+_cleaner_executor_lock = threading.Lock()
+
+def get_cleaner_executor(kind: str = CLEANER_EXECUTOR,
+                         workers: int = CLEANER_WORKERS) -> Optional[concurrent.futures.Executor]:
+    """Process-wide executor for CPU-heavy HTML processing, or None to run inline"""
+    global _cleaner_executor
+    if kind == 'inline':
+        return None
+    with _cleaner_executor_lock:
+        if _cleaner_executor is None:
+            if kind == 'process':
+                # spawn: forking a process that runs threads and a browser driver is unsafe
+                _cleaner_executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=max(1, workers), mp_context=multiprocessing.get_context('spawn')
+                )
+            elif kind == 'thread':
+                _cleaner_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=max(1, workers), thread_name_prefix='html-cleaner'
+                )
+            else:
+                raise ValueError(f"Unknown cleaner executor: {kind}")
+        return _cleaner_executor
+
+@atexit.register
+def _shutdown_cleaner_executor():
+    if _cleaner_executor is not None:
+        _cleaner_executor.shutdown(wait=False, cancel_futures=True)
+
+def product_json_template(product_fields: Optional[List[str]] = None) -> str:
+    """JSON template for the given fields (all by default); confidence_score is always asked for"""
+    keys = [key for key in PRODUCT_FIELD_EXAMPLES
+            if product_fields is None or key in product_fields or key == 'confidence_score']
+    return "{\n" + ",\n".join(f'    "{key}": {PRODUCT_FIELD_EXAMPLES[key]}' for key in keys) + "\n}"
+
+PRODUCT_JSON_TEMPLATE = product_json_template()
+
+EXTRACTION_RULES = """EXTRACTION RULES:
+1. If information is not found, use null (not empty string)
+2. For prices, preserve currency symbols and formatting
+3. Extract all quantity-based pricing if available
+4. Focus on the main product, ignore related/suggested items
+5. Confidence score should reflect how certain you are about the extraction (0.0-1.0)
+6. For specifications, extract key technical parameters
+7. Normalize condition values to standard terms
+"""
+
+class OpenAIClientPool:
+    """Shares one OpenAI client, and its keep-alive connection pool, per API key
+
+    Async clients are bound to the event loop that uses them, so they are kept per
+    loop along with a semaphore capping concurrent requests per key. Retries with
+    exponential backoff on 429/5xx/connection errors are handled by the client.
+    """
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 timeout: float = LLM_TIMEOUT, max_retries: int = LLM_MAX_RETRIES):
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._clients: Dict[str, OpenAI] = {}
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Tuple[AsyncOpenAI, asyncio.Semaphore]]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        
+    def get_client(self, api_key: str) -> OpenAI:
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is None:
+                client = OpenAI(api_key=api_key, timeout=self.timeout, max_retries=self.max_retries)
+                self._clients[api_key] = client
+            return client
+            
+    def get_async_client(self, api_key: str) -> Tuple[AsyncOpenAI, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            loop_clients = self._async_clients.setdefault(loop, {})
+            entry = loop_clients.get(api_key)
+            if entry is None:
+                client = AsyncOpenAI(api_key=api_key, timeout=self.timeout, max_retries=self.max_retries)
+                entry = (client, asyncio.Semaphore(self.max_concurrency))
+                loop_clients[api_key] = entry
+            return entry
+
+# Process-wide OpenAI clients shared by all extractors
+openai_clients = OpenAIClientPool()
+
+# Process-wide metrics exposed at /metrics
+metrics_registry = MetricsRegistry()
+scrape_metrics = ScrapeMetrics(metrics_registry)
+
+# Process-wide site rules shared by extractors and scrapers
+site_rules = SiteRuleRegistry.from_file(
+    SITE_RULES_PATH,
+    learned_path=SITE_RULES_LEARNED_PATH,
+    learning=SITE_RULES_LEARNING,
+    min_confirmations=SITE_RULES_MIN_CONFIRMATIONS
+)
 
 class LLMExtractor:
-    def __init__(self, api_key: str):
+    # Bump whenever the extraction prompt changes so cached results are not reused
+    PROMPT_VERSION = 1
+    
+    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo",
+                 cache: Optional[CacheBackend] = None,
+                 batch_size: int = EXTRACTION_BATCH_SIZE,
+                 max_batch_chars: int = EXTRACTION_BATCH_MAX_CHARS,
+                 clients: Optional[OpenAIClientPool] = None,
+                 rules: Optional[SiteRuleRegistry] = None,
+                 metrics: Optional[ScrapeMetrics] = None):
         self.api_key = api_key
+        self.model = model
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+        self.max_batch_chars = max_batch_chars
+        self.clients = clients or openai_clients
+        self.site_rules = rules or site_rules
+        self.metrics = metrics or scrape_metrics
+        # Per-scrape totals that token use and failures are also added to, when set
+        self.timings: Optional[ScrapeTimings] = None
         
-    def extract_product_data(self, clean_text: str, url: str) -> ProductData:
+    def extract_product_data(self, clean_text: str, url: str,
+                             product_fields: Optional[List[str]] = None) -> ProductData:
+        """Extract a page; product_fields narrows the prompt to those fields"""
         try:
-            site_context = self._get_site_context(url)
-            prompt = self._build_extraction_prompt(clean_text, site_context)
-            client = OpenAI()
-            client.api_key = self.api_key
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.1
-            )
-            result = json.loads(response.choices[0].message.content)
-            product_data = ProductData(**result)
-            return product_data
+            cache_key, site_context, cached = self._lookup_cached(clean_text, url, product_fields)
+            if cached is not None:
+                return cached
+                
+            prompt = self._build_extraction_prompt(clean_text, site_context, product_fields)
+            result = json.loads(self._complete(prompt))
+            return self._store(cache_key, self._to_product_data(result))
         except Exception as e:
             logger.error(f"Error extracting product data: {e}")
+            self.metrics.error('llm', url, self.timings)
             return ProductData()
             
+    async def aextract_product_data(self, clean_text: str, url: str,
+                                    product_fields: Optional[List[str]] = None) -> ProductData:
+        """Async version of extract_product_data that doesn't block the event loop"""
+        try:
+            cache_key, site_context, cached = self._lookup_cached(clean_text, url, product_fields)
+            if cached is not None:
+                return cached
+                
+            prompt = self._build_extraction_prompt(clean_text, site_context, product_fields)
+            result = json.loads(await self._acomplete(prompt))
+            return self._store(cache_key, self._to_product_data(result))
+        except Exception as e:
+            logger.error(f"Error extracting product data: {e}")
+            self.metrics.error('llm', url, self.timings)
+            return ProductData()
+            
+    def extract_product_data_batch(self, pages: List[Tuple[str, str]]) -> List[ProductData]:
+        """Extract several pages, packing up to batch_size of them into each request
+
+        pages is a list of (clean_text, url). Pages missing or malformed in a batch
+        response are extracted on their own, so one bad page can't sink the others.
+        """
+        results, pending = self._prepare_batch(pages)
+        for batch in self._split_batches(pending):
+            extracted = self._extract_batch(batch) if len(batch) > 1 else {}
+            for index, clean_text, url, site_context, cache_key in batch:
+                if index in extracted:
+                    results[index] = self._store(cache_key, extracted[index])
+                    continue
+                if len(batch) > 1:
+                    logger.warning(f"Batch extraction missed {url}, extracting it individually")
+                results[index] = self.extract_product_data(clean_text, url)
+        return results
+        
+    async def aextract_product_data_batch(self, pages: List[Tuple[str, str]]) -> List[ProductData]:
+        """Async version of extract_product_data_batch; batches run concurrently"""
+        results, pending = self._prepare_batch(pages)
+        
+        async def run(batch: List[tuple]):
+            extracted = await self._aextract_batch(batch) if len(batch) > 1 else {}
+            for index, clean_text, url, site_context, cache_key in batch:
+                if index in extracted:
+                    results[index] = self._store(cache_key, extracted[index])
+                    continue
+                if len(batch) > 1:
+                    logger.warning(f"Batch extraction missed {url}, extracting it individually")
+                results[index] = await self.aextract_product_data(clean_text, url)
+                
+        await asyncio.gather(*(run(batch) for batch in self._split_batches(pending)))
+        return results
+        
+    def _lookup_cached(self, clean_text: str, url: str,
+                       product_fields: Optional[List[str]] = None) -> Tuple[str, str, Optional[ProductData]]:
+        """Return (cache_key, site_context, cached product or None)"""
+        site_context = self._get_site_context(url)
+        cache_key = self._cache_key(clean_text, site_context, product_fields)
+        cached = self.cache.get(cache_key) if self.cache is not None else None
+        if cached is not None:
+            logger.info(f"Extraction cache hit for {url}")
+            return cache_key, site_context, ProductData(**cached)
+        return cache_key, site_context, None
+        
+    def _store(self, cache_key: str, product_data: ProductData) -> ProductData:
+        if self.cache is not None:
+            self.cache.set(cache_key, asdict(product_data))
+        return product_data
+        
+    def _prepare_batch(self, pages: List[Tuple[str, str]]) -> Tuple[List[Optional[ProductData]], List[tuple]]:
+        """Fill cached results and return them with the (index, text, url, context, key) items still to extract"""
+        results: List[Optional[ProductData]] = [None] * len(pages)
+        pending = []
+        for index, (clean_text, url) in enumerate(pages):
+            cache_key, site_context, cached = self._lookup_cached(clean_text, url)
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append((index, clean_text, url, site_context, cache_key))
+        return results, pending
+        
+    def _split_batches(self, pending: List[tuple]) -> List[List[tuple]]:
+        batches, batch, batch_chars = [], [], 0
+        for item in pending:
+            item_chars = len(item[1])
+            if batch and (len(batch) >= self.batch_size or batch_chars + item_chars > self.max_batch_chars):
+                batches.append(batch)
+                batch, batch_chars = [], 0
+            batch.append(item)
+            batch_chars += item_chars
+        if batch:
+            batches.append(batch)
+        return batches
+        
+    def _batch_prompt(self, batch: List[tuple]) -> str:
+        return self._build_batch_extraction_prompt(
+            [(index, clean_text, site_context) for index, clean_text, _, site_context, _ in batch]
+        )
+        
+    def _extract_batch(self, batch: List[tuple]) -> Dict[int, ProductData]:
+        """Run one batched completion and return the products it parsed, by page index"""
+        try:
+            result = json.loads(self._complete(self._batch_prompt(batch)))
+        except Exception as e:
+            logger.error(f"Error in batch extraction of {len(batch)} pages: {e}")
+            self.metrics.error('llm', batch[0][2], self.timings)
+            return {}
+        return self._parse_batch_result(batch, result)
+        
+    async def _aextract_batch(self, batch: List[tuple]) -> Dict[int, ProductData]:
+        try:
+            result = json.loads(await self._acomplete(self._batch_prompt(batch)))
+        except Exception as e:
+            logger.error(f"Error in batch extraction of {len(batch)} pages: {e}")
+            self.metrics.error('llm', batch[0][2], self.timings)
+            return {}
+        return self._parse_batch_result(batch, result)
+        
+    def _parse_batch_result(self, batch: List[tuple], result: Dict[str, Any]) -> Dict[int, ProductData]:
+        expected = {item[0] for item in batch}
+        extracted = {}
+        for item in result.get('products') or []:
+            try:
+                index = int(item.pop('index'))
+                if index in expected and index not in extracted:
+                    extracted[index] = self._to_product_data(item)
+            except Exception as e:
+                logger.warning(f"Skipping malformed batch extraction item: {e}")
+        return extracted
+        
+    def _complete(self, prompt: str) -> str:
+        client = self.clients.get_client(self.api_key)
+        response = client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.1
+        )
+        self.metrics.record_tokens(self.model, response.usage, self.timings)
+        return response.choices[0].message.content
+        
+    async def _acomplete(self, prompt: str) -> str:
+        client, semaphore = self.clients.get_async_client(self.api_key)
+        async with semaphore:
+            response = await client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.1
+            )
+        self.metrics.record_tokens(self.model, response.usage, self.timings)
+        return response.choices[0].message.content
+        
+    def _to_product_data(self, result: Dict[str, Any]) -> ProductData:
+        # Ignore keys the model invents beyond the requested fields
+        return ProductData(**{key: value for key, value in result.items() if key in PRODUCT_FIELDS})
+            
+    def _cache_key(self, clean_text: str, site_context: str,
+                   product_fields: Optional[List[str]] = None) -> str:
+        """Content-addressed key: identical page text for the same prompt and model shares a result"""
+        key_parts = [self.PROMPT_VERSION, self.model, site_context, clean_text]
+        if product_fields is not None:
+            key_parts.append(sorted(product_fields))
+        payload = json.dumps(key_parts)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+            
     def _get_site_context(self, url: str) -> str:
-        domain = urlparse(url).netloc.lower()
-        if 'ebay' in domain:
-            return "eBay marketplace - focus on auction/buy-it-now prices, seller ratings, condition"
-        elif 'radwell' in domain:
-            return "Industrial automation parts - focus on part numbers, condition codes, warranty"
-        elif 'rs-online' in domain or 'rs.com' in domain:
-            return "RS Components - electronic components with technical specs and quantity pricing"
-        elif 'digikey' in domain:
-            return "DigiKey electronics distributor - part numbers, specifications, quantity breaks"
-        elif 'mouser' in domain:
-            return "Mouser electronics - components with detailed specifications and pricing tiers"
-        elif 'farnell' in domain:
-            return "Farnell electronics distributor - industrial components with technical data"
-        else:
-            return "General e-commerce site"
+        return self.site_rules.site_context(url)
             
-    def _build_extraction_prompt(self, text: str, site_context: str) -> str:
+    def _build_extraction_prompt(self, text: str, site_context: str,
+                                 product_fields: Optional[List[str]] = None) -> str:
         return f"""
 Extract structured product information from the following e-commerce page content.
 
@@ -174,412 +758,1472 @@ CONTENT TO ANALYZE:
 
 Please extract the following information and return it as a valid JSON object:
 
-{{
-    "product_name": "Full product name or title",
-    "price": "Main price (include currency symbol)",
-    "condition": "New/Used/Refurbished/etc",
-    "country": "Country of origin or shipping",
-    "seller": "Seller or supplier name",
-    "part_number": "Manufacturer part number or model",
-    "manufacturer": "Brand or manufacturer name",
-    "availability": "In stock/Out of stock/Lead time info",
-    "specifications": {{"key": "value pairs of technical specs"}},
-    "price_breaks": [{{"quantity": "1", "price": "$X.XX"}}, {{"quantity": "10", "price": "$Y.YY"}}],
-    "datasheet_url": "URL to technical datasheet if available",
-    "confidence_score": 0.95
-}}
-
-EXTRACTION RULES:
-1. If information is not found, use null (not empty string)
-2. For prices, preserve currency symbols and formatting
-3. Extract all quantity-based pricing if available
-4. Focus on the main product, ignore related/suggested items
-5. Confidence score should reflect how certain you are about the extraction (0.0-1.0)
-6. For specifications, extract key technical parameters
-7. Normalize condition values to standard terms
+{product_json_template(product_fields)}
 
+{EXTRACTION_RULES}
 Return only the JSON object, no additional text.
 """
 
+    def _build_batch_extraction_prompt(self, pages: List[Tuple[int, str, str]]) -> str:
+        """Prompt covering several pages; pages is a list of (index, text, site_context)"""
+        sections = "\n".join(
+            f"=== PAGE {index} ===\nCONTEXT: {site_context}\nCONTENT:\n{text}\n"
+            for index, text, site_context in pages
+        )
+        return f"""
+Extract structured product information from each of the following e-commerce pages.
+Each page is a different product; never mix information between pages.
+
+{sections}
+For every page, extract the following information as a JSON object and add an
+"index" key with the page number:
+
+{PRODUCT_JSON_TEMPLATE}
+
+{EXTRACTION_RULES}
+Return only a JSON object of the form {{"products": [...]}} with one entry per page, no additional text.
+"""
+
+@dataclass
+class PolitenessPolicy:
+    """Per-domain human-like pacing inside a page (seconds as (min, max) ranges)"""
+    scroll_steps: int = 1
+    scroll_delay: Tuple[float, float] = (0.2, 0.5)
+    product_dwell: Tuple[float, float] = (0.0, 0.0)
+    search_dwell: Tuple[float, float] = (0.0, 0.0)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PolitenessPolicy':
+        policy = cls()
+        for key, value in data.items():
+            if key not in {f.name for f in fields(cls)}:
+                raise ValueError(f"Unknown politeness setting: {key}")
+            setattr(policy, key, tuple(value) if isinstance(value, list) else value)
+        return policy
+
+# Built-in pacing per domain; POLITENESS_POLICIES (JSON) overrides or adds entries
+DEFAULT_POLITENESS_POLICIES = {
+    'ebay': {'scroll_steps': 2, 'product_dwell': [0.5, 1.5], 'search_dwell': [0.5, 1.5]}
+}
+POLITENESS_POLICIES = {
+    site: PolitenessPolicy.from_dict(settings)
+    for site, settings in {**DEFAULT_POLITENESS_POLICIES, **json.loads(os.getenv('POLITENESS_POLICIES', '{}'))}.items()
+}
+
+def politeness_policy_for(url: str) -> PolitenessPolicy:
+    domain = urlparse(url).netloc.lower()
+    for site, policy in POLITENESS_POLICIES.items():
+        if site != 'default' and site in domain:
+            return policy
+    return POLITENESS_POLICIES.get('default', PolitenessPolicy())
+
+# Selector groups that mark a product page as rendered: every group needs one match
+PRODUCT_READY_SELECTORS = {
+    'ebay': [
+        ['h1.x-item-title__mainTitle', 'h1'],
+        ['.x-price-primary', '[itemprop="price"]']
+    ],
+    'default': [
+        ['h1'],
+        ['[itemprop="price"]', '[class*="price" i]', '[data-testid*="price" i]']
+    ]
+}
+
+def product_ready_selectors(url: str) -> List[List[str]]:
+    domain = urlparse(url).netloc.lower()
+    for site, groups in PRODUCT_READY_SELECTORS.items():
+        if site != 'default' and site in domain:
+            return groups
+    return PRODUCT_READY_SELECTORS['default']
+
+def has_expected_content(html_content: str, selector_groups: List[List[str]]) -> bool:
+    """True when static HTML already has a match for every ready selector group
+
+    Module-level so it can run in the cleaner executor.
+    """
+    soup = BeautifulSoup(html_content, 'lxml' if lxml is not None else 'html.parser')
+    return all(any(soup.select_one(selector) is not None for selector in group)
+               for group in selector_groups)
+
+# Resolves once the DOM has had no mutations for the given number of milliseconds
+DOM_QUIET_SCRIPT = """
+quietMs => new Promise(resolve => {
+    let timer = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(done, quietMs);
+    });
+    function done() {
+        observer.disconnect();
+        resolve(true);
+    }
+    observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    timer = setTimeout(done, quietMs);
+})
+"""
+
+# Result links (in document order, so in rank order) and the next-page link, in one round trip
+SEARCH_RESULTS_SCRIPT = """
+({linkSelectors, nextSelectors}) => {
+    const found = new Set();
+    for (const selector of linkSelectors) {
+        try { document.querySelectorAll(selector).forEach(element => found.add(element)); } catch (e) {}
+    }
+    const ordered = Array.from(found).sort((a, b) =>
+        a.compareDocumentPosition(b) & Node.DOCUMENT_POSITION_FOLLOWING ? -1 : 1);
+    const links = [];
+    for (const element of ordered) {
+        const link = element.closest('a[href]') || element.querySelector('a[href]');
+        if (link) links.push(link.href);
+    }
+    let next = null;
+    for (const selector of nextSelectors) {
+        try {
+            const element = document.querySelector(selector);
+            if (element && element.href) { next = element.href; break; }
+        } catch (e) {}
+    }
+    return {links, next};
+}
+"""
+
+@dataclass
+class PageLoadStats:
+    url: str
+    requests_allowed: int = 0
+    requests_blocked: int = 0
+    bytes_saved_estimate: int = 0
+    blocked_by_type: Dict[str, int] = field(default_factory=dict)
+
+class ResourceBlocker:
+    """Playwright route interception that aborts resources ContentCleaner never uses
+
+    Blocks by resource type and by tracker/ad domain. Sites can allowlist hosts they
+    need (e.g. a script host that renders prices). Aborted requests are never
+    downloaded, so bytes saved are estimated from typical sizes per resource type.
+    """
+    DEFAULT_BLOCKED_DOMAINS = [
+        'googletagmanager.com', 'google-analytics.com', 'doubleclick.net',
+        'googlesyndication.com', 'googleadservices.com', 'adservice.google.com',
+        'facebook.net', 'connect.facebook.com', 'hotjar.com', 'clarity.ms',
+        'criteo.com', 'criteo.net', 'taboola.com', 'outbrain.com', 'adnxs.com',
+        'amazon-adsystem.com', 'scorecardresearch.com', 'quantserve.com',
+        'bat.bing.com', 'demdex.net', 'omtrdc.net', 'everesttech.net',
+        'ads.linkedin.com', 'snap.licdn.com', 'ct.pinterest.com', 'nr-data.net',
+        'segment.io', 'mouseflow.com', 'fullstory.com', 'crazyegg.com'
+    ]
+    # Typical transfer sizes used to estimate what blocking saved
+    TYPICAL_BYTES = {
+        'image': 25000, 'media': 500000, 'font': 30000, 'stylesheet': 15000,
+        'script': 20000, 'xhr': 3000, 'fetch': 3000, 'manifest': 1000
+    }
+    DEFAULT_BYTES = 5000
+    
+    def __init__(self, blocked_types: Optional[List[str]] = None,
+                 blocked_domains: Optional[List[str]] = None,
+                 site_allowlists: Optional[Dict[str, List[str]]] = None):
+        self.blocked_types = frozenset(BLOCKED_RESOURCE_TYPES if blocked_types is None else blocked_types)
+        self.blocked_domains = list(self.DEFAULT_BLOCKED_DOMAINS if blocked_domains is None else blocked_domains)
+        self.site_allowlists = site_allowlists or {}
+        self.total_blocked = 0
+        self.total_bytes_saved_estimate = 0
+        
+    def _allowed_hosts(self, site_domain: str) -> List[str]:
+        return [host for site, hosts in self.site_allowlists.items()
+                if site in site_domain for host in hosts]
+                
+    def should_block(self, request_url: str, resource_type: str, allowed_hosts: List[str]) -> bool:
+        host = urlparse(request_url).hostname or ''
+        if any(allowed in host for allowed in allowed_hosts):
+            return False
+        if resource_type == 'document':
+            return False  # never abort navigations or frames
+        if resource_type in self.blocked_types:
+            return True
+        return any(host == domain or host.endswith('.' + domain) for domain in self.blocked_domains)
+                   
+    async def install(self, target: Union[BrowserContext, Page], page_url: str) -> PageLoadStats:
+        """Route all requests of a page (or context) through the blocker and return live stats"""
+        stats = PageLoadStats(url=page_url)
+        allowed_hosts = self._allowed_hosts(urlparse(page_url).netloc.lower())
+        
+        async def handle(route):
+            request = route.request
+            if self.should_block(request.url, request.resource_type, allowed_hosts):
+                saved = self.TYPICAL_BYTES.get(request.resource_type, self.DEFAULT_BYTES)
+                stats.requests_blocked += 1
+                stats.bytes_saved_estimate += saved
+                stats.blocked_by_type[request.resource_type] = stats.blocked_by_type.get(request.resource_type, 0) + 1
+                self.total_blocked += 1
+                self.total_bytes_saved_estimate += saved
+                await route.abort()
+            else:
+                stats.requests_allowed += 1
+                await route.continue_()
+                
+        await target.route('**/*', handle)
+        return stats
+        
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'requests_blocked': self.total_blocked,
+            'bytes_saved_estimate': self.total_bytes_saved_estimate
+        }
+
 class UniversalScraper:
-    def __init__(self, api_key: str):
-        self.content_cleaner = ContentCleaner()
-        self.llm_extractor = LLMExtractor(api_key)
-        self.browser: Optional[Browser] = None
+    # Fingerprint of the browser contexts pages are rendered in; warm contexts keep it across a site's pages
+    CONTEXT_OPTIONS = {
+        'viewport': {'width': 1920, 'height': 1080},
+        'user_agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36',
+        'device_scale_factor': 2,
+        'java_script_enabled': True,
+        'has_touch': False,
+        'locale': 'en-US',
+        'timezone_id': 'America/New_York',
+        'extra_http_headers': {
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+            'Cache-Control': 'max-age=0',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+            'Sec-Fetch-Dest': 'document',
+            'Sec-Fetch-Mode': 'navigate',
+            'Sec-Fetch-Site': 'none',
+            'Sec-Fetch-User': '?1'
+        }
+    }
+    
+    def __init__(self, api_key: str, max_concurrency: int = 1,
+                 per_domain_concurrency: Optional[int] = None,
+                 browser_pool: Optional[BrowserPool] = None,
+                 extraction_cache: Optional[CacheBackend] = None,
+                 page_cache: Optional[PageCache] = None,
+                 extraction_batch_size: int = EXTRACTION_BATCH_SIZE,
+                 cleaner_engine: str = CLEANER_ENGINE,
+                 cleaner_executor: Optional[concurrent.futures.Executor] = None,
+                 resource_blocker: Optional[ResourceBlocker] = None,
+                 rate_limiter: Optional[DomainRateLimiter] = None,
+                 http_fetcher: Optional[HttpFetcher] = None,
+                 rules: Optional[SiteRuleRegistry] = None,
+                 metrics: Optional[ScrapeMetrics] = None,
+                 monitor_store: Optional[MonitorStore] = None):
+        self.site_rules = rules or site_rules
+        # Stage timings go to the process-wide metrics and to this scrape's own totals
+        self.metrics = metrics or scrape_metrics
+        self.timings = ScrapeTimings()
+        self.resource_blocker = resource_blocker
+        # Every navigation waits for its domain's turn; share one limiter across scrapers
+        self.rate_limiter = rate_limiter or DomainRateLimiter()
+        # Product pages are tried over plain HTTP first when a fetcher is given
+        self.http_fetcher = http_fetcher
+        self.page_load_stats: List[PageLoadStats] = []
+        self.cleaner_engine = cleaner_engine
+        self.content_cleaner = create_content_cleaner(cleaner_engine)
+        # Cleaning runs in this executor when set, keeping the event loop responsive
+        self.cleaner_executor = cleaner_executor
+        self.llm_extractor = LLMExtractor(api_key, cache=extraction_cache,
+                                          batch_size=extraction_batch_size, rules=self.site_rules,
+                                          metrics=self.metrics)
+        self.llm_extractor.timings = self.timings
+        # ProductData fields a scrape needs; the LLM is only asked for those embedded metadata lacks
+        self.wanted_fields = product_fields_for(None)
+        # Per search: cross-site part numbers (multi-site only) and each result's (rank, site)
+        self.part_index: Optional[PartIndex] = None
+        self.search_ranks: Dict[int, Tuple[int, int]] = {}
+        # Monitoring mode reuses each URL's last product while its page text is (nearly) unchanged
+        self.monitor_store = monitor_store
+        self.monitoring = False
+        self.page_cache = page_cache
+        # A shared pool outlives this scraper; otherwise a private one is opened per session
+        self.browser_pool = browser_pool
+        self._owns_pool = browser_pool is None
+        # Concurrency limits for product scraping (1 = sequential)
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_domain_concurrency = max(1, per_domain_concurrency or self.max_concurrency)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._domain_semaphores: Dict[str, asyncio.Semaphore] = {}
         
     async def __aenter__(self):
-        self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(
-            headless=True,
-            args=[
-                '--no-sandbox',
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--disable-accelerated-2d-canvas',
-                '--no-first-run',
-                '--no-zygote',
-                '--disable-gpu',
-                '--hide-scrollbars',
-                '--mute-audio',
-                f'--window-size={1920 + random.randint(-100, 100)},{1080 + random.randint(-50, 50)}'
-            ]
-        )
+        if self._owns_pool:
+            self.browser_pool = BrowserPool(max_contexts=self.max_concurrency + 1)
+        await self.browser_pool.get_browser()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        try:
-            if self.browser:
-                contexts = self.browser.contexts
-                for context in contexts:
-                    pages = context.pages
-                    for page in pages:
-                        try:
-                            await page.close()
-                        except:
-                            pass
-                    await context.close()
-                await self.browser.close()
-            await self.playwright.stop()
-        except Exception as e:
-            logger.error(f"Error during cleanup: {e}")
-            # Attempt force close
-            try:
-                await self.playwright.stop()
-            except:
-                pass
+        if self._owns_pool and self.browser_pool:
+            await self.browser_pool.close()
         
-    async def search_and_scrape(self, config: SearchConfig) -> List[ProductData]:
-        """Search for products and scrape the results"""
+    async def search_and_scrape(self, config: SearchConfig,
+                                on_search: Optional[Callable[[List[str]], None]] = None,
+                                on_result: Optional[Callable[[int, str, ProductData], None]] = None
+                                ) -> List[ProductData]:
+        """Search for products and scrape the results
+
+        Product pages start loading as soon as their search results page is read,
+        while later result pages are still being fetched. on_search receives each
+        results page's new product URLs (an empty list when nothing was found), and
+        on_result is called with (index, url, product) as soon as each product page
+        finishes. Indexes follow the order result pages arrive in.
+
+        With several sites, all are searched at once and the returned list takes
+        each site's first result, then each site's second, and so on. Listings of
+        a part number already found elsewhere are marked duplicate_of and folded
+        into the first listing's listings; when structured data or site rules give
+        the part number, they are not sent to the LLM.
+        """
         try:
-            search_urls = await self._perform_search(config)
-            if not search_urls:
-                logger.warning(f"No search results found for: {config.search_term}")
-                return []
-                
-            results = []
-            for url in search_urls[:config.max_results]:
-                try:
-                    product_data = await self.scrape_product(url)
-                    results.append(product_data)
-                    await asyncio.sleep(1)  # Rate limiting
-                except Exception as e:
-                    logger.error(f"Error scraping {url}: {e}")
-                    results.append(ProductData())
-                    
+            if config.monitor and on_result:
+                on_result = self._deltas_only(on_result)
+            product_urls = self.search_product_urls(config, on_search)
+            try:
+                results = await self.scrape_urls(config, product_urls, on_result)
+            finally:
+                # Close the search pages even if scraping stopped early
+                await product_urls.aclose()
+            results = rank_results(results, self.search_ranks)
+            if self.monitoring:
+                results = [result for result in results if result.monitor_status != UNCHANGED]
             return results
         except Exception as e:
             logger.error(f"Error in search_and_scrape: {e}")
             return []
-    
-    async def _perform_search(self, config: SearchConfig) -> List[str]:
-        """Perform search on the website and return product URLs"""
-        try:
-            # Create a new context for each search with more realistic browser settings
-            context = await self.browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36',
-                device_scale_factor=2,
-                java_script_enabled=True,
-                has_touch=False,
-                locale='en-US',
-                timezone_id='America/New_York'
-            )
             
-            # Enable JavaScript and cookies
-            await context.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-            """)
-            
-            page = await context.new_page()
-            
-            # Add headers to appear more like a real browser
-            await page.set_extra_http_headers({
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Cache-Control': 'max-age=0',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1'
-            })
+    async def search_product_urls(self, config: SearchConfig,
+                                  on_search: Optional[Callable[[List[str]], None]] = None
+                                  ) -> AsyncIterator[Tuple[int, str]]:
+        """Yield (index, url) as result pages arrive, reporting each page to on_search
+
+        Each index's (rank on its site, site position) is kept in search_ranks.
+        """
+        self.search_ranks = {}
+        index = 0
+        site_counts = [0] * len(config.sites)
+        result_pages = self._harvest_sites(config)
+        try:
+            async for site_index, urls in result_pages:
+                if on_search:
+                    on_search(urls)
+                for url in urls:
+                    self.search_ranks[index] = (site_counts[site_index], site_index)
+                    site_counts[site_index] += 1
+                    yield index, url
+                    index += 1
+        finally:
+            await result_pages.aclose()
+        if index == 0:
+            logger.warning(f"No search results found for: {config.search_term}")
+            if on_search:
+                on_search([])
+                
+    async def scrape_urls(self, config: SearchConfig,
+                          urls: Union[List[str], AsyncIterator[Tuple[int, str]]],
+                          on_result: Optional[Callable[[int, str, ProductData], None]] = None,
+                          part_index: Optional[PartIndex] = None) -> List[ProductData]:
+        """Scrape product pages for the fields, dedupe and monitoring that config asks for
+
+        urls is a list of product URLs, or the (index, url) pairs search_product_urls
+        yields, so pages start loading while later results pages are still read.
+        Results come back in index order, unchanged products included when monitoring.
+        A multi-site search dedupes in part_index, when other scrapes of the same
+        search share one, or else in a new index of its own.
+        """
+        self.wanted_fields = product_fields_for(config.extract_fields, dedupe=len(config.sites) > 1)
+        if len(config.sites) > 1:
+            self.part_index = part_index if part_index is not None else PartIndex()
+        else:
+            self.part_index = None
+        self.monitoring = config.monitor and self.monitor_store is not None
+        if isinstance(urls, list):
+            urls = self._enumerate_urls(urls)
+        if self.llm_extractor.batch_size > 1:
+            return await self._scrape_products_batched(urls, on_result)
+        return await self._scrape_products_streaming(urls, on_result)
+        
+    @staticmethod
+    async def _enumerate_urls(urls: List[str]) -> AsyncIterator[Tuple[int, str]]:
+        for index, url in enumerate(urls):
+            yield index, url
             
-            search_url = self._build_search_url(config.website_url, config.search_term)
-            logger.info(f"Searching: {search_url}")
+    async def _harvest_sites(self, config: SearchConfig) -> AsyncIterator[Tuple[int, List[str]]]:
+        """Search every site concurrently, yielding (site index, urls) per results page as they arrive
+
+        Like a single site's search, a site's next results page is only loaded
+        once its previous page has been taken from here and consumed.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        turns = [asyncio.Semaphore(1) for _ in config.sites]
+        
+        async def harvest(site_index: int, site_config: SearchConfig):
+            result_pages = self._harvest_search_results(site_config)
+            try:
+                while True:
+                    await turns[site_index].acquire()
+                    try:
+                        urls = await result_pages.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    await queue.put((site_index, urls))
+            finally:
+                await result_pages.aclose()
+                await queue.put(None)
+                
+        tasks = [
+            asyncio.create_task(harvest(site_index, replace(config, website_url=site, website_urls=[])))
+            for site_index, site in enumerate(config.sites)
+        ]
+        try:
+            remaining = len(tasks)
+            while remaining:
+                item = await queue.get()
+                if item is None:
+                    remaining -= 1
+                    continue
+                yield item
+                turns[item[0]].release()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
             
-            # Navigate with better error handling and wait conditions
+    @staticmethod
+    def _deltas_only(on_result: Callable[[int, str, ProductData], None]) -> Callable[[int, str, ProductData], None]:
+        def report(index: int, url: str, product_data: ProductData):
+            if product_data.monitor_status != UNCHANGED:
+                on_result(index, url, product_data)
+        return report
+        
+    async def _reuse_snapshot(self, url: str, clean_text: str, known: ProductData) -> Optional[ProductData]:
+        """In monitoring mode, the product from the URL's last scrape when its text barely changed
+
+        Unchanged text skips the LLM; a small diff re-extracts only the monitored
+        fields from the changed lines. None means a full extraction is needed.
+        """
+        if not self.monitoring or not clean_text:
+            return None
+        snapshot = self.monitor_store.get(url)
+        if snapshot is None:
+            return None
+        change = self.monitor_store.compare(snapshot, clean_text)
+        previous = ProductData(**{key: value for key, value in snapshot.product.items() if key in PRODUCT_DATA_FIELDS})
+        if change.unchanged:
+            logger.info(f"{url} is unchanged since the last scrape, skipping the LLM")
+            self.monitor_store.count('unchanged')
+            updated = previous
+        elif change.changed_chars <= self.monitor_store.max_diff_chars:
+            fields = [key for key in self.monitor_store.fields if key in self.wanted_fields]
+            logger.info(f"{url} changed in {change.changed_chars} characters, re-extracting {', '.join(fields) or 'nothing'}")
+            self.monitor_store.count('targeted')
+            updated = previous
+            if fields:
+                with self.span('llm', url):
+                    targeted = await self.llm_extractor.aextract_product_data(change.excerpt, url, fields)
+                updated = replace(previous, **{key: getattr(targeted, key) for key in fields
+                                               if has_value(getattr(targeted, key))})
+        else:
+            return None
+        product_data = merge_product_data(known, updated)
+        product_data.duplicate_of = await self._claim_part(url, product_data)
+        return self._record_snapshot(url, clean_text, product_data, snapshot)
+        
+    def _record_snapshot(self, url: str, clean_text: str, product_data: ProductData,
+                         previous: Optional[Snapshot] = None, full: bool = False) -> ProductData:
+        """In monitoring mode, save the page's snapshot and mark the product new, changed or unchanged"""
+        if not self.monitoring or not clean_text or product_data.duplicate_of:
+            return product_data
+        try:
+            if full:
+                previous = self.monitor_store.get(url)
+                self.monitor_store.count('full' if previous is not None else 'new')
+            stored = {key: value for key, value in asdict(product_data).items() if key in PRODUCT_FIELDS}
+            if not any(has_value(value) for key, value in stored.items() if key != 'confidence_score'):
+                return product_data  # failed extraction; don't let it stand in for the page
+            product_data.monitor_status, changes = self.monitor_store.record(url, clean_text, stored, previous)
+            product_data.changes = changes or None
+        except Exception as e:
+            logger.error(f"Error saving the monitor snapshot of {url}: {e}")
+        return product_data
+        
+    async def _claim_part(self, url: str, product_data: ProductData) -> Optional[str]:
+        """Record the listing's part number; return the URL of an earlier listing of the same part"""
+        if self.part_index is None:
+            return None
+        if self.part_index.shared is not None:
+            # Workers share the index through the broker; keep its round trip off the loop
+            duplicate_of = await asyncio.get_running_loop().run_in_executor(
+                None, self.part_index.claim, product_data.part_number, product_data.manufacturer, url
+            )
+        else:
+            duplicate_of = self.part_index.claim(product_data.part_number, product_data.manufacturer, url)
+        if duplicate_of:
+            logger.info(f"{url} lists the same part as {duplicate_of}")
+        return duplicate_of
+        
+    async def _scrape_products_streaming(self, product_urls: AsyncIterator[Tuple[int, str]],
+                                         on_result: Optional[Callable[[int, str, ProductData], None]] = None
+                                         ) -> List[ProductData]:
+        """Scrape products as they are found, within the concurrency limits (1 = sequential)"""
+        results: List[ProductData] = []
+        
+        async def scrape_and_report(index: int, url: str):
             try:
-                response = await page.goto(search_url, 
-                    wait_until='networkidle',
-                    timeout=30000
+                product_data = await self._scrape_product_bounded(url)
+            except Exception as e:
+                logger.error(f"Error scraping {url}: {e}")
+                product_data = ProductData()
+            product_data.url = url
+            results[index] = product_data
+            if on_result:
+                on_result(index, url, product_data)
+                
+        tasks = []
+        async for index, url in product_urls:
+            results.append(ProductData())
+            tasks.append(asyncio.create_task(scrape_and_report(index, url)))
+        await asyncio.gather(*tasks)
+        return results
+
+    async def _scrape_products_batched(self, product_urls: AsyncIterator[Tuple[int, str]],
+                                       on_result: Optional[Callable[[int, str, ProductData], None]] = None
+                                       ) -> List[ProductData]:
+        """Load pages concurrently and extract them in multi-page LLM batches"""
+        results: List[ProductData] = []
+        pending: List[Tuple[int, str, str]] = []
+        structured: Dict[int, ProductData] = {}
+        learning_html: Dict[int, str] = {}
+        extractions = []
+        
+        def report(index: int, url: str, product_data: ProductData):
+            product_data.url = url
+            results[index] = product_data
+            if on_result:
+                on_result(index, url, product_data)
+                
+        async def extract(batch: List[Tuple[int, str, str]]):
+            with self.span('llm', batch[0][1]):
+                products = await self.llm_extractor.aextract_product_data_batch(
+                    [(clean_text, url) for _, url, clean_text in batch]
                 )
+            for (index, url, clean_text), product_data in zip(batch, products):
+                merged = merge_product_data(structured[index], product_data)
+                merged.duplicate_of = await self._claim_part(url, merged)
+                report(index, url, self._record_snapshot(url, clean_text, merged, full=True))
+                if index in learning_html:
+                    await self._learn_selectors(url, learning_html.pop(index), product_data)
+                
+        def flush():
+            # Extract in the background so the remaining pages keep loading
+            extractions.append(asyncio.create_task(extract(pending[:])))
+            pending.clear()
+                
+        async def load(index: int, url: str):
+            page = await self._run_bounded(url, self._fetch_page(url), None)
+            if page is None:
+                report(index, url, ProductData())
+                return
+            html_content, clean_text, structured[index] = page
+            structured[index].duplicate_of = await self._claim_part(url, structured[index])
+            if structured[index].duplicate_of:
+                report(index, url, structured[index])
+                return
+            reused = await self._reuse_snapshot(url, clean_text, structured[index])
+            if reused is not None:
+                report(index, url, reused)
+                return
+            if not clean_text or not missing_fields(structured[index], self.wanted_fields):
+                report(index, url, self._record_snapshot(url, clean_text, structured[index], full=True))
+                return
+            if self.site_rules.learning:
+                learning_html[index] = html_content
+            pending.append((index, url, clean_text))
+            if len(pending) >= self.llm_extractor.batch_size:
+                flush()
+            
+        loads = []
+        async for index, url in product_urls:
+            results.append(ProductData())
+            loads.append(asyncio.create_task(load(index, url)))
+        await asyncio.gather(*loads)
+        if pending:
+            flush()
+        await asyncio.gather(*extractions)
+        return results
+
+    async def _scrape_product_bounded(self, url: str) -> ProductData:
+        """Scrape a product page within the global and per-domain concurrency limits"""
+        return await self._run_bounded(url, self.scrape_product(url), ProductData())
+        
+    async def _run_bounded(self, url: str, coro, default):
+        """Await a page coroutine within the global and per-domain concurrency limits"""
+        if self._has_fresh_page(url):
+            # Cached pages don't touch the site or the browser
+            return await coro
+        domain = urlparse(url).netloc.lower()
+        domain_semaphore = self._domain_semaphores.get(domain)
+        if domain_semaphore is None:
+            domain_semaphore = asyncio.Semaphore(self.per_domain_concurrency)
+            self._domain_semaphores[domain] = domain_semaphore
+        try:
+            # Take the domain slot first so a busy domain doesn't hold global slots
+            async with domain_semaphore:
+                async with self._semaphore:
+                    return await coro
+        except Exception as e:
+            logger.error(f"Error scraping {url}: {e}")
+            return default
+
+    async def _harvest_search_results(self, config: SearchConfig) -> AsyncIterator[List[str]]:
+        """Yield each search results page's new product URLs until max_results are found
+
+        URLs keep their rank order, lose tracking parameters, and repeat listings of
+        the same product are dropped. Next pages are only loaded once the previous
+        page's URLs have been consumed, and no browser page is held in between.
+        """
+        try:
+            search_url = self._build_search_url(config.website_url, config.search_term)
+            seen = set()
+            found = 0
+            for _ in range(max(1, SEARCH_MAX_PAGES)):
+                if not search_url or found >= config.max_results:
+                    break
+                loaded = await self._load_search_page(search_url, config.website_url)
+                if loaded is None:
+                    break
+                links, next_url = loaded
+                    
+                new_urls = []
+                for url in links:
+                    key = self.site_rules.product_key(url)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    new_urls.append(url)
+                    if found + len(new_urls) >= config.max_results:
+                        break
+                if not new_urls:
+                    break  # past the last page, or pagination looped back
+                found += len(new_urls)
+                yield new_urls
+                search_url = next_url if next_url and next_url != search_url else None
+        except Exception as e:
+            logger.error(f"Error performing search: {e}")
+            
+    async def _load_search_page(self, search_url: str, base_url: str) -> Optional[Tuple[List[str], Optional[str]]]:
+        """Product URLs and next page URL of one search results page, or None if it failed to load"""
+        logger.info(f"Searching: {search_url}")
+        try:
+            await self._acquire(search_url)
+            # Search pages share the site's warm context, and its fingerprint, with its product pages
+            async with self._browser_page(base_url) as page:
+                load_stats = await self._block_resources(page, search_url)
+                with self.span('search', search_url):
+                    response = await page.goto(search_url, 
+                        wait_until='domcontentloaded',
+                        timeout=30000
+                    )
+                self._record_response(search_url, response)
                 
                 if not response.ok:
                     logger.error(f"HTTP {response.status} when loading {search_url}")
-                    return []
+                    self.metrics.error('search', search_url, self.timings)
+                    self.browser_pool.discard(page)
+                    return None
                 
-                # Wait for key elements to be visible
-                await page.wait_for_load_state('domcontentloaded')
-                await page.wait_for_load_state('networkidle')
-                
-                # Random wait between 2-5 seconds to mimic human behavior
-                await asyncio.sleep(2 + 3 * random.random())
+                # Continue once result links render or the DOM settles
+                await self._wait_until_ready(page, [self._result_link_selectors(base_url)])
+                await self._pace_page(page, politeness_policy_for(search_url), search=True)
                 
                 # Extract product URLs from search results
-                product_urls = await self._extract_product_urls(page, config.website_url)
-                await page.close()
-                
-                return product_urls
-            except Exception as e:
-                logger.error(f"Error navigating to search page: {e}")
-                return []
-            product_urls = await self._extract_product_urls(page, config.website_url)
-            await page.close()
-            
-            return product_urls
+                loaded = await self._extract_product_urls(page, base_url)
+                self._log_page_load(load_stats)
+                return loaded
         except Exception as e:
-            logger.error(f"Error performing search: {e}")
-            return []
+            logger.error(f"Error navigating to search page: {e}")
+            return None
     
     def _build_search_url(self, website_url: str, search_term: str) -> str:
         """Build search URL for different websites"""
-        domain = urlparse(website_url).netloc.lower()
-        encoded_term = quote(search_term)
-        
-        if 'ebay.com' in domain:
-            return f"https://www.ebay.com/sch/i.html?_nkw={encoded_term}"
-        elif 'ebay.de' in domain:
-            return f"https://www.ebay.de/sch/i.html?_nkw={encoded_term}"
-        elif 'digikey.com' in domain:
-            return f"https://www.digikey.com/en/products/filter?keywords={encoded_term}"
-        elif 'digikey.de' in domain:
-            return f"https://www.digikey.de/de/products/filter?keywords={encoded_term}"
-        elif 'rs-online.com' in domain:
-            return f"https://uk.rs-online.com/web/c/?searchTerm={encoded_term}"
-        elif 'mouser.com' in domain:
-            return f"https://www.mouser.com/c/?q={encoded_term}"
-        elif 'radwell.com' in domain:
-            return f"https://www.radwell.com/shop?q={encoded_term}"
-        else:
-            # Generic search - try common patterns
-            return f"{website_url}/search?q={encoded_term}"
+        return self.site_rules.search_url(website_url, search_term)
     
-    async def _extract_product_urls(self, page: Page, base_url: str) -> List[str]:
-        """Extract product URLs from search results page"""
-        try:
-            domain = urlparse(base_url).netloc.lower()
-            
-            if 'ebay' in domain:
-                selectors = [
-                    'a[href*="/itm/"]',
-                    '.s-item__link',
-                    '.x-item-title-label'
-                ]
-            elif 'digikey' in domain:
-                selectors = [
-                    'a[href*="/product-detail/"]',
-                    '.product-details-link'
-                ]
-            elif 'rs-online' in domain:
-                selectors = [
-                    'a[href*="/product/"]',
-                    '.product-result-link'
-                ]
-            else:
-                # Generic selectors
-                selectors = [
-                    'a[href*="/product"]',
-                    'a[href*="/item"]',
-                    'a[href*="/p/"]',
-                    '.product-link',
-                    '.item-link'
-                ]
-            
-            urls = set()
-            for selector in selectors:
-                try:
-                    elements = await page.query_selector_all(selector)
-                    for element in elements:
-                        href = await element.get_attribute('href')
-                        if href:
-                            if href.startswith('/'):
-                                href = urljoin(base_url, href)
-                            elif not href.startswith('http'):
-                                continue
-                            urls.add(href)
-                except:
-                    continue
-            
-            return list(urls)[:10]  # Limit to 10 URLs
-        except Exception as e:
-            logger.error(f"Error extracting product URLs: {e}")
-            return []
+    def _result_link_selectors(self, base_url: str) -> List[str]:
+        """Selectors for product links on a site's search results page"""
+        return self.site_rules.result_link_selectors(base_url)
+    
+    async def _extract_product_urls(self, page: Page, base_url: str) -> Tuple[List[str], Optional[str]]:
+        """Return the normalized product URLs on a search results page and the next page's URL"""
+        result = await page.evaluate(SEARCH_RESULTS_SCRIPT, {
+            'linkSelectors': self._result_link_selectors(base_url),
+            'nextSelectors': self.site_rules.next_page_selectors(base_url)
+        })
+        urls = [url for url in (normalize_url(href, page.url) for href in result['links']) if url]
+        next_url = normalize_url(result['next'], page.url) if result.get('next') else None
+        return urls, next_url
     
     async def scrape_product(self, url: str) -> ProductData:
         """Scrape individual product page"""
         try:
-            # Create a new context for each product with different fingerprint
-            context = await self.browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36',
-                device_scale_factor=2,
-                java_script_enabled=True,
-                has_touch=False,
-                locale='en-US',
-                timezone_id='America/New_York'
+            page = await self._fetch_page(url)
+            if page is None:
+                return ProductData()
+            html_content, clean_text, known = page
+            
+            # Another site's listing of the same part was already extracted
+            known.duplicate_of = await self._claim_part(url, known)
+            if known.duplicate_of:
+                return known
+            
+            reused = await self._reuse_snapshot(url, clean_text, known)
+            if reused is not None:
+                return reused
+            
+            # Metadata and site rules may already answer everything; otherwise ask only for the rest
+            missing = missing_fields(known, self.wanted_fields)
+            if not missing or not clean_text:
+                logger.info(f"Scraped {url} from structured data without the LLM")
+                return self._record_snapshot(url, clean_text, known, full=True)
+            if len(missing) == len(PRODUCT_FIELD_EXAMPLES) - 1:
+                missing = None  # nothing found, use the full prompt
+            with self.span('llm', url):
+                product_data = await self.llm_extractor.aextract_product_data(clean_text, url, missing)
+            if self.site_rules.learning:
+                await self._learn_selectors(url, html_content, product_data)
+            
+            logger.info(f"Successfully scraped {url}")
+            merged = merge_product_data(known, product_data)
+            merged.duplicate_of = await self._claim_part(url, merged)
+            return self._record_snapshot(url, clean_text, merged, full=True)
+        except Exception as e:
+            logger.error(f"Error scraping {url}: {e}")
+            return ProductData()
+            
+    async def _fetch_page(self, url: str) -> Optional[Tuple[str, str, ProductData]]:
+        """Load a product page and return (html, clean text, fields known without the LLM), or None on failure"""
+        try:
+            html_content = await self._load_product_html(url)
+            if html_content is None:
+                return None
+            
+            clean_text, known = await self._process_html(html_content, url)
+            if not clean_text and not known:
+                logger.warning(f"No clean text extracted from {url}")
+                return None
+            return html_content, clean_text, ProductData(**known)
+        except Exception as e:
+            logger.error(f"Error loading {url}: {e}")
+            return None
+            
+    async def _wait_until_ready(self, page: Page, selector_groups: List[List[str]],
+                                timeout: float = READY_TIMEOUT, quiet_ms: int = DOM_QUIET_MS):
+        """Return when every selector group has a match or the DOM stops changing
+
+        Gives up silently after timeout seconds; the page is used as it is then.
+        """
+        waiters = [asyncio.ensure_future(page.evaluate(DOM_QUIET_SCRIPT, quiet_ms))]
+        if selector_groups:
+            waiters.append(asyncio.ensure_future(page.wait_for_function(
+                "groups => groups.every(group => group.some(selector => document.querySelector(selector)))",
+                arg=selector_groups,
+                timeout=timeout * 1000
+            )))
+        try:
+            with self.span('readiness', page.url):
+                done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                logger.info(f"Page not ready after {timeout}s, continuing: {page.url}")
+        finally:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.cancel()
+            # Retrieve results so failed waiters don't log "exception never retrieved"
+            await asyncio.gather(*waiters, return_exceptions=True)
+            
+    async def _pace_page(self, page: Page, policy: PolitenessPolicy, search: bool = False):
+        """Human-like scrolling and dwell time as configured for the page's domain"""
+        with self.span('pacing', page.url):
+            if not search:
+                for _ in range(policy.scroll_steps):
+                    await page.evaluate(f"window.scrollTo(0, {random.randint(100, 700)})")
+                    await asyncio.sleep(random.uniform(*policy.scroll_delay))
+            dwell = policy.search_dwell if search else policy.product_dwell
+            if dwell[1] > 0:
+                await asyncio.sleep(random.uniform(*dwell))
+            
+    def _browser_page(self, url: str):
+        """Lease a page in the site's warm browser context (see BrowserPool.page)"""
+        return self.browser_pool.page(urlparse(url).netloc.lower(), self._setup_context, **self.CONTEXT_OPTIONS)
+        
+    async def _setup_context(self, context: BrowserContext):
+        await context.add_init_script("""
+            Object.defineProperty(navigator, 'webdriver', {
+                get: () => undefined
+            });
+            // Track mouse movement like a real visitor's page would
+            window.addEventListener('mousemove', function(e) {
+                window._lastMouseMove = Date.now();
+            });
+        """)
+        
+    async def _block_resources(self, page: Page, url: str) -> Optional[PageLoadStats]:
+        if self.resource_blocker is None:
+            return None
+        load_stats = await self.resource_blocker.install(page, url)
+        self.page_load_stats.append(load_stats)
+        return load_stats
+        
+    def _log_page_load(self, load_stats: Optional[PageLoadStats]):
+        if load_stats is not None and load_stats.requests_blocked:
+            logger.info(f"Blocked {load_stats.requests_blocked} of "
+                        f"{load_stats.requests_blocked + load_stats.requests_allowed} requests "
+                        f"(~{load_stats.bytes_saved_estimate // 1024} KB saved) on {load_stats.url}")
+            
+    async def _process_html(self, html_content: str, url: str) -> Tuple[str, Dict[str, Any]]:
+        field_rules = self.site_rules.field_rules(url)
+        with self.span('cleaning', url):
+            if self.cleaner_executor is None:
+                return (self.content_cleaner.extract_clean_text(html_content, url),
+                        extract_known_fields(html_content, self.wanted_fields, field_rules))
+            # Only the raw HTML goes to the worker and only the extracted data comes back
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.cleaner_executor, process_html, html_content, url, self.cleaner_engine,
+                self.wanted_fields, field_rules
             )
+        
+    async def _learn_selectors(self, url: str, html_content: str, product_data: ProductData):
+        """Propose selectors for LLM values on fields the site has no rule for yet"""
+        ruled = self.site_rules.field_rules(url)
+        values = {key: value for key, value in asdict(product_data).items() if key not in ruled}
+        try:
+            if self.cleaner_executor is None:
+                proposals = propose_selectors(html_content, values)
+            else:
+                loop = asyncio.get_running_loop()
+                proposals = await loop.run_in_executor(self.cleaner_executor, propose_selectors, html_content, values)
+            self.site_rules.record_proposals(url, proposals)
+        except Exception as e:
+            logger.warning(f"Selector learning failed for {url}: {e}")
+            
+    def _has_fresh_page(self, url: str) -> bool:
+        return self.page_cache is not None and self.page_cache.get_fresh(url, record=False) is not None
+            
+    def _record_response(self, url: str, response):
+        """Let the rate limiter back off when a site answers 429/503"""
+        if response is not None:
+            self.rate_limiter.record_response(url, response.status, response.headers.get('retry-after'))
+            
+    def span(self, stage: str, url: Optional[str]):
+        """Time a stage of this scrape for /metrics and the scrape's own timings"""
+        return self.metrics.span(stage, url, self.timings)
+        
+    async def _acquire(self, url: str):
+        """Wait for the rate limiter, timing the wait"""
+        with self.span('rate_limit', url):
+            await self.rate_limiter.acquire(url)
+            
+    async def _load_product_html(self, url: str) -> Optional[str]:
+        """Return product HTML from the page cache, a plain HTTP fetch or the browser"""
+        cached_page = self.page_cache.lookup(url) if self.page_cache is not None else None
+        if self.page_cache is not None and self.page_cache.is_fresh(cached_page):
+            logger.info(f"Page cache hit for {url}")
+            return cached_page.html
+            
+        slot_held = False
+        if self.http_fetcher is not None and self.http_fetcher.should_try(url):
+            html_content, answered, current = await self._fetch_static_html(url, cached_page)
+            if html_content is not None:
+                return html_content
+            if current:
+                cached_page = None  # the site sent a newer page, so the cached one is outdated
+            # A request that got no answer hands its rate limit slot on to the browser
+            slot_held = not answered
+            
+        html_content = await self._render_product_html(url, cached_page, slot_held)
+        if html_content is not None and self.http_fetcher is not None:
+            self.http_fetcher.record(url, 'browser')
+        return html_content
+        
+    async def _fetch_static_html(self, url: str,
+                                 cached_page: Optional[CachedPage]) -> Tuple[Optional[str], bool, bool]:
+        """Fetch a page without the browser
+
+        Returns (html, answered, current): html is None when the page has to be
+        rendered, answered whether the site responded at all, and current whether
+        it sent a usable new version of the page.
+        """
+        try:
+            await self._acquire(url)
+            with self.span('navigation', url):
+                result = await self.http_fetcher.fetch(
+                    url, headers=cached_page.validator_headers() if cached_page is not None else None
+                )
+            self._record_response(url, result)
+        except Exception as e:
+            self.http_fetcher.record_fallback(url, f"request failed: {e}")
+            return None, False, False
+            
+        if result.status == 304 and cached_page is not None:
+            logger.info(f"Page cache revalidated for {url}")
+            self.http_fetcher.record(url, 'http')
+            return self.page_cache.mark_revalidated(cached_page).html, True, True
+        if self.http_fetcher.is_challenge(result):
+            self.http_fetcher.record_fallback(url, "bot challenge")
+            return None, True, False
+        if not result.ok or not result.html:
+            reason = "response too large" if result.truncated else f"HTTP {result.status}"
+            self.http_fetcher.record_fallback(url, reason)
+            return None, True, False
+            
+        selector_groups = product_ready_selectors(url)
+        if self.cleaner_executor is None:
+            complete = has_expected_content(result.html, selector_groups)
+        else:
+            loop = asyncio.get_running_loop()
+            complete = await loop.run_in_executor(
+                self.cleaner_executor, has_expected_content, result.html, selector_groups
+            )
+        if not complete:
+            self.http_fetcher.record_fallback(url, "expected content missing")
+            return None, True, True
+            
+        logger.info(f"Fetched {url} without the browser")
+        self.http_fetcher.record(url, 'http')
+        if self.page_cache is not None:
+            self.page_cache.store(
+                url, result.html,
+                etag=result.headers.get('etag'),
+                last_modified=result.headers.get('last-modified')
+            )
+        return result.html, True, True
+        
+    async def _render_product_html(self, url: str, cached_page: Optional[CachedPage],
+                                   slot_held: bool = False) -> Optional[str]:
+        """Render a product page in the browser and store it in the page cache
+
+        slot_held means the caller already took a rate limit slot for this page
+        without using it, so the first request here goes without waiting again.
+        """
+        async with self._browser_page(url) as page:
+            
+            # A stale page the site says is unchanged can be reused without rendering
+            if cached_page is not None and cached_page.validator_headers():
+                try:
+                    if not slot_held:
+                        await self._acquire(url)
+                    slot_held = False
+                    with self.span('navigation', url):
+                        revalidation = await page.context.request.get(
+                            url, headers=cached_page.validator_headers(), timeout=15000
+                        )
+                    self._record_response(url, revalidation)
+                    if revalidation.status == 304:
+                        logger.info(f"Page cache revalidated for {url}")
+                        return self.page_cache.mark_revalidated(cached_page).html
+                except Exception as e:
+                    logger.warning(f"Revalidation failed for {url}: {e}")
             
             # Randomize viewport slightly
             width = 1920 + random.randint(-100, 100)
             height = 1080 + random.randint(-50, 50)
-            await context.set_viewport_size({"width": width, "height": height})
-            
-            page = await context.new_page()
-            
-            # Set realistic headers
-            await page.set_extra_http_headers({
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Cache-Control': 'max-age=0',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1'
-            })
-            
-            # Add mousemove event handler to simulate human-like behavior
-            await page.evaluate("""
-                window.addEventListener('mousemove', function(e) {
-                    window._lastMouseMove = Date.now();
-                });
-            """)
-            
-            response = await page.goto(url, wait_until='networkidle', timeout=45000)
+            load_stats = await self._block_resources(page, url)
+            await page.set_viewport_size({"width": width, "height": height})
+            
+            if not slot_held:
+                await self._acquire(url)
+            with self.span('navigation', url):
+                response = await page.goto(url, wait_until='domcontentloaded', timeout=45000)
+            self._record_response(url, response)
             if not response.ok:
                 logger.error(f"HTTP {response.status} when loading {url}")
-                return ProductData()
+                self.metrics.error('navigation', url, self.timings)
+                self.browser_pool.discard(page)
+                return None
             
-            # Wait for key states and do some random scrolling
-            await page.wait_for_load_state('domcontentloaded')
-            await page.wait_for_load_state('networkidle')
+            # Continue once title/price render or the DOM settles, then scroll for lazy content
+            await self._wait_until_ready(page, product_ready_selectors(url))
+            await self._pace_page(page, politeness_policy_for(url))
             
-            # Scroll the page randomly to trigger lazy loading
-            for _ in range(3):
-                await page.evaluate(f"window.scrollTo(0, {random.randint(100, 700)})")
-                await asyncio.sleep(0.5 + random.random())
+            html_content = await page.content()
+            self._log_page_load(load_stats)
             
-            # Wait between 2-4 seconds
-            await asyncio.sleep(2 + 2 * random.random())
+        if self.page_cache is not None:
+            self.page_cache.store(
+                url, html_content,
+                etag=response.headers.get('etag'),
+                last_modified=response.headers.get('last-modified')
+            )
+        return html_content
+
+class BackgroundEventLoop:
+    """Dedicated asyncio loop thread that request threads submit coroutines to"""
+    def __init__(self, name: str = 'scraper-event-loop'):
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self.loop = asyncio.new_event_loop()
+            started = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, args=(started,), name=self.name, daemon=True
+            )
+            self._thread.start()
+            started.wait()
             
-            html_content = await page.content()
-            clean_text = self.content_cleaner.extract_clean_text(html_content, url)
+    def _run(self, started: threading.Event):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(started.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
             
-            if not clean_text:
-                logger.warning(f"No clean text extracted from {url}")
-                return ProductData()
+    def submit(self, coro) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop and return a thread-safe future"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+        
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the loop and block the calling thread for its result"""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
             
-            product_data = self.llm_extractor.extract_product_data(clean_text, url)
-            await page.close()
+    def stop(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                return
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=10)
+            self._thread = None
+
+# Process-wide event loop and browser pool shared by all requests
+event_loop = BackgroundEventLoop()
+browser_pool = BrowserPool(
+    max_contexts=BROWSER_MAX_CONTEXTS,
+    max_pages_per_browser=BROWSER_MAX_PAGES,
+    max_idle_contexts=BROWSER_IDLE_CONTEXTS,
+    max_pages_per_context=BROWSER_CONTEXT_MAX_PAGES,
+    memory_limit_mb=BROWSER_MEMORY_LIMIT_MB
+)
+extraction_cache = create_cache(
+    EXTRACTION_CACHE,
+    path=EXTRACTION_CACHE_PATH,
+    table='llm_extractions',
+    ttl=EXTRACTION_CACHE_TTL,
+    max_entries=EXTRACTION_CACHE_SIZE
+)
+_page_cache_backend = create_cache(
+    PAGE_CACHE,
+    path=PAGE_CACHE_PATH,
+    table='pages',
+    ttl=PAGE_CACHE_MAX_STALE,
+    max_entries=PAGE_CACHE_SIZE
+)
+resource_blocker = ResourceBlocker(
+    blocked_domains=ResourceBlocker.DEFAULT_BLOCKED_DOMAINS + BLOCKED_DOMAINS,
+    site_allowlists=RESOURCE_BLOCKING_ALLOWLIST
+) if RESOURCE_BLOCKING else None
+page_cache = PageCache(_page_cache_backend, fresh_ttl=PAGE_CACHE_TTL) if _page_cache_backend is not None else None
+_monitor_backend = create_cache(
+    MONITOR_STORE,
+    path=MONITOR_STORE_PATH,
+    table='product_snapshots',
+    max_entries=MONITOR_STORE_SIZE
+)
+monitor_store = MonitorStore(
+    _monitor_backend, fields=MONITOR_FIELDS, max_diff_chars=MONITOR_MAX_DIFF_CHARS
+) if _monitor_backend is not None else None
+broker = create_broker(SCRAPER_BROKER)
+rate_limiter = DomainRateLimiter(
+    rate_limits={
+        **DEFAULT_RATE_LIMITS,
+        **{site: (float(limit.get('rate', RATE_LIMIT_DEFAULT)), int(limit.get('burst', RATE_LIMIT_BURST)))
+           for site, limit in RATE_LIMITS.items()}
+    },
+    default_rate=(RATE_LIMIT_DEFAULT, RATE_LIMIT_BURST),
+    respect_robots=RESPECT_ROBOTS_TXT,
+    backoff=RATE_LIMIT_BACKOFF,
+    shared=broker
+)
+http_fetcher = HttpFetcher(
+    timeout=HTTP_FETCH_TIMEOUT,
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_fallbacks=HTTP_MAX_FALLBACKS
+) if HTTP_FAST_PATH else None
+
+def _cache_lookup_samples() -> List[Tuple[Dict[str, str], float]]:
+    samples = []
+    for name, cache in (('extraction', extraction_cache), ('page', page_cache)):
+        if cache is not None:
+            cache_stats = cache.stats()
+            samples.append(({'cache': name, 'result': 'hit'}, cache_stats['hits']))
+            samples.append(({'cache': name, 'result': 'miss'}, cache_stats['misses']))
+    return samples
+
+def _fetch_tier_samples() -> List[Tuple[Dict[str, str], float]]:
+    if http_fetcher is None:
+        return []
+    return [({'domain': domain, 'tier': tier}, tiers[tier])
+            for domain, tiers in http_fetcher.stats()['domains'].items()
+            for tier in ('http', 'browser', 'fallbacks')]
+
+# Values other components already track, read when /metrics is scraped
+metrics_registry.collect('scraper_active_browser_contexts', 'Browser contexts currently open', 'gauge',
+                         lambda: [({}, browser_pool.active_contexts)])
+metrics_registry.collect('scraper_idle_browser_contexts', 'Warm browser contexts kept for reuse', 'gauge',
+                         lambda: [({}, browser_pool.idle_contexts)])
+metrics_registry.collect('scraper_browser_contexts_total', 'Browser contexts by how pages got them', 'counter',
+                         lambda: [({'result': 'created'}, browser_pool.contexts_created),
+                                  ({'result': 'reused'}, browser_pool.contexts_reused)])
+metrics_registry.collect('scraper_process_memory_bytes', 'Resident memory of the scraper and its browsers, '
+                         'when BROWSER_MEMORY_LIMIT_MB is set', 'gauge',
+                         lambda: [({}, browser_pool.memory_bytes)] if browser_pool.memory_bytes is not None else [])
+metrics_registry.collect('scraper_browser_restarts_total', 'Shared browser restarts after disconnects', 'counter',
+                         lambda: [({}, browser_pool.restarts)])
+metrics_registry.collect('scraper_cache_lookups_total', 'Extraction and page cache lookups', 'counter',
+                         _cache_lookup_samples)
+metrics_registry.collect('scraper_monitor_checks_total', 'Monitored product pages by how they were re-checked', 'counter',
+                         lambda: [({'result': check}, count) for check, count in monitor_store.stats()['checks'].items()]
+                         if monitor_store is not None else [])
+metrics_registry.collect('scraper_fetch_tier_pages_total', 'Product pages by fetch tier', 'counter',
+                         _fetch_tier_samples)
+metrics_registry.collect('scraper_blocked_requests_total', 'Browser requests aborted by resource blocking', 'counter',
+                         lambda: [({}, resource_blocker.total_blocked)] if resource_blocker is not None else [])
+
+def create_scraper(api_key: str, concurrency: int) -> UniversalScraper:
+    """Scraper sharing the process-wide browser pool, caches, limiters and fetcher"""
+    return UniversalScraper(
+        api_key,
+        max_concurrency=concurrency,
+        per_domain_concurrency=min(concurrency, PER_DOMAIN_CONCURRENCY),
+        browser_pool=browser_pool,
+        extraction_cache=extraction_cache,
+        page_cache=page_cache,
+        cleaner_executor=get_cleaner_executor(),
+        resource_blocker=resource_blocker,
+        rate_limiter=rate_limiter,
+        http_fetcher=http_fetcher,
+        monitor_store=monitor_store
+    )
+
+def run_async(coro, timeout: Optional[float] = None):
+    """Run a coroutine on the shared event loop from a request thread"""
+    return event_loop.run(coro, timeout)
+
+@atexit.register
+def _shutdown_event_loop():
+    try:
+        if event_loop.loop is not None and event_loop.loop.is_running():
+            run_async(browser_pool.close(), timeout=30)
+            if http_fetcher is not None:
+                run_async(http_fetcher.aclose(), timeout=10)
+    except Exception:
+        pass
+    event_loop.stop()
+
+async def _run_job(job: ScrapeJob, api_key: str, concurrency: int):
+    """Run a scrape job on the event loop, publishing each product as it finishes"""
+    job_manager.set_running(job)
+    scraper = create_scraper(api_key, concurrency)
+    
+    def publish_result(index: int, url: str, product: ProductData):
+        with scraper.span('serialization', url):
+            job_manager.add_result(job, index, url, product)
             
-            logger.info(f"Successfully scraped {url}")
-            return product_data
-        except Exception as e:
-            logger.error(f"Error scraping {url}: {e}")
-            return ProductData()
+    error, outcome = None, 'completed'
+    try:
+        async with asyncio.timeout(SCRAPE_TIMEOUT):
+            async with scraper:
+                await scraper.search_and_scrape(
+                    job.config,
+                    on_search=lambda urls: job_manager.add_search_results(job, urls),
+                    on_result=publish_result
+                )
+        logger.info(f"Job {job.job_id} completed")
+    except asyncio.TimeoutError:
+        logger.error(f"Job {job.job_id} timed out after {SCRAPE_TIMEOUT} seconds")
+        error, outcome = 'Scraping operation timed out', 'timeout'
+    except Exception as e:
+        logger.error(f"Job {job.job_id} failed: {e}")
+        error, outcome = str(e), 'failed'
+    timings = scraper.timings.to_dict()
+    scrape_metrics.observe_scrape(job.config.website_url, timings['wall_seconds'], outcome)
+    job_manager.finish(job, error=error, timings=timings)
+
+job_manager = JobManager(ttl=JOB_TTL)
+
+def _parse_scrape_request(data: Optional[Dict[str, Any]]):
+    """Validate a scrape request body and return (config, api_key, concurrency)
+
+    Raises ValueError with a client-facing message when the body is invalid.
+    """
+    if not data:
+        raise ValueError('No JSON data received')
+        
+    # Validate required fields; website_urls (a list) can stand in for website_url
+    required_fields = ['website_url', 'search_term', 'extract_fields', 'max_results', 'api_key']
+    missing_fields = [field for field in required_fields if not data.get(field)
+                      and not (field == 'website_url' and data.get('website_urls'))]
+    if missing_fields:
+        raise ValueError(f'Missing required fields: {", ".join(missing_fields)}')
+        
+    # Validate field types and values
+    if not isinstance(data['extract_fields'], list):
+        raise ValueError('extract_fields must be an array')
+        
+    website_urls = data.get('website_urls') or []
+    if not isinstance(website_urls, list) or not all(isinstance(url, str) and url for url in website_urls):
+        raise ValueError('website_urls must be an array of URLs')
+    if data.get('website_url'):
+        website_urls = [data['website_url'], *website_urls]
+    website_urls = list(dict.fromkeys(website_urls))
+    if len(website_urls) > MAX_SEARCH_SITES:
+        raise ValueError(f'At most {MAX_SEARCH_SITES} websites can be searched at once')
+        
+    try:
+        max_results = int(data['max_results'])
+    except (ValueError, TypeError):
+        raise ValueError('max_results must be a valid number')
+    if max_results < 1 or max_results > 50:
+        raise ValueError('max_results must be between 1 and 50')
+        
+    try:
+        concurrency = int(data.get('concurrency', MAX_CONCURRENCY))
+    except (ValueError, TypeError):
+        concurrency = 0
+    if concurrency < 1:
+        raise ValueError('concurrency must be a positive number')
+    concurrency = min(concurrency, MAX_CONCURRENCY)
+    
+    # Create search configuration
+    config = SearchConfig(
+        website_url=website_urls[0],
+        search_term=data['search_term'],
+        extract_fields=data['extract_fields'],
+        max_results=max_results,
+        website_urls=website_urls if len(website_urls) > 1 else [],
+        monitor=bool(data.get('monitor'))
+    )
+    return config, data['api_key'], concurrency
+
+dispatcher = Dispatcher(broker, job_manager, scrape_metrics, timeout=SCRAPE_TIMEOUT) if broker is not None else None
+
+_batch_queue: Optional[BatchQueue] = None
+_batch_queue_lock = threading.Lock()
+
+def get_batch_queue() -> BatchQueue:
+    """Process-wide batch queue, opened (and recovered after a crash) on first use"""
+    global _batch_queue
+    with _batch_queue_lock:
+        if _batch_queue is None:
+            _batch_queue = BatchQueue(
+                BATCH_DB_PATH, BATCH_OUTPUT_DIR,
+                max_attempts=BATCH_MAX_ATTEMPTS, retry_delay=BATCH_RETRY_DELAY,
+                lease_timeout=BATCH_LEASE_TIMEOUT
+            )
+            requeued = _batch_queue.recover()
+            if requeued:
+                logger.info(f"Requeued {requeued} batch items interrupted by a restart")
+        return _batch_queue
+
+batch_runner = BatchRunner(
+    get_batch_queue, event_loop.submit, create_scraper, scrape_metrics,
+    dispatcher=dispatcher,
+    default_api_key=DEFAULT_API_KEY,
+    concurrency=BATCH_CONCURRENCY,
+    timeout=SCRAPE_TIMEOUT
+)
+
+def resume_batches():
+    """Requeue interrupted batch items and start on them, or log which batches need their API key
+
+    Called once when the server starts, from the __main__ block or wsgi.py. Importing
+    this module must not resume anything: the cleaner's process pool re-imports it.
+    """
+    if not BATCH_RESUME or not os.path.exists(BATCH_DB_PATH):
+        return
+    try:
+        pending = get_batch_queue().pending_batches()
+    except Exception as e:
+        logger.error(f"Error opening the batch queue: {e}")
+        return
+    if pending and DEFAULT_API_KEY:
+        batch_runner.start()
+    elif pending:
+        logger.info(f"{len(pending)} batches wait for POST /api/batches/<batch_id>/resume with an api_key")
+
+# Column names accepted for the search term and site(s) of a CSV part list
+BATCH_TERM_COLUMNS = ('search_term', 'part_number', 'part number', 'mpn', 'part', 'query')
+BATCH_SITE_COLUMNS = ('website_url', 'website_urls', 'website', 'site', 'url')
+
+def _split_sites(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return [site for site in value if isinstance(site, str) and site.strip()]
+    return [site for site in re.split(r'[\s;|]+', str(value or '')) if site]
+
+def _parse_batch_csv(text: str) -> List[Dict[str, Any]]:
+    """Items from a CSV part list with a header row naming the search term column"""
+    reader = csv.DictReader(io.StringIO(text.lstrip('\ufeff')))
+    columns = {name.strip().lower(): name for name in reader.fieldnames or [] if name}
+    term_column = next((columns[name] for name in BATCH_TERM_COLUMNS if name in columns), None)
+    if term_column is None:
+        raise ValueError(f'csv needs a header row with one of: {", ".join(BATCH_TERM_COLUMNS)}')
+    site_column = next((columns[name] for name in BATCH_SITE_COLUMNS if name in columns), None)
+    items = []
+    for row in reader:
+        item = {'search_term': row.get(term_column) or ''}
+        if site_column and row.get(site_column):
+            item['website_urls'] = _split_sites(row[site_column])
+        if columns.get('max_results') and row.get(columns['max_results']):
+            item['max_results'] = row[columns['max_results']]
+        items.append(item)
+    return items
+
+def _parse_batch_request(data: Optional[Dict[str, Any]]):
+    """Validate a batch request body and return (items, settings, api_key)
+
+    Items come from "items" (search terms or objects with search_term and
+    optional website_url(s) and max_results) or from "csv" text. Sites and
+    max_results default to the request's own. Repeated items are dropped.
+    Raises ValueError with a client-facing message when the body is invalid.
+    """
+    if not data:
+        raise ValueError('No JSON data received')
+    if not data.get('api_key'):
+        raise ValueError('Missing required fields: api_key')
+    if not isinstance(data.get('extract_fields'), list) or not data['extract_fields']:
+        raise ValueError('extract_fields must be a non-empty array')
+        
+    if data.get('csv'):
+        if not isinstance(data['csv'], str):
+            raise ValueError('csv must be a string')
+        raw_items = _parse_batch_csv(data['csv'])
+    elif isinstance(data.get('items'), list):
+        raw_items = [{'search_term': item} if isinstance(item, str) else item for item in data['items']]
+    else:
+        raise ValueError('Provide items (an array) or csv')
+    if not raw_items:
+        raise ValueError('The batch has no items')
+    if len(raw_items) > BATCH_MAX_ITEMS:
+        raise ValueError(f'At most {BATCH_MAX_ITEMS} items can be queued in one batch')
+        
+    default_sites = _split_sites(data.get('website_urls') or [])
+    if data.get('website_url'):
+        default_sites = [data['website_url'], *default_sites]
+        
+    items, seen = [], set()
+    for position, raw in enumerate(raw_items, start=1):
+        if not isinstance(raw, dict) or not str(raw.get('search_term') or '').strip():
+            raise ValueError(f'Item {position} has no search_term')
+        sites = _split_sites(raw.get('website_urls') or []) or _split_sites(raw.get('website_url')) or default_sites
+        sites = list(dict.fromkeys(sites))
+        if not sites:
+            raise ValueError(f'Item {position} has no website_url and the batch has no default')
+        if len(sites) > MAX_SEARCH_SITES:
+            raise ValueError(f'Item {position}: at most {MAX_SEARCH_SITES} websites can be searched at once')
+        try:
+            max_results = int(raw.get('max_results') or data.get('max_results') or 5)
+        except (ValueError, TypeError):
+            raise ValueError(f'Item {position}: max_results must be a valid number')
+        if max_results < 1 or max_results > 50:
+            raise ValueError(f'Item {position}: max_results must be between 1 and 50')
+        item = {'search_term': str(raw['search_term']).strip(), 'website_urls': sites, 'max_results': max_results}
+        key = (item['search_term'].lower(), tuple(sites), max_results)
+        if key not in seen:
+            seen.add(key)
+            items.append(item)
+            
+    try:
+        concurrency = int(data.get('concurrency', MAX_CONCURRENCY))
+    except (ValueError, TypeError):
+        concurrency = 0
+    if concurrency < 1:
+        raise ValueError('concurrency must be a positive number')
+        
+    settings = {
+        'extract_fields': data['extract_fields'],
+        'concurrency': min(concurrency, MAX_CONCURRENCY),
+        'monitor': bool(data.get('monitor'))
+    }
+    return items, settings, data['api_key']
 
 @app.route('/api/scrape', methods=['POST'])
 def scrape_api():
     """API endpoint for scraping that matches React frontend expectations"""
     try:
         data = request.get_json()
-        if not data:
-            return jsonify({
-                'success': False,
-                'error': 'No JSON data received'
-            }), 400
-            
-        logger.info(f"Received scraping request for website: {data.get('website_url', 'unknown')} and search term: {data.get('search_term', 'unknown')}")
+        if data:
+            logger.info(f"Received scraping request for website: {data.get('website_url') or data.get('website_urls', 'unknown')} and search term: {data.get('search_term', 'unknown')}")
         
-        # Validate required fields
-        required_fields = ['website_url', 'search_term', 'extract_fields', 'max_results', 'api_key']
-        missing_fields = [field for field in required_fields if not data.get(field)]
-        if missing_fields:
-            return jsonify({
-                'success': False,
-                'error': f'Missing required fields: {", ".join(missing_fields)}'
-            }), 400
-            
-        # Validate field types and values
-        if not isinstance(data['extract_fields'], list):
-            return jsonify({
-                'success': False,
-                'error': 'extract_fields must be an array'
-            }), 400
-            
         try:
-            max_results = int(data['max_results'])
-            if max_results < 1 or max_results > 50:
-                return jsonify({
-                    'success': False,
-                    'error': 'max_results must be between 1 and 50'
-                }), 400
-        except (ValueError, TypeError):
+            config, api_key, concurrency = _parse_scrape_request(data)
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'error': 'max_results must be a valid number'
+                'error': str(e)
             }), 400
         
-        # Create search configuration
-        config = SearchConfig(
-            website_url=data['website_url'],
-            search_term=data['search_term'],
-            extract_fields=data['extract_fields'],
-            max_results=data['max_results']
-        )
+        if dispatcher is not None:
+            # Workers do the scraping; this process only waits for the assembled results
+            job, results = dispatcher.scrape(config, api_key, concurrency,
+                                             include_timings=bool(data.get('include_timings')))
+            with scrape_metrics.span('serialization', config.website_url):
+                results_data = [asdict(result) for result in results]
+            logger.info(f"Scraping job {job.job_id} finished. Found {len(results_data)} results")
+            response = {
+                'success': True,
+                'data': results_data
+            }
+            if data.get('include_timings'):
+                response['timings'] = job.timings
+            return jsonify(response)
         
-        api_key = data['api_key']
+        scraper = create_scraper(api_key, concurrency)
         
         # Run scraper with timeout
         async def run_scraper_with_timeout():
+            outcome = 'completed'
             try:
-                async with asyncio.timeout(300):  # 5-minute timeout
-                    async with UniversalScraper(api_key) as scraper:
+                async with asyncio.timeout(SCRAPE_TIMEOUT):
+                    async with scraper:
                         return await scraper.search_and_scrape(config)
             except asyncio.TimeoutError:
                 logger.error("Scraping operation timed out after 5 minutes")
+                outcome = 'timeout'
                 return []
             except Exception as e:
                 logger.error(f"Scraping operation failed: {e}")
+                outcome = 'failed'
                 return []
+            finally:
+                scrape_metrics.observe_scrape(config.website_url, scraper.timings.to_dict()['wall_seconds'], outcome)
         
-        # Run async scraping in sync context with proper cleanup
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        # Run async scraping on the shared loop that owns the browser pool
         try:
-            results = loop.run_until_complete(run_scraper_with_timeout())
+            results = run_async(run_scraper_with_timeout())
         except Exception as e:
             logger.error(f"Error in event loop: {e}")
             raise
-        finally:
-            try:
-                loop.close()
-            except:
-                pass  # Ignore cleanup errors
         
         # Convert results to dict format expected by frontend
-        results_data = [asdict(result) for result in results]
+        with scraper.span('serialization', config.website_url):
+            results_data = [asdict(result) for result in results]
         
         logger.info(f"Scraping completed successfully. Found {len(results_data)} results")
         
-        return jsonify({
+        response = {
             'success': True,
             'data': results_data
-        })
+        }
+        if data.get('include_timings'):
+            response['timings'] = scraper.timings.to_dict()
+        return jsonify(response)
         
     except Exception as e:
         logger.error(f"Scraping error: {e}")
@@ -588,17 +2232,209 @@ def scrape_api():
             'error': str(e)
         }), 500
 
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """Start a scraping job in the background and return its id immediately"""
+    try:
+        data = request.get_json(silent=True)
+        try:
+            config, api_key, concurrency = _parse_scrape_request(data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+            
+        job = job_manager.create(config, include_timings=bool(data.get('include_timings')))
+        if dispatcher is not None:
+            dispatcher.submit(job, api_key, concurrency)
+        else:
+            event_loop.submit(_run_job(job, api_key, concurrency))
+        logger.info(f"Started job {job.job_id} for {', '.join(config.sites)} and search term: {config.search_term}")
+        
+        return jsonify({
+            'success': True,
+            'job_id': job.job_id,
+            'status_url': f'/api/jobs/{job.job_id}',
+            'stream_url': f'/api/jobs/{job.job_id}/stream'
+        }), 202
+        
+    except Exception as e:
+        logger.error(f"Error creating job: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id: str):
+    """Job status plus the results finished so far, in search order"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found'
+        }), 404
+    return jsonify({
+        'success': True,
+        **job.summary(),
+        'data': [asdict(result) for result in job.results if result is not None]
+    })
+
+@app.route('/api/jobs/<job_id>/stream', methods=['GET'])
+def stream_job(job_id: str):
+    """Server-Sent Events stream of job progress, one event per scraped product"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found'
+        }), 404
+        
+    # Reconnecting clients resume after the last event they received
+    try:
+        start = int(request.headers.get('Last-Event-ID', -1)) + 1
+    except ValueError:
+        start = 0
+        
+    def generate():
+        for event_id, event in job_manager.iter_events(job, start):
+            if event is None:
+                yield ': keep-alive\n\n'
+                continue
+            yield f"id: {event_id}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+            
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/batches', methods=['POST'])
+def create_batch():
+    """Queue a part list for scraping; items are checkpointed to disk as they finish"""
+    try:
+        data = request.get_json(silent=True)
+        try:
+            items, settings, api_key = _parse_batch_request(data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+            
+        batch_id = get_batch_queue().create_batch(items, settings)
+        batch_runner.start(batch_id, api_key)
+        logger.info(f"Queued batch {batch_id} with {len(items)} items")
+        
+        return jsonify({
+            'success': True,
+            'batch_id': batch_id,
+            'total': len(items),
+            'status_url': f'/api/batches/{batch_id}',
+            'results_url': f'/api/batches/{batch_id}/results'
+        }), 202
+        
+    except Exception as e:
+        logger.error(f"Error creating batch: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/batches/<batch_id>', methods=['GET'])
+def get_batch(batch_id: str):
+    """Batch progress with the state, attempts and last error of every item"""
+    queue = get_batch_queue()
+    batch = queue.get_batch(batch_id)
+    if batch is None:
+        return jsonify({
+            'success': False,
+            'error': 'Batch not found'
+        }), 404
+    return jsonify({
+        'success': True,
+        'batch_id': batch_id,
+        'status': batch['status'],
+        'total': batch['total'],
+        'counts': batch['counts'],
+        'results': batch['results'],
+        'created_at': batch['created_at'],
+        'waiting_for_api_key': batch['status'] != 'completed' and not batch_runner.has_api_key(batch_id),
+        'results_url': f'/api/batches/{batch_id}/results',
+        'items': [item.to_dict() for item in queue.items(batch_id)]
+    })
+
+@app.route('/api/batches/<batch_id>/results', methods=['GET'])
+def get_batch_results(batch_id: str):
+    """Results saved so far as JSON Lines, one product per line"""
+    queue = get_batch_queue()
+    if queue.get_batch(batch_id) is None:
+        return jsonify({
+            'success': False,
+            'error': 'Batch not found'
+        }), 404
+    return Response(queue.read_results(batch_id), mimetype='application/x-ndjson')
+
+@app.route('/api/batches/<batch_id>/resume', methods=['POST'])
+def resume_batch(batch_id: str):
+    """Continue a batch after a restart (with its API key) and optionally retry failed items"""
+    data = request.get_json(silent=True) or {}
+    queue = get_batch_queue()
+    if queue.get_batch(batch_id) is None:
+        return jsonify({
+            'success': False,
+            'error': 'Batch not found'
+        }), 404
+    if not data.get('api_key') and not batch_runner.has_api_key(batch_id):
+        return jsonify({
+            'success': False,
+            'error': 'Missing required fields: api_key'
+        }), 400
+        
+    retried = queue.retry_failed(batch_id) if data.get('retry_failed') else 0
+    batch_runner.start(batch_id, data.get('api_key'))
+    return jsonify({
+        'success': True,
+        'batch_id': batch_id,
+        'retried': retried,
+        'status_url': f'/api/batches/{batch_id}'
+    })
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'message': 'Scraper API is running'})
+    return jsonify({
+        'status': 'healthy',
+        'message': 'Scraper API is running',
+        'browser_pool': browser_pool.stats(),
+        'extraction_cache': extraction_cache.stats() if extraction_cache is not None else None,
+        'page_cache': page_cache.stats() if page_cache is not None else None,
+        'resource_blocking': resource_blocker.stats() if resource_blocker is not None else None,
+        'rate_limits': rate_limiter.stats(),
+        'fetch_tiers': http_fetcher.stats() if http_fetcher is not None else None,
+        'site_rules': site_rules.stats(),
+        'monitor': monitor_store.stats() if monitor_store is not None else None,
+        'broker': dispatcher.stats() if dispatcher is not None else None
+    })
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus metrics: stage timings, errors, LLM tokens, cache hits and browser contexts"""
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
 
 if __name__ == '__main__':
     print("🚀 Starting Flask Scraper API")
     print("=" * 50)
     print("🌐 Server starting on: http://localhost:5001")
     print("🔧 API endpoint: /api/scrape")
+    print("🧵 Job API: /api/jobs")
+    print("📦 Batch API: /api/batches")
+    print("📈 Metrics: /metrics")
     print("⚠️  Press Ctrl+C to stop the server")
     print()
     
+    # The reloader runs this block in its file watcher too; only the serving process resumes batches
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        resume_batches()
     app.run(debug=True, host='0.0.0.0', port=5001)
@@ -0,0 +1,359 @@
+"""
+Durable SQLite work queue for bulk part-list scraping, with JSONL result files
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Item states; queued items become running when claimed and end as done or failed
+ITEM_STATES = ('queued', 'running', 'done', 'failed')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id TEXT PRIMARY KEY,
+    settings TEXT NOT NULL,
+    output_path TEXT NOT NULL,
+    output_bytes INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS batch_items (
+    item_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch_id TEXT NOT NULL REFERENCES batches (batch_id),
+    position INTEGER NOT NULL,
+    search_term TEXT NOT NULL,
+    website_urls TEXT NOT NULL,
+    max_results INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL DEFAULT 0,
+    error TEXT,
+    results INTEGER NOT NULL DEFAULT 0,
+    finished_at REAL,
+    owner TEXT,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS batch_items_status ON batch_items (status, available_at, item_id);
+CREATE INDEX IF NOT EXISTS batch_items_batch ON batch_items (batch_id, position);
+"""
+
+
+@dataclass
+class BatchItem:
+    item_id: int
+    batch_id: str
+    position: int
+    search_term: str
+    website_urls: List[str]
+    max_results: int
+    status: str = 'queued'
+    attempts: int = 0
+    error: Optional[str] = None
+    results: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'item_id': self.item_id,
+            'position': self.position,
+            'search_term': self.search_term,
+            'website_urls': self.website_urls,
+            'status': self.status,
+            'attempts': self.attempts,
+            'error': self.error,
+            'results': self.results
+        }
+
+
+class BatchQueue:
+    """Batches of search items that survive restarts
+
+    Each finished item is a checkpoint: its results are appended to the batch's
+    JSONL file and the file length is committed together with the item's state.
+    recover() trims anything written after the last checkpoint and requeues
+    items that were running when their process stopped, so no result is lost or
+    written twice. Failed items are retried with exponential backoff until
+    max_attempts is reached.
+
+    Several processes may share the database: a claimed item records its owner
+    and a heartbeat, and only items whose owner stopped heartbeating for
+    lease_timeout seconds are requeued.
+    """
+    def __init__(self, path: str, output_dir: str, max_attempts: int = 3, retry_delay: float = 30.0,
+                 lease_timeout: float = 120.0):
+        self.path = path
+        self.output_dir = output_dir
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self.lease_timeout = lease_timeout
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+            columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(batch_items)')}
+            for column, kind in (('owner', 'TEXT'), ('heartbeat_at', 'REAL')):
+                if column not in columns:
+                    self._conn.execute(f'ALTER TABLE batch_items ADD COLUMN {column} {kind}')
+            self._conn.commit()
+
+    def create_batch(self, items: List[Dict[str, Any]], settings: Dict[str, Any]) -> str:
+        """Queue items ({search_term, website_urls, max_results}) and return the new batch id"""
+        batch_id = uuid.uuid4().hex
+        output_path = os.path.join(self.output_dir, f"{batch_id}.jsonl")
+        open(output_path, 'a').close()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO batches (batch_id, settings, output_path, created_at) VALUES (?, ?, ?, ?)',
+                (batch_id, json.dumps(settings), output_path, time.time())
+            )
+            self._conn.executemany(
+                'INSERT INTO batch_items (batch_id, position, search_term, website_urls, max_results) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(batch_id, position, item['search_term'], json.dumps(item['website_urls']), item['max_results'])
+                 for position, item in enumerate(items)]
+            )
+            self._conn.commit()
+        return batch_id
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Batch settings, output file and item counts by state, or None if unknown"""
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM batches WHERE batch_id = ?', (batch_id,)).fetchone()
+            if row is None:
+                return None
+            counts = dict(self._conn.execute(
+                'SELECT status, COUNT(*) FROM batch_items WHERE batch_id = ? GROUP BY status', (batch_id,)
+            ).fetchall())
+            results = self._conn.execute(
+                'SELECT COALESCE(SUM(results), 0) FROM batch_items WHERE batch_id = ?', (batch_id,)
+            ).fetchone()[0]
+        counts = {state: counts.get(state, 0) for state in ITEM_STATES}
+        if counts['queued'] or counts['running']:
+            status = 'running' if counts['running'] or counts['done'] or counts['failed'] else 'queued'
+        else:
+            status = 'completed'
+        return {
+            'batch_id': batch_id,
+            'status': status,
+            'settings': json.loads(row['settings']),
+            'output_path': row['output_path'],
+            'output_bytes': row['output_bytes'],
+            'created_at': row['created_at'],
+            'total': sum(counts.values()),
+            'counts': counts,
+            'results': results
+        }
+
+    def items(self, batch_id: str) -> List[BatchItem]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM batch_items WHERE batch_id = ? ORDER BY position', (batch_id,)
+            ).fetchall()
+        return [self._item(row) for row in rows]
+
+    def claim(self, batch_ids: Optional[Iterable[str]] = None) -> Optional[BatchItem]:
+        """Mark the oldest due queued item running and return it; batch_ids limits the batches"""
+        where, params = self._batch_filter(batch_ids)
+        if where is None:
+            return None
+        now = time.time()
+        with self._lock:
+            # The write lock keeps another process from claiming the same item
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    f"SELECT * FROM batch_items WHERE status = 'queued' AND available_at <= ?{where} "
+                    'ORDER BY item_id LIMIT 1', (now, *params)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE batch_items SET status = 'running', attempts = attempts + 1, owner = ?, "
+                        'heartbeat_at = ? WHERE item_id = ?', (self.owner, now, row['item_id'])
+                    )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        if row is None:
+            return None
+        item = self._item(row)
+        item.status = 'running'
+        item.attempts += 1
+        return item
+
+    def next_due_in(self, batch_ids: Optional[Iterable[str]] = None) -> Optional[float]:
+        """Seconds until a queued item can be claimed, or None if nothing is queued"""
+        where, params = self._batch_filter(batch_ids)
+        if where is None:
+            return None
+        with self._lock:
+            due = self._conn.execute(
+                f"SELECT MIN(available_at) FROM batch_items WHERE status = 'queued'{where}", params
+            ).fetchone()[0]
+        return None if due is None else max(0.0, due - time.time())
+
+    def complete(self, item: BatchItem, records: List[Dict[str, Any]]) -> bool:
+        """Append the item's results to the batch file and checkpoint it as done
+
+        Returns False, writing nothing, when the item's lease was lost to recovery.
+        """
+        with self._lock:
+            # Holding the write lock while appending keeps other processes' checkpoints out of the file
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                if not self._owns(item):
+                    self._conn.rollback()
+                    return False
+                path, offset = self._conn.execute(
+                    'SELECT output_path, output_bytes FROM batches WHERE batch_id = ?', (item.batch_id,)
+                ).fetchone()
+                with open(path, 'r+b') as f:
+                    # Drop any partial write left by an earlier failure before appending
+                    f.truncate(offset)
+                    f.seek(offset)
+                    for record in records:
+                        f.write((json.dumps(record) + '\n').encode('utf-8'))
+                    f.flush()
+                    os.fsync(f.fileno())
+                    end = f.tell()
+                self._conn.execute(
+                    "UPDATE batch_items SET status = 'done', error = NULL, results = ?, finished_at = ?, "
+                    'owner = NULL WHERE item_id = ?', (len(records), time.time(), item.item_id)
+                )
+                self._conn.execute('UPDATE batches SET output_bytes = ? WHERE batch_id = ?', (end, item.batch_id))
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+        return True
+
+    def fail(self, item: BatchItem, error: str) -> str:
+        """Requeue the item with backoff, or mark it failed after max_attempts
+
+        Returns the new state, or 'lost' when the item's lease was lost to recovery.
+        """
+        status = 'failed' if item.attempts >= self.max_attempts else 'queued'
+        available_at = time.time() + self.retry_delay * 2 ** (item.attempts - 1)
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE batch_items SET status = ?, error = ?, available_at = ?, finished_at = ?, owner = NULL '
+                "WHERE item_id = ? AND status = 'running' AND owner = ?",
+                (status, error, available_at, time.time() if status == 'failed' else None, item.item_id, self.owner)
+            )
+            self._conn.commit()
+        return status if cursor.rowcount else 'lost'
+
+    def retry_failed(self, batch_id: str) -> int:
+        """Requeue a batch's failed items with fresh attempts; returns how many"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE batch_items SET status = 'queued', attempts = 0, available_at = 0, finished_at = NULL "
+                "WHERE batch_id = ? AND status = 'failed'", (batch_id,)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def heartbeat(self):
+        """Renew the lease on the items this process is running"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE batch_items SET heartbeat_at = ? WHERE status = 'running' AND owner = ?",
+                (time.time(), self.owner)
+            )
+            self._conn.commit()
+
+    def recover(self) -> int:
+        """Trim result files to their last checkpoint and requeue items whose owner stopped
+
+        Safe to call from every process sharing the database, at any time: items
+        with a live lease are left alone.
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                for path, offset in self._conn.execute('SELECT output_path, output_bytes FROM batches').fetchall():
+                    if os.path.exists(path) and os.path.getsize(path) > offset:
+                        with open(path, 'r+b') as f:
+                            f.truncate(offset)
+                cursor = self._conn.execute(
+                    "UPDATE batch_items SET status = 'queued', attempts = MAX(attempts - 1, 0), available_at = 0, "
+                    "owner = NULL WHERE status = 'running' AND owner IS NOT ? "
+                    'AND (heartbeat_at IS NULL OR heartbeat_at < ?)',
+                    (self.owner, time.time() - self.lease_timeout)
+                )
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+            return cursor.rowcount
+
+    def next_lease_expiry_in(self) -> Optional[float]:
+        """Seconds until another process's running item could be recovered, or None if there are none"""
+        with self._lock:
+            oldest = self._conn.execute(
+                "SELECT MIN(COALESCE(heartbeat_at, 0)) FROM batch_items WHERE status = 'running' AND owner IS NOT ?",
+                (self.owner,)
+            ).fetchone()[0]
+        return None if oldest is None else max(0.0, oldest + self.lease_timeout - time.time())
+
+    def pending_batches(self) -> List[str]:
+        """Ids of batches with items still queued or running"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT batch_id FROM batch_items WHERE status IN ('queued', 'running')"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def read_results(self, batch_id: str, chunk_size: int = 65536) -> Iterator[bytes]:
+        """Checkpointed JSONL of a batch, never including a half-written item"""
+        batch = self.get_batch(batch_id)
+        if batch is None:
+            return
+        remaining = batch['output_bytes']
+        with open(batch['output_path'], 'rb') as f:
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _owns(self, item: BatchItem) -> bool:
+        row = self._conn.execute('SELECT status, owner FROM batch_items WHERE item_id = ?', (item.item_id,)).fetchone()
+        return row is not None and row['status'] == 'running' and row['owner'] == self.owner
+
+    def _batch_filter(self, batch_ids: Optional[Iterable[str]]):
+        if batch_ids is None:
+            return '', ()
+        batch_ids = tuple(batch_ids)
+        if not batch_ids:
+            return None, ()
+        return f" AND batch_id IN ({', '.join('?' * len(batch_ids))})", batch_ids
+
+    @staticmethod
+    def _item(row: sqlite3.Row) -> BatchItem:
+        return BatchItem(
+            item_id=row['item_id'],
+            batch_id=row['batch_id'],
+            position=row['position'],
+            search_term=row['search_term'],
+            website_urls=json.loads(row['website_urls']),
+            max_results=row['max_results'],
+            status=row['status'],
+            attempts=row['attempts'],
+            error=row['error'],
+            results=row['results']
+        )
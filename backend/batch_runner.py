@@ -0,0 +1,157 @@
+"""
+Runs queued batch items on the scraper's event loop, in-process or through scrape workers
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import time
+from dataclasses import asdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from batch_queue import BatchItem, BatchQueue
+from jobs import Dispatcher
+from metrics import ScrapeMetrics
+from models import ProductData, SearchConfig
+
+logger = logging.getLogger(__name__)
+
+
+class BatchRunner:
+    """Works through the batch queue on the event loop, concurrency items at a time
+
+    API keys are kept in memory only: after a restart a batch waits until it is
+    resumed with its key, unless a default_api_key (OPENAI_API_KEY) is set.
+    Items are scraped with create_scraper(api_key, concurrency), or by the
+    workers when a dispatcher is given. open_queue returns the batch queue and
+    submit schedules a coroutine on the scraper's event loop.
+    """
+    def __init__(self, open_queue: Callable[[], BatchQueue],
+                 submit: Callable[[Awaitable[Any]], concurrent.futures.Future],
+                 create_scraper: Callable[[str, int], Any], metrics: ScrapeMetrics,
+                 dispatcher: Optional[Dispatcher] = None, default_api_key: Optional[str] = None,
+                 concurrency: int = 2, timeout: float = 300):
+        self.open_queue = open_queue
+        self.submit = submit
+        self.create_scraper = create_scraper
+        self.metrics = metrics
+        self.dispatcher = dispatcher
+        self.default_api_key = default_api_key
+        self.concurrency = max(1, concurrency)
+        self.timeout = timeout
+        self.api_keys: Dict[str, str] = {}
+        self._task: Optional[asyncio.Task] = None
+        # The queue is a blocking SQLite database; its calls run on this thread, never on the loop
+        self._queue_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='batch-queue')
+
+    def start(self, batch_id: Optional[str] = None, api_key: Optional[str] = None):
+        """Register a batch's API key and make sure queued items are being processed"""
+        self.submit(self._ensure_running(batch_id, api_key))
+
+    def has_api_key(self, batch_id: str) -> bool:
+        return bool(self.default_api_key) or batch_id in self.api_keys
+
+    async def _ensure_running(self, batch_id: Optional[str], api_key: Optional[str]):
+        if batch_id and api_key:
+            self.api_keys[batch_id] = api_key
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def _runnable_batches(self) -> Optional[List[str]]:
+        return None if self.default_api_key else list(self.api_keys)
+
+    def _queue_call(self, fn: Callable[..., Any], *args) -> asyncio.Future:
+        return asyncio.get_running_loop().run_in_executor(self._queue_executor, fn, *args)
+
+    async def _run(self):
+        queue = await self._queue_call(self.open_queue)
+        heartbeat_interval = queue.lease_timeout / 4
+        heartbeat_at = time.monotonic()
+        active = set()
+        while True:
+            if active and time.monotonic() - heartbeat_at >= heartbeat_interval:
+                await self._queue_call(queue.heartbeat)
+                heartbeat_at = time.monotonic()
+            # Take over items of processes that stopped renewing their lease
+            expires_in = await self._queue_call(queue.next_lease_expiry_in)
+            if expires_in == 0 and await self._queue_call(queue.recover):
+                logger.info("Requeued batch items of a process that stopped")
+                expires_in = await self._queue_call(queue.next_lease_expiry_in)
+            while len(active) < self.concurrency:
+                item = await self._queue_call(queue.claim, self._runnable_batches())
+                if item is None:
+                    break
+                active.add(asyncio.create_task(self._process(queue, item)))
+            # With a free slot, wake up when the next retry comes due or a lease runs out
+            due_in = None
+            if len(active) < self.concurrency:
+                next_due_in = await self._queue_call(queue.next_due_in, self._runnable_batches())
+                waits = [wait for wait in (next_due_in, expires_in) if wait is not None]
+                due_in = min(waits) if waits else None
+            if not active:
+                if due_in is None:
+                    return
+                await asyncio.sleep(due_in)
+                continue
+            timeout = heartbeat_interval if due_in is None else min(due_in, heartbeat_interval)
+            _, active = await asyncio.wait(active, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+    async def _process(self, queue: BatchQueue, item: BatchItem):
+        """Scrape one item and checkpoint it; errors and empty searches are retried"""
+        try:
+            batch = await self._queue_call(queue.get_batch, item.batch_id)
+            settings = batch['settings']
+            config = SearchConfig(
+                website_url=item.website_urls[0],
+                search_term=item.search_term,
+                extract_fields=settings['extract_fields'],
+                max_results=item.max_results,
+                website_urls=item.website_urls if len(item.website_urls) > 1 else [],
+                monitor=settings.get('monitor', False)
+            )
+            api_key = self.api_keys.get(item.batch_id) or self.default_api_key
+            results: List[ProductData] = []
+            error = None
+            if self.dispatcher is not None:
+                # Workers do the scraping; wait for the job without blocking the loop
+                job, results = await asyncio.get_running_loop().run_in_executor(
+                    None, self.dispatcher.scrape, config, api_key, settings['concurrency']
+                )
+                error = job.error
+            else:
+                scraper = self.create_scraper(api_key, settings['concurrency'])
+                outcome = 'completed'
+                try:
+                    async with asyncio.timeout(self.timeout):
+                        async with scraper:
+                            results = await scraper.search_and_scrape(config)
+                except asyncio.TimeoutError:
+                    error, outcome = 'Scraping operation timed out', 'timeout'
+                except Exception as e:
+                    error, outcome = str(e), 'failed'
+                self.metrics.observe_scrape(config.website_url, scraper.timings.to_dict()['wall_seconds'], outcome)
+            # With monitoring, no results just means nothing changed
+            if error is None and not results and not config.monitor:
+                error = 'No products found'
+
+            if error is None:
+                records = [{'batch_id': item.batch_id, 'position': item.position,
+                            'search_term': item.search_term, **asdict(result)} for result in results]
+                with self.metrics.span('serialization', config.website_url):
+                    saved = await self._queue_call(queue.complete, item, records)
+                if saved:
+                    logger.info(f"Batch {item.batch_id} item {item.position} ({item.search_term}): {len(records)} results")
+                else:
+                    logger.warning(f"Batch {item.batch_id} item {item.position} was requeued by another process; "
+                                   f"dropping its results")
+            else:
+                status = await self._queue_call(queue.fail, item, error)
+                logger.warning(f"Batch {item.batch_id} item {item.position} ({item.search_term}) "
+                               f"attempt {item.attempts} failed: {error}; {status}")
+        except Exception as e:
+            # Anything else would leave the item running under this process's lease until it exits
+            logger.error(f"Error processing batch item {item.item_id}: {e}")
+            await self._queue_call(queue.fail, item, str(e))
+        batch = await self._queue_call(queue.get_batch, item.batch_id)
+        if batch['status'] == 'completed':
+            self.api_keys.pop(item.batch_id, None)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark the ContentCleaner engines (BeautifulSoup vs lxml) and check they agree
+
+Usage:
+    python benchmarks/bench_cleaner.py [page.html ...] [--repeat N]
+
+Without files, synthetic distributor-style product pages are generated.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import ContentCleaner, LxmlContentCleaner  # noqa: E402
+from corpus_server import synthetic_page  # noqa: E402
+
+
+# Removed elements between text: the surrounding strings must stay separate words
+PARITY_PAGES = [
+    '<html><body><div>alpha beta<script>track();</script>gamma delta</div></body></html>',
+    '<html><body><main>Body text here<nav><a href="/">Home</a></nav>tail text here</main></body></html>',
+    '<html><body><div class="product">Price $5.00<style>.x{}</style>each<footer>Footer</footer>In stock</div></body></html>',
+    '<html><body><main><p>Lead<noscript>Enable JS</noscript>time 3 weeks</p><header>Menu</header>MPN LM317T</main></body></html>',
+]
+
+
+def time_engine(cleaner, pages, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        for url, html in pages:
+            start = time.perf_counter()
+            cleaner.extract_clean_text(html, url)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('files', nargs='*', help='saved HTML pages to benchmark')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--pages', type=int, default=10, help='synthetic pages when no files are given')
+    args = parser.parse_args()
+
+    if args.files:
+        pages = []
+        for path in args.files:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                pages.append((f'file://{os.path.abspath(path)}', f.read()))
+    else:
+        pages = [(f'https://example.com/p/{i}', synthetic_page(i)) for i in range(args.pages)]
+
+    engines = {'bs4': ContentCleaner(), 'lxml': LxmlContentCleaner()}
+
+    checked = pages + [(f'https://example.com/parity/{i}', html) for i, html in enumerate(PARITY_PAGES)]
+    mismatches = [url for url, html in checked
+                  if engines['bs4'].extract_clean_text(html, url) != engines['lxml'].extract_clean_text(html, url)]
+
+    print(f"{len(pages)} pages, {args.repeat} repeats, avg size {sum(len(h) for _, h in pages) // len(pages)} chars")
+    results = {}
+    for name, cleaner in engines.items():
+        timings = time_engine(cleaner, pages, args.repeat)
+        results[name] = statistics.mean(timings)
+        print(f"{name:>5}: mean {results[name] * 1000:8.2f} ms/page   "
+              f"p95 {sorted(timings)[int(len(timings) * 0.95) - 1] * 1000:8.2f} ms/page")
+    print(f"speedup: {results['bs4'] / results['lxml']:.1f}x")
+
+    if mismatches:
+        print(f"OUTPUT MISMATCH on {len(mismatches)} page(s): {', '.join(mismatches[:5])}")
+        sys.exit(1)
+    print("outputs identical")
+
+
+if __name__ == '__main__':
+    main()
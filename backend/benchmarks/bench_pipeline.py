@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the scraping pipeline against a local page corpus and a stub LLM
+
+Usage:
+    python benchmarks/bench_pipeline.py [page.html | dir ...] [--targets cleaner,scraper,api]
+                                        [--concurrency N] [--output results.json]
+                                        [--compare previous.json]
+
+Product pages (saved ones, or synthetic ones when none are given) are served by a
+local CorpusServer along with generated search pages and a deterministic OpenAI
+stand-in, so no live site or API key is needed. Targets:
+
+    cleaner   ContentCleaner over every corpus page (in the cleaner pool when concurrency > 1)
+    scraper   UniversalScraper.search_and_scrape on the shared event loop and browser pool
+    api       POST /api/scrape through the Flask test client from concurrent clients
+
+Results (pages/sec, p50/p95 per stage, peak RSS, CPU time) are written as JSON;
+--compare prints the ratio of each figure to a previous run.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus_server import CorpusServer, load_corpus  # noqa: E402
+
+try:
+    import psutil
+except ImportError:  # peak RSS and CPU time then cover this process only
+    psutil = None
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+        'mean_ms': round(statistics.mean(values) * 1000, 2) if values else 0.0
+    }
+
+
+class ResourceMonitor:
+    """Peak RSS and CPU seconds while a target runs
+
+    With psutil, child processes (browser, cleaner pool) are sampled too;
+    otherwise the figures are this process's own, and peak RSS is its lifetime peak.
+    """
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._process = psutil.Process() if psutil is not None else None
+
+    def _processes(self):
+        processes = [self._process]
+        try:
+            processes.extend(self._process.children(recursive=True))
+        except psutil.Error:
+            pass
+        return processes
+
+    def _cpu_seconds(self) -> float:
+        if self._process is None:
+            times = os.times()
+            return times.user + times.system
+        total = 0.0
+        for process in self._processes():
+            try:
+                times = process.cpu_times()
+                total += times.user + times.system
+            except psutil.Error:
+                pass
+        return total
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            rss = 0
+            for process in self._processes():
+                try:
+                    rss += process.memory_info().rss
+                except psutil.Error:
+                    pass
+            self.peak_rss = max(self.peak_rss, rss)
+
+    def __enter__(self) -> 'ResourceMonitor':
+        self._cpu_start = self._cpu_seconds()
+        if self._process is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # Children that exited during the run are no longer visible, so CPU is a lower bound with psutil
+        self.cpu_seconds = self._cpu_seconds() - self._cpu_start
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+        else:
+            self.peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'peak_rss_mb': round(self.peak_rss / (1024 * 1024), 1),
+            'cpu_seconds': round(self.cpu_seconds, 3),
+            'includes_children': self._process is not None
+        }
+
+
+def configure_environment(args, server: CorpusServer):
+    """Settings the app reads at import: no caches, pacing or rate limits, the stub LLM"""
+    os.environ.update({
+        'OPENAI_BASE_URL': f"{server.url}/v1",
+        'EXTRACTION_CACHE': 'off',
+        'PAGE_CACHE': 'off',
+        'RATE_LIMIT_DEFAULT': '10000',
+        'RATE_LIMIT_BURST': '10000',
+        'RESPECT_ROBOTS_TXT': '0',
+        'POLITENESS_POLICIES': json.dumps({'default': {'scroll_steps': 0}}),
+        'SCRAPER_MAX_CONCURRENCY': str(args.concurrency),
+        'SCRAPER_PER_DOMAIN_CONCURRENCY': str(args.concurrency),
+        'CLEANER_ENGINE': args.cleaner_engine,
+        'CLEANER_EXECUTOR': args.cleaner_executor,
+        'CLEANER_WORKERS': str(args.concurrency),
+        'HTTP_FAST_PATH': '0' if args.browser_only else '1',
+        'EXTRACTION_BATCH_SIZE': str(args.batch_size),
+        'SEARCH_MAX_PAGES': str(args.products // server.per_page + 2)
+    })
+
+
+def sampled_metrics(app):
+    """ScrapeMetrics that also keep every stage duration, installed as the app's default"""
+    metrics = app.ScrapeMetrics(app.MetricsRegistry())
+    samples: Dict[str, List[float]] = defaultdict(list)
+    observe = metrics.stage_seconds.observe
+
+    def keep(value: float, **labels: str):
+        samples[labels['stage']].append(value)
+        observe(value, **labels)
+
+    metrics.stage_seconds.observe = keep
+    app.scrape_metrics = metrics
+    return samples
+
+
+def bench_cleaner(app, pages: Dict[str, str], args) -> Dict[str, Any]:
+    items = [(f"https://corpus.local/product/{name}", html) for name, html in pages.items()] * args.repeat
+    latencies = []
+    executor = app.get_cleaner_executor() if args.concurrency > 1 else None
+    if executor is not None:
+        # Start the workers first so spawn time isn't counted as cleaning
+        url, html = items[0]
+        list(executor.map(app.clean_html, [html] * args.concurrency, [url] * args.concurrency))
+    start = time.perf_counter()
+    if executor is None:
+        cleaner = app.create_content_cleaner(args.cleaner_engine)
+        for url, html in items:
+            page_start = time.perf_counter()
+            cleaner.extract_clean_text(html, url)
+            latencies.append(time.perf_counter() - page_start)
+    else:
+        # Keep at most `concurrency` pages in flight so latency excludes queueing
+        in_flight = {}
+        for url, html in items:
+            in_flight[executor.submit(app.clean_html, html, url, args.cleaner_engine)] = time.perf_counter()
+            if len(in_flight) >= args.concurrency:
+                done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                    latencies.append(time.perf_counter() - in_flight.pop(future))
+        for future in concurrent.futures.as_completed(list(in_flight)):
+            future.result()
+            latencies.append(time.perf_counter() - in_flight.pop(future))
+    elapsed = time.perf_counter() - start
+    return {
+        'pages': len(items),
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(len(items) / elapsed, 2),
+        'stages': {'cleaning': latency_summary(latencies)}
+    }
+
+
+def _search_config(app, server: CorpusServer, args):
+    return app.SearchConfig(
+        website_url=server.url,
+        search_term='bench',
+        extract_fields=['product_name', 'price', 'availability', 'part_number'],
+        max_results=args.products
+    )
+
+
+def bench_scraper(app, server: CorpusServer, args) -> Dict[str, Any]:
+    samples = sampled_metrics(app)
+    scrape_latencies = []
+    pages = 0
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        async def run():
+            async with app.create_scraper('bench', args.concurrency) as scraper:
+                return await scraper.search_and_scrape(_search_config(app, server, args))
+        scrape_start = time.perf_counter()
+        results = app.run_async(run(), timeout=app.SCRAPE_TIMEOUT)
+        scrape_latencies.append(time.perf_counter() - scrape_start)
+        pages += sum(1 for result in results if result.product_name)
+    elapsed = time.perf_counter() - start
+    return {
+        'pages': pages,
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(pages / elapsed, 2),
+        'scrape': latency_summary(scrape_latencies),
+        'stages': {stage: latency_summary(values) for stage, values in sorted(samples.items())}
+    }
+
+
+def bench_api(app, server: CorpusServer, args) -> Dict[str, Any]:
+    samples = sampled_metrics(app)
+    config = _search_config(app, server, args)
+    body = {
+        'website_url': config.website_url,
+        'search_term': config.search_term,
+        'extract_fields': config.extract_fields,
+        'max_results': min(config.max_results, 50),
+        'api_key': 'bench',
+        'concurrency': args.concurrency
+    }
+
+    def request_once():
+        request_start = time.perf_counter()
+        response = app.app.test_client().post('/api/scrape', json=body)
+        data = response.get_json() or {}
+        return time.perf_counter() - request_start, response.status_code, len(data.get('data') or [])
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.clients) as pool:
+        outcomes = list(pool.map(lambda _: request_once(), range(args.clients * args.repeat)))
+    elapsed = time.perf_counter() - start
+    pages = sum(count for _, status, count in outcomes if status == 200)
+    return {
+        'requests': len(outcomes),
+        'errors': sum(1 for _, status, _ in outcomes if status != 200),
+        'pages': pages,
+        'seconds': round(elapsed, 3),
+        'pages_per_sec': round(pages / elapsed, 2),
+        'request': latency_summary([latency for latency, _, _ in outcomes]),
+        'stages': {stage: latency_summary(values) for stage, values in sorted(samples.items())}
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _ratio(new: float, old: float) -> str:
+    return f"{new / old:.2f}x" if old else 'n/a'
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]):
+    """Print how each target's throughput and stage latencies moved against a previous report"""
+    print(f"Compared with {baseline.get('revision') or 'baseline'}:", file=sys.stderr)
+    for target, result in report['results'].items():
+        old = baseline.get('results', {}).get(target)
+        if not old:
+            continue
+        print(f"  {target}: pages/sec {_ratio(result['pages_per_sec'], old['pages_per_sec'])}, "
+              f"peak RSS {_ratio(result['peak_rss_mb'], old['peak_rss_mb'])}, "
+              f"CPU {_ratio(result['cpu_seconds'], old['cpu_seconds'])}", file=sys.stderr)
+        for stage, figures in result.get('stages', {}).items():
+            old_figures = old.get('stages', {}).get(stage)
+            if old_figures:
+                print(f"    {stage:>13}: p50 {_ratio(figures['p50_ms'], old_figures['p50_ms'])}"
+                      f"  p95 {_ratio(figures['p95_ms'], old_figures['p95_ms'])}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('corpus', nargs='*', help='saved product pages (.html files or directories)')
+    parser.add_argument('--targets', default='cleaner,scraper,api', help='comma-separated: cleaner, scraper, api')
+    parser.add_argument('--concurrency', type=int, default=4, help='pages in flight per scrape')
+    parser.add_argument('--clients', type=int, default=2, help='concurrent /api/scrape requests')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--products', type=int, default=20, help='max_results per scrape')
+    parser.add_argument('--synthetic', type=int, default=20, help='synthetic pages when no corpus is given')
+    parser.add_argument('--per-page', type=int, default=10, help='results per search page')
+    parser.add_argument('--page-latency', type=float, default=0.0, help='seconds added to each page response')
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='seconds added to each completion')
+    parser.add_argument('--batch-size', type=int, default=1, help='EXTRACTION_BATCH_SIZE')
+    parser.add_argument('--cleaner-engine', default='lxml', choices=['lxml', 'bs4'])
+    parser.add_argument('--cleaner-executor', default='process', choices=['process', 'thread', 'inline'])
+    parser.add_argument('--browser-only', action='store_true', help='render every product page (no HTTP fast path)')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--compare', help='previous JSON report to compare against')
+    args = parser.parse_args()
+    targets = [target.strip() for target in args.targets.split(',') if target.strip()]
+    unknown = set(targets) - {'cleaner', 'scraper', 'api'}
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    pages = load_corpus(args.corpus, args.synthetic)
+    server = CorpusServer(pages, per_page=args.per_page,
+                          page_latency=args.page_latency, llm_latency=args.llm_latency).start()
+    configure_environment(args, server)
+    import app  # reads the environment configured above
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'corpus': {'pages': len(pages), 'avg_chars': sum(map(len, pages.values())) // max(1, len(pages))},
+        'results': {}
+    }
+    benches = {
+        'cleaner': lambda: bench_cleaner(app, pages, args),
+        'scraper': lambda: bench_scraper(app, server, args),
+        'api': lambda: bench_api(app, server, args)
+    }
+    try:
+        for target in targets:
+            print(f"Running {target}...", file=sys.stderr)
+            with ResourceMonitor() as monitor:
+                result = benches[target]()
+            result.update(monitor.summary())
+            report['results'][target] = result
+            print(f"  {result['pages']} pages, {result['pages_per_sec']} pages/sec, "
+                  f"peak RSS {result['peak_rss_mb']} MB, CPU {result['cpu_seconds']} s", file=sys.stderr)
+        report['server_requests'] = dict(server.requests)
+    finally:
+        server.stop()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
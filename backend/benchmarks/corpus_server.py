@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Local HTTP server replaying a page corpus, with a deterministic stand-in for the OpenAI API
+
+Serves:
+    /search?q=...&page=N     generated result pages linking every corpus product (rel="next" paginated)
+    /product/<name>          a saved or synthetic product page
+    /v1/chat/completions     stub chat completion answering from the prompt alone
+
+Point the scraper at it with website_url=<server url> and OPENAI_BASE_URL=<server url>/v1.
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+PAGE_MARKER = re.compile(r'=== PAGE (\d+) ===')
+
+
+def synthetic_page(seed: int, rows: int = 400) -> str:
+    """A heavy product page: navigation, scripts, spec and price tables, related items"""
+    rng = random.Random(seed)
+    nav = ''.join(f'<li><a href="/c/{i}">Category {i}</a></li>' for i in range(150))
+    specs = ''.join(
+        f'<tr><td>Parameter {i}</td><td>{rng.randint(1, 999)} {rng.choice(["mA", "V", "Ohm", "pF"])}</td></tr>'
+        for i in range(rows)
+    )
+    breaks = ''.join(
+        f'<tr><td>{qty}</td><td>${rng.uniform(0.1, 20):.2f}</td></tr>' for qty in (1, 10, 100, 500, 1000)
+    )
+    related = ''.join(
+        f'<div class="card"><span>Related part RP-{rng.randint(1000, 9999)}</span>'
+        f'<!-- tracking {i} --><span class="ads">Sponsored content</span></div>'
+        for i in range(200)
+    )
+    scripts = ''.join(f'<script>window.__data{i} = {{"x": {i}}};</script>' for i in range(40))
+    return f"""<!DOCTYPE html><html><head><title>Part {seed}</title><style>.a{{color:red}}</style>{scripts}</head>
+<body><header><div class="cookie-banner">We use cookies. Cookie policy</div></header>
+<nav><ul>{nav}</ul></nav><div class="breadcrumb">Home / Semiconductors / Part {seed}</div>
+<main><div class="product-details" data-testid="product-main">
+<h1>Precision Amplifier PA-{seed}</h1><p>Manufacturer: Acme Semiconductors. Part number: PA-{seed}-X. In stock: {rng.randint(0, 5000)}.</p>
+<table class="price-breaks">{breaks}</table>
+<div class="product-info"><table>{specs}</table><p>Follow us on social media. Privacy Policy applies.</p></div>
+</div><section class="content">{related}</section></main>
+<div class="newsletter">Newsletter signup</div><footer>Terms of service</footer></body></html>"""
+
+
+def load_corpus(paths: List[str], synthetic: int = 20) -> Dict[str, str]:
+    """Product pages by name from saved .html files or directories of them, else synthetic ones"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.html'))
+        else:
+            files.append(path)
+    if not files:
+        return {f'part-{i}': synthetic_page(i) for i in range(synthetic)}
+    pages = {}
+    for path in files:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            pages[os.path.splitext(os.path.basename(path))[0]] = f.read()
+    return pages
+
+
+def search_page(names: List[str], query: str, page: int, per_page: int) -> str:
+    start = (page - 1) * per_page
+    items = ''.join(
+        f'<li class="result"><a href="/product/{quote(name)}">{escape(name)}</a></li>'
+        for name in names[start:start + per_page]
+    )
+    next_link = (f'<a rel="next" href="/search?q={quote(query)}&amp;page={page + 1}">Next</a>'
+                 if start + per_page < len(names) else '')
+    return (f'<!DOCTYPE html><html><head><title>Search: {escape(query)}</title></head>'
+            f'<body><h1>Results for {escape(query)}</h1><ul>{items}</ul>{next_link}</body></html>')
+
+
+def _stub_product(content: str) -> Dict[str, object]:
+    """Answer derived only from the page text, so repeated runs get identical results"""
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    first_line = next((line.strip() for line in content.splitlines() if line.strip()), 'Unknown product')
+    return {
+        'product_name': first_line[:80],
+        'price': f"${int(digest[:6], 16) % 10000 / 100:.2f}",
+        'availability': 'In stock',
+        'condition': 'New',
+        'part_number': f"BENCH-{digest[:8].upper()}",
+        'confidence_score': 0.9
+    }
+
+
+def stub_completion(prompt: str) -> str:
+    """JSON content for an extraction prompt, batched ({"products": [...]}) or single"""
+    sections = PAGE_MARKER.split(prompt)
+    if len(sections) > 1:
+        products = []
+        for index, section in zip(sections[1::2], sections[2::2]):
+            content = section.split('CONTENT:', 1)[-1]
+            products.append({'index': int(index), **_stub_product(content)})
+        return json.dumps({'products': products})
+    content = prompt.split('CONTENT TO ANALYZE:', 1)[-1].split('Please extract', 1)[0]
+    return json.dumps(_stub_product(content))
+
+
+class CorpusServer:
+    """Threaded local server; use as a context manager or call start()/stop()"""
+    def __init__(self, pages: Dict[str, str], per_page: int = 20,
+                 page_latency: float = 0.0, llm_latency: float = 0.0, port: int = 0):
+        self.pages = pages
+        self.names = sorted(pages)
+        self.per_page = max(1, per_page)
+        self.page_latency = page_latency
+        self.llm_latency = llm_latency
+        self.requests: Dict[str, int] = {'search': 0, 'product': 0, 'llm': 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'CorpusServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='corpus-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'CorpusServer':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _count(self, kind: str):
+        with self._lock:
+            self.requests[kind] += 1
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: str, content_type: str = 'text/html; charset=utf-8'):
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path == '/search':
+                    query = parse_qs(parsed.query)
+                    page = int(query.get('page', ['1'])[0])
+                    server._count('search')
+                    time.sleep(server.page_latency)
+                    self._send(200, search_page(server.names, query.get('q', [''])[0], page, server.per_page))
+                elif parsed.path.startswith('/product/'):
+                    html = server.pages.get(unquote(parsed.path[len('/product/'):]))
+                    if html is None:
+                        self._send(404, '<html><body>Not found</body></html>')
+                        return
+                    server._count('product')
+                    time.sleep(server.page_latency)
+                    self._send(200, html)
+                else:
+                    self._send(404, 'Not found', 'text/plain')
+
+            def do_POST(self):
+                if urlparse(self.path).path.rstrip('/') != '/v1/chat/completions':
+                    self._send(404, '{"error": {"message": "Not found"}}', 'application/json')
+                    return
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                prompt = ''.join(message.get('content', '') for message in request.get('messages', []))
+                server._count('llm')
+                time.sleep(server.llm_latency)
+                content = stub_completion(prompt)
+                prompt_tokens = len(prompt) // 4
+                completion_tokens = len(content) // 4
+                self._send(200, json.dumps({
+                    'id': 'chatcmpl-bench',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': request.get('model', 'stub'),
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': content}}],
+                    'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                              'total_tokens': prompt_tokens + completion_tokens}
+                }), 'application/json')
+
+        return Handler
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('corpus', nargs='*', help='saved product pages (.html files or directories)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--per-page', type=int, default=20, help='results per search page')
+    parser.add_argument('--page-latency', type=float, default=0.0, help='seconds added to each page response')
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='seconds added to each completion')
+    args = parser.parse_args()
+
+    server = CorpusServer(load_corpus(args.corpus), per_page=args.per_page, port=args.port,
+                          page_latency=args.page_latency, llm_latency=args.llm_latency)
+    print(f"Serving {len(server.pages)} product pages on {server.url} (OPENAI_BASE_URL={server.url}/v1)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+In-memory server speaking the subset of the Redis protocol the scrape broker uses
+
+Supports lists (LPUSH, RPOP, BRPOP), strings (GET, SET ... PX, MGET, DEL),
+EXPIRE, and WATCH/MULTI/EXEC transactions. Run it in place of Redis to try
+worker mode locally:
+
+    python benchmarks/redis_standin.py --port 6379
+    SCRAPER_BROKER=redis://localhost:6379/0 python worker.py
+"""
+
+import socketserver
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class RedisStandin:
+    """Threaded server; use as a context manager or call start()/stop()"""
+    def __init__(self, port: int = 0, host: str = '127.0.0.1'):
+        self.data: Dict[str, Any] = {}
+        self.expires: Dict[str, float] = {}
+        self.versions: Dict[str, int] = {}
+        self._condition = threading.Condition()
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> 'RedisStandin':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='redis-standin', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'RedisStandin':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def _live(self, key: str) -> Any:
+        expires = self.expires.get(key)
+        if expires is not None and expires <= time.time():
+            self._delete(key)
+        return self.data.get(key)
+
+    def _delete(self, key: str):
+        self.data.pop(key, None)
+        self.expires.pop(key, None)
+        self._touch(key)
+
+    def _touch(self, key: str):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def run(self, command: str, args: List[str]) -> Any:
+        """Execute one command; callers hold the condition lock"""
+        if command == 'PING':
+            return 'PONG'
+        if command in ('AUTH', 'SELECT'):
+            return 'OK'
+        if command == 'LPUSH':
+            items = self._live(args[0])
+            if items is None:
+                items = self.data[args[0]] = []
+            for value in args[1:]:
+                items.insert(0, value)
+            self._touch(args[0])
+            self._condition.notify_all()
+            return len(items)
+        if command == 'RPOP':
+            items = self._live(args[0])
+            if not items:
+                return None
+            value = items.pop()
+            if not items:
+                self._delete(args[0])
+            self._touch(args[0])
+            return value
+        if command in ('GET', 'MGET'):
+            values = [self._live(key) for key in args]
+            return values if command == 'MGET' else values[0]
+        if command == 'SET':
+            self.data[args[0]] = args[1]
+            self.expires.pop(args[0], None)
+            if len(args) >= 4 and args[2].upper() == 'PX':
+                self.expires[args[0]] = time.time() + int(args[3]) / 1000
+            self._touch(args[0])
+            return 'OK'
+        if command == 'EXPIRE':
+            if self._live(args[0]) is None:
+                return 0
+            self.expires[args[0]] = time.time() + int(args[1])
+            return 1
+        if command == 'DEL':
+            removed = sum(1 for key in args if self._live(key) is not None)
+            for key in args:
+                self._delete(key)
+            return removed
+        raise ValueError(f"ERR unknown command '{command}'")
+
+    def _handler(self):
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                watched: Dict[str, int] = {}
+                queued: Optional[List[List[str]]] = None
+                while True:
+                    request = self._read_request()
+                    if request is None:
+                        return
+                    command, args = request[0].upper(), request[1:]
+                    try:
+                        if command == 'WATCH':
+                            with server._condition:
+                                for key in args:
+                                    watched[key] = server.versions.get(key, 0)
+                            reply = 'OK'
+                        elif command == 'UNWATCH':
+                            watched.clear()
+                            reply = 'OK'
+                        elif command == 'MULTI':
+                            queued = []
+                            reply = 'OK'
+                        elif command == 'DISCARD':
+                            queued = None
+                            watched.clear()
+                            reply = 'OK'
+                        elif command == 'EXEC':
+                            with server._condition:
+                                if any(server.versions.get(key, 0) != version for key, version in watched.items()):
+                                    reply = None
+                                else:
+                                    reply = [server.run(queued_command[0].upper(), queued_command[1:])
+                                             for queued_command in queued or []]
+                            queued = None
+                            watched.clear()
+                        elif queued is not None:
+                            queued.append(request)
+                            reply = 'QUEUED'
+                        elif command == 'BRPOP':
+                            reply = self._brpop(args[:-1], float(args[-1]))
+                        else:
+                            with server._condition:
+                                reply = server.run(command, args)
+                    except (ValueError, IndexError) as e:
+                        reply = e
+                    self.wfile.write(self._encode(reply))
+
+            def _brpop(self, keys: List[str], timeout: float) -> Optional[List[str]]:
+                deadline = time.monotonic() + timeout if timeout > 0 else None
+                with server._condition:
+                    while True:
+                        for key in keys:
+                            value = server.run('RPOP', [key])
+                            if value is not None:
+                                return [key, value]
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            return None
+                        server._condition.wait(remaining)
+
+            def _read_request(self) -> Optional[List[str]]:
+                line = self.rfile.readline()
+                if not line:
+                    return None
+                if not line.startswith(b'*'):
+                    return line.decode('utf-8').split()
+                parts = []
+                for _ in range(int(line[1:])):
+                    length = int(self.rfile.readline()[1:])
+                    parts.append(self.rfile.read(length + 2)[:-2].decode('utf-8'))
+                return parts
+
+            def _encode(self, reply: Any) -> bytes:
+                if reply is None:
+                    return b'$-1\r\n'
+                if isinstance(reply, Exception):
+                    return f'-{reply}\r\n'.encode('utf-8')
+                if isinstance(reply, int):
+                    return f':{reply}\r\n'.encode()
+                if isinstance(reply, list):
+                    return f'*{len(reply)}\r\n'.encode() + b''.join(self._encode(item) for item in reply)
+                if reply in ('OK', 'QUEUED', 'PONG'):
+                    return f'+{reply}\r\n'.encode()
+                data = str(reply).encode('utf-8')
+                return b'$%d\r\n%s\r\n' % (len(data), data)
+
+        return Handler
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=6379)
+    parser.add_argument('--host', default='127.0.0.1')
+    args = parser.parse_args()
+
+    server = RedisStandin(port=args.port, host=args.host)
+    print(f"Redis stand-in listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+"""
+Task brokers shared by the API dispatcher and scrape workers (Redis protocol or SQLite)
+"""
+
+import json
+import socket
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from urllib.parse import unquote, urlparse
+
+# Work queues; workers take product pages before new searches so started jobs finish first
+SEARCH_QUEUE = 'scrape:search'
+PRODUCT_QUEUE = 'scrape:product'
+TASK_QUEUES = (PRODUCT_QUEUE, SEARCH_QUEUE)
+
+Message = Dict[str, Any]
+
+
+class BrokerError(Exception):
+    pass
+
+
+class Broker:
+    """FIFO message queues plus per-domain rate state and small values shared by every process
+
+    Rate state is a GCRA schedule (the equivalent of a token bucket) keyed by
+    domain, using wall-clock time, so hosts sharing a broker need synced clocks.
+    """
+    kind = 'broker'
+
+    def push(self, queue: str, message: Message, ttl: Optional[float] = None):
+        """Append a message; with ttl, it may be dropped once ttl seconds pass without it being popped"""
+        raise NotImplementedError
+
+    def pop(self, queues: Sequence[str], timeout: float = 0.0) -> Optional[Tuple[str, Message]]:
+        """Oldest message of the first non-empty queue, waiting up to timeout seconds"""
+        raise NotImplementedError
+
+    def reserve_rate(self, domain: str, rate: float, burst: int) -> float:
+        """Take a slot in the domain's shared schedule and return how long to wait for it"""
+        raise NotImplementedError
+
+    def pause_domain(self, domain: str, seconds: float):
+        """Hold every process's requests to domain for the next seconds"""
+        raise NotImplementedError
+
+    def update_value(self, key: str, update: Callable[[Optional[Any]], Tuple[Any, Any]], ttl: float) -> Any:
+        """Atomically replace the JSON value at key (None if unset) with update(value)[0]
+
+        Returns update(value)[1]. update may be called again if another process
+        changed the value meanwhile. The value expires ttl seconds after its last update.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _schedule(tat: Optional[float], paused_until: Optional[float], rate: float, burst: int,
+                  now: float) -> Tuple[float, float]:
+        """(new theoretical arrival time, wait) for one request under GCRA"""
+        interval = 1.0 / max(rate, 1e-6)
+        paused_until = paused_until or 0.0
+        new_tat = max(tat or 0.0, now, paused_until) + interval
+        wait = max(0.0, new_tat - max(1, burst) * interval - now, paused_until - now)
+        return new_tat, wait
+
+
+class RedisConnection:
+    """Minimal RESP2 client: enough commands for queues and optimistic transactions"""
+    def __init__(self, host: str, port: int, db: int = 0, password: Optional[str] = None,
+                 timeout: float = 30.0):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._sock.makefile('rb')
+        if password:
+            self.execute('AUTH', password)
+        if db:
+            self.execute('SELECT', db)
+
+    def execute(self, *args) -> Any:
+        parts = [str(arg).encode('utf-8') if not isinstance(arg, bytes) else arg for arg in args]
+        payload = b''.join([f'*{len(parts)}\r\n'.encode()] +
+                           [b'$%d\r\n%s\r\n' % (len(part), part) for part in parts])
+        self._sock.sendall(payload)
+        return self._read()
+
+    def _read(self) -> Any:
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError('Redis connection closed')
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode('utf-8')
+        if kind == b'-':
+            raise BrokerError(rest.decode('utf-8'))
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            return None if length < 0 else self._file.read(length + 2)[:-2].decode('utf-8')
+        if kind == b'*':
+            length = int(rest)
+            return None if length < 0 else [self._read() for _ in range(length)]
+        raise BrokerError(f"Unexpected Redis reply: {line!r}")
+
+    def close(self):
+        try:
+            self._file.close()
+            self._sock.close()
+        except OSError:
+            pass
+
+
+class RedisBroker(Broker):
+    """Lists and keys on a Redis server (or anything speaking its protocol)
+
+    Each thread gets its own connection, since BRPOP blocks the connection it runs on.
+    """
+    kind = 'redis'
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, prefix: str = ''):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.prefix = prefix
+        self._local = threading.local()
+
+    def _conn(self) -> RedisConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = RedisConnection(self.host, self.port, self.db, self.password)
+        return conn
+
+    def _call(self, *args) -> Any:
+        """Run a command, reconnecting once if the connection dropped"""
+        for attempt in range(2):
+            try:
+                return self._conn().execute(*args)
+            except (ConnectionError, OSError):
+                self._reset()
+                if attempt:
+                    raise
+
+    def _reset(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def push(self, queue: str, message: Message, ttl: Optional[float] = None):
+        key = self.prefix + queue
+        self._call('LPUSH', key, json.dumps(message))
+        if ttl:
+            self._call('EXPIRE', key, int(ttl))
+
+    def pop(self, queues: Sequence[str], timeout: float = 0.0) -> Optional[Tuple[str, Message]]:
+        keys = [self.prefix + queue for queue in queues]
+        if timeout <= 0:
+            for queue, key in zip(queues, keys):
+                value = self._call('RPOP', key)
+                if value is not None:
+                    return queue, json.loads(value)
+            return None
+        reply = self._call('BRPOP', *keys, f'{timeout:.3f}')
+        if reply is None:
+            return None
+        return reply[0][len(self.prefix):], json.loads(reply[1])
+
+    def reserve_rate(self, domain: str, rate: float, burst: int) -> float:
+        key = f'{self.prefix}ratelimit:{domain}'
+        pause_key = f'{key}:pause'
+        # Optimistic transaction: retried when another process updated the schedule meanwhile
+        for _ in range(50):
+            conn = self._conn()
+            try:
+                conn.execute('WATCH', key, pause_key)
+                tat, paused_until = conn.execute('MGET', key, pause_key)
+                new_tat, wait = self._schedule(float(tat) if tat else None,
+                                               float(paused_until) if paused_until else None,
+                                               rate, burst, time.time())
+                conn.execute('MULTI')
+                conn.execute('SET', key, repr(new_tat), 'PX', int((wait + 3600) * 1000))
+                if conn.execute('EXEC') is not None:
+                    return wait
+            except (ConnectionError, OSError):
+                self._reset()
+                raise
+        return 1.0 / max(rate, 1e-6)
+
+    def pause_domain(self, domain: str, seconds: float):
+        until = time.time() + seconds
+        pause_key = f'{self.prefix}ratelimit:{domain}:pause'
+        current = self._call('GET', pause_key)
+        if current is None or float(current) < until:
+            self._call('SET', pause_key, repr(until), 'PX', int(seconds * 1000) + 1000)
+
+    def update_value(self, key: str, update: Callable[[Optional[Any]], Tuple[Any, Any]], ttl: float) -> Any:
+        key = self.prefix + key
+        for _ in range(50):
+            conn = self._conn()
+            try:
+                conn.execute('WATCH', key)
+                current = conn.execute('GET', key)
+                value, result = update(json.loads(current) if current is not None else None)
+                conn.execute('MULTI')
+                conn.execute('SET', key, json.dumps(value), 'PX', int(ttl * 1000))
+                if conn.execute('EXEC') is not None:
+                    return result
+            except (ConnectionError, OSError):
+                self._reset()
+                raise
+        raise BrokerError(f"Gave up updating {key}: it kept changing")
+
+    def close(self):
+        self._reset()
+
+
+class SQLiteBroker(Broker):
+    """Queues in a SQLite file, for several processes on one host (not network filesystems)"""
+    kind = 'sqlite'
+
+    def __init__(self, path: str, poll_interval: float = 0.05):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS broker_messages (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'queue TEXT NOT NULL, body TEXT NOT NULL, expires_at REAL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS broker_messages_queue ON broker_messages (queue, id)')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS broker_rates '
+                '(domain TEXT PRIMARY KEY, tat REAL, paused_until REAL)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS broker_values '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+
+    def push(self, queue: str, message: Message, ttl: Optional[float] = None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute('DELETE FROM broker_messages WHERE expires_at < ?', (now,))
+                self._conn.execute(
+                    'INSERT INTO broker_messages (queue, body, expires_at) VALUES (?, ?, ?)',
+                    (queue, json.dumps(message), now + ttl if ttl else None)
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def pop(self, queues: Sequence[str], timeout: float = 0.0) -> Optional[Tuple[str, Message]]:
+        deadline = time.monotonic() + timeout
+        while True:
+            for queue in queues:
+                message = self._pop_one(queue)
+                if message is not None:
+                    return queue, message
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(self.poll_interval, remaining))
+
+    def _pop_one(self, queue: str) -> Optional[Message]:
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT id, body FROM broker_messages WHERE queue = ? AND (expires_at IS NULL OR expires_at >= ?) '
+                    'ORDER BY id LIMIT 1', (queue, time.time())
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute('DELETE FROM broker_messages WHERE id = ?', (row[0],))
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return json.loads(row[1]) if row is not None else None
+
+    def reserve_rate(self, domain: str, rate: float, burst: int) -> float:
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT tat, paused_until FROM broker_rates WHERE domain = ?', (domain,)
+                ).fetchone() or (None, None)
+                new_tat, wait = self._schedule(row[0], row[1], rate, burst, time.time())
+                self._conn.execute(
+                    'INSERT INTO broker_rates (domain, tat, paused_until) VALUES (?, ?, ?) '
+                    'ON CONFLICT (domain) DO UPDATE SET tat = excluded.tat',
+                    (domain, new_tat, row[1])
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return wait
+
+    def pause_domain(self, domain: str, seconds: float):
+        until = time.time() + seconds
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO broker_rates (domain, tat, paused_until) VALUES (?, NULL, ?) '
+                'ON CONFLICT (domain) DO UPDATE SET paused_until = MAX(COALESCE(paused_until, 0), excluded.paused_until)',
+                (domain, until)
+            )
+
+    def update_value(self, key: str, update: Callable[[Optional[Any]], Tuple[Any, Any]], ttl: float) -> Any:
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute('DELETE FROM broker_values WHERE expires_at < ?', (now,))
+                row = self._conn.execute('SELECT value FROM broker_values WHERE key = ?', (key,)).fetchone()
+                value, result = update(json.loads(row[0]) if row is not None else None)
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO broker_values (key, value, expires_at) VALUES (?, ?, ?)',
+                    (key, json.dumps(value), now + ttl)
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return result
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_broker(url: Optional[str]) -> Optional[Broker]:
+    """Build a broker from a URL: redis://[:password@]host[:port][/db], sqlite:///path, or '' for none"""
+    if not url or url.lower() in ('off', 'none'):
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == 'redis':
+        db = parsed.path.strip('/')
+        return RedisBroker(
+            host=parsed.hostname or 'localhost',
+            port=parsed.port or 6379,
+            db=int(db) if db else 0,
+            password=unquote(parsed.password) if parsed.password else None
+        )
+    if parsed.scheme == 'sqlite':
+        # sqlite:///relative.db or sqlite:////absolute/path.db
+        return SQLiteBroker(unquote(url[len('sqlite:///'):]))
+    raise ValueError(f"Unknown broker URL: {url}")
@@ -0,0 +1,333 @@
+"""
+Shared Chromium browser with warm per-site contexts and memory limits
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+
+try:
+    import psutil
+except ImportError:  # memory is read from /proc instead, where available
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+def process_tree_rss() -> Optional[int]:
+    """Resident bytes of this process and its descendants (the browsers), or None if unknown
+
+    Pages shared between processes are counted once per process, so this overstates
+    Chromium's footprint somewhat; it is meant for a ceiling, not for accounting.
+    """
+    if psutil is not None:
+        try:
+            root = psutil.Process()
+            total = root.memory_info().rss
+            for child in root.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total
+        except psutil.Error:
+            return None
+    if not os.path.isdir('/proc'):
+        return None
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # The command name may contain spaces; the parent pid is the second field after it
+        children.setdefault(int(stat.rsplit(')', 1)[1].split()[1]), []).append(int(entry))
+    pids = [os.getpid()]
+    for pid in pids:
+        pids.extend(children.get(pid, []))
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            pass
+    return total
+
+
+@dataclass
+class WarmContext:
+    """A browser context with its fingerprint setup done, leased for one site's pages"""
+    key: str
+    browser: Browser
+    context: BrowserContext
+    pages: int = 0
+
+
+class BrowserPool:
+    """Long-lived Chromium instance shared by scrapers, with a cap on open contexts
+
+    Pages are leased with page(), which always closes the page and hands its
+    context back. Healthy contexts are kept warm per site (up to max_idle_contexts)
+    so the site's next page skips creating and setting one up; a context is closed
+    instead after max_pages_per_context pages, after a failed or discarded page, or
+    while the process is above memory_limit_mb. Past that limit the idle contexts
+    are shed as well and the browser is recycled once its in-flight pages finish.
+    """
+    def __init__(self, max_contexts: int = 8,
+                 max_pages_per_browser: int = 200,
+                 max_idle_contexts: int = 4,
+                 max_pages_per_context: int = 25,
+                 memory_limit_mb: int = 0,
+                 memory_check_interval: float = 1.0):
+        self.max_contexts = max(1, max_contexts)
+        self.max_pages_per_browser = max(1, max_pages_per_browser)
+        self.max_idle_contexts = max(0, max_idle_contexts)
+        self.max_pages_per_context = max(1, max_pages_per_context)
+        self.memory_limit_mb = max(0, memory_limit_mb)
+        self.memory_check_interval = memory_check_interval
+        self.playwright = None
+        self.browser: Optional[Browser] = None
+        self.pages_served = 0
+        self.active_contexts = 0
+        self.restarts = 0
+        self.contexts_created = 0
+        self.contexts_reused = 0
+        self.memory_recycles = 0
+        self.memory_bytes: Optional[int] = None
+        self._idle: List[WarmContext] = []
+        self._discarded = set()
+        self._recycle_pending = False
+        self._memory_checked_at = 0.0
+        self._memory_streak = 0
+        self._retired: Dict[Browser, int] = {}
+        self._context_counts: Dict[Browser, int] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _ensure_started(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            self._semaphore = asyncio.Semaphore(self.max_contexts)
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+
+    async def _launch_browser(self) -> Browser:
+        browser = await self.playwright.chromium.launch(
+            headless=True,
+            args=[
+                '--no-sandbox',
+                '--disable-blink-features=AutomationControlled',
+                '--disable-dev-shm-usage',
+                '--disable-accelerated-2d-canvas',
+                '--no-first-run',
+                '--no-zygote',
+                '--disable-gpu',
+                '--hide-scrollbars',
+                '--mute-audio',
+                f'--window-size={1920 + random.randint(-100, 100)},{1080 + random.randint(-50, 50)}'
+            ]
+        )
+        self._context_counts[browser] = 0
+        self.pages_served = 0
+        self._recycle_pending = False
+        logger.info("Launched shared Chromium browser")
+        return browser
+
+    @property
+    def idle_contexts(self) -> int:
+        return len(self._idle)
+
+    def is_healthy(self) -> bool:
+        """Check that the current browser is still connected"""
+        return self.browser is not None and self.browser.is_connected()
+
+    async def get_browser(self) -> Browser:
+        """Return a healthy browser, restarting or recycling it when needed"""
+        await self._ensure_started()
+        async with self._lock:
+            if self.browser is not None and not self.browser.is_connected():
+                logger.warning("Shared browser disconnected, restarting")
+                self._context_counts.pop(self.browser, None)
+                self._idle = [warm for warm in self._idle if warm.browser is not self.browser]
+                self.browser = None
+                self.restarts += 1
+            elif self.browser is not None and (self.pages_served >= self.max_pages_per_browser
+                                               or self._recycle_pending):
+                # Recycle to keep memory from creeping up; in-flight contexts finish first
+                logger.info(f"Recycling shared browser after {self.pages_served} pages")
+                await self._shed_idle(self.browser)
+                await self._retire(self.browser)
+                self.browser = None
+            if self.browser is None:
+                self.browser = await self._launch_browser()
+            return self.browser
+
+    async def _retire(self, browser: Browser):
+        if self._context_counts.get(browser, 0) > 0:
+            self._retired[browser] = self._context_counts[browser]
+            return
+        self._context_counts.pop(browser, None)
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.error(f"Error closing retired browser: {e}")
+
+    @asynccontextmanager
+    async def page(self, key: str, setup: Optional[Callable[[BrowserContext], Awaitable[None]]] = None,
+                   **kwargs):
+        """Open a page in a warm context for key (a site) within the pool limit
+
+        The page is always closed afterwards. New contexts are created with kwargs
+        and prepared by setup, so every caller using a key must pass the same ones.
+        """
+        await self._ensure_started()
+        async with self._semaphore:
+            warm = await self._checkout(key, setup, kwargs)
+            self.active_contexts += 1
+            page = None
+            # Only a lease that ends normally keeps the context; errors and cancellation drop it
+            healthy = False
+            try:
+                page = await warm.context.new_page()
+                yield page
+                healthy = True
+            finally:
+                self.active_contexts -= 1
+                warm.pages += 1
+                if warm.browser is self.browser:
+                    self.pages_served += 1
+                if page is None:
+                    healthy = False
+                else:
+                    if page in self._discarded:
+                        self._discarded.discard(page)
+                        healthy = False
+                    try:
+                        await page.close()
+                    except Exception as e:
+                        healthy = False
+                        logger.error(f"Error closing page: {e}")
+                await self._checkin(warm, healthy)
+
+    def discard(self, page: Page):
+        """Close the page's context when its lease ends instead of keeping it warm (e.g. after a block)"""
+        self._discarded.add(page)
+
+    async def _checkout(self, key: str, setup: Optional[Callable[[BrowserContext], Awaitable[None]]],
+                        kwargs: Dict[str, Any]) -> WarmContext:
+        browser = await self.get_browser()
+        for index in range(len(self._idle) - 1, -1, -1):
+            warm = self._idle[index]
+            if warm.key == key and warm.browser is browser:
+                del self._idle[index]
+                self.contexts_reused += 1
+                return warm
+        warm = WarmContext(key, browser, await browser.new_context(**kwargs))
+        self._context_counts[browser] = self._context_counts.get(browser, 0) + 1
+        self.contexts_created += 1
+        if setup is not None:
+            try:
+                await setup(warm.context)
+            except Exception:
+                await self._close_context(warm)
+                raise
+        return warm
+
+    async def _checkin(self, warm: WarmContext, healthy: bool):
+        """Keep a released context warm, or close it when it should not serve another page"""
+        if (healthy and self.max_idle_contexts and warm.pages < self.max_pages_per_context
+                and warm.browser is self.browser and warm.browser.is_connected()
+                and not await self._over_memory_limit()):
+            self._idle.append(warm)
+            while len(self._idle) > self.max_idle_contexts:
+                await self._close_context(self._idle.pop(0))
+            return
+        await self._close_context(warm)
+
+    async def _over_memory_limit(self) -> bool:
+        """Whether the process tree is above memory_limit_mb; sheds idle contexts and schedules a recycle if so"""
+        if not self.memory_limit_mb:
+            return False
+        now = time.monotonic()
+        if now - self._memory_checked_at >= self.memory_check_interval:
+            self._memory_checked_at = now
+            loop = asyncio.get_running_loop()
+            self.memory_bytes = await loop.run_in_executor(None, process_tree_rss)
+        if self.memory_bytes is None or self.memory_bytes < self.memory_limit_mb * 1024 * 1024:
+            self._memory_streak = 0
+            return False
+        await self._shed_idle()
+        # Recycles that did not bring memory under the limit double the pages before
+        # the next one, so a limit below the baseline footprint cannot relaunch on every page
+        if not self._recycle_pending and self.pages_served >= self.max_contexts * 2 ** self._memory_streak:
+            logger.warning(f"Using {self.memory_bytes // (1024 * 1024)} MB, above the "
+                           f"{self.memory_limit_mb} MB limit; recycling the shared browser")
+            self._recycle_pending = True
+            self._memory_streak += 1
+            self.memory_recycles += 1
+        return True
+
+    async def _shed_idle(self, browser: Optional[Browser] = None):
+        """Close the idle contexts (of one browser, or all)"""
+        shed = [warm for warm in self._idle if browser is None or warm.browser is browser]
+        self._idle = [warm for warm in self._idle if warm not in shed]
+        for warm in shed:
+            await self._close_context(warm)
+
+    async def _close_context(self, warm: WarmContext):
+        try:
+            await warm.context.close()
+        except Exception as e:
+            logger.error(f"Error closing browser context: {e}")
+        browser = warm.browser
+        if browser in self._context_counts:
+            self._context_counts[browser] -= 1
+        if browser in self._retired and self._context_counts.get(browser, 0) <= 0:
+            del self._retired[browser]
+            await self._retire(browser)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'healthy': self.is_healthy(),
+            'active_contexts': self.active_contexts,
+            'idle_contexts': self.idle_contexts,
+            'max_contexts': self.max_contexts,
+            'contexts_created': self.contexts_created,
+            'contexts_reused': self.contexts_reused,
+            'pages_served': self.pages_served,
+            'restarts': self.restarts,
+            'memory_mb': self.memory_bytes // (1024 * 1024) if self.memory_bytes is not None else None,
+            'memory_limit_mb': self.memory_limit_mb or None,
+            'memory_recycles': self.memory_recycles
+        }
+
+    async def close(self):
+        try:
+            self._idle.clear()
+            for browser in [self.browser, *self._retired]:
+                if browser is not None:
+                    try:
+                        await browser.close()
+                    except Exception:
+                        pass
+            self.browser = None
+            self._retired.clear()
+            self._context_counts.clear()
+            if self.playwright is not None:
+                await self.playwright.stop()
+        except Exception as e:
+            logger.error(f"Error closing browser pool: {e}")
+        finally:
+            self.playwright = None
@@ -0,0 +1,253 @@
+"""
+Cache backends shared by the scraper (in-memory LRU and on-disk SQLite)
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+
+
+class CacheBackend:
+    """Key/value cache with TTL eviction and hit/miss counters
+
+    Values must be JSON-serializable so every backend can store them.
+    """
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def get(self, key: str, record: bool = True) -> Optional[Any]:
+        entry = self.get_entry(key, record)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str, record: bool = True) -> Optional[Tuple[Any, float]]:
+        """Return (value, stored_at) for an unexpired key, or None
+
+        Pass record=False for internal peeks that should not count as hits or misses.
+        """
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def _record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self).__name__,
+            'entries': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+class MemoryCache(CacheBackend):
+    """Thread-safe in-process LRU cache"""
+    def __init__(self, max_entries: int = 1000, ttl: Optional[float] = None):
+        super().__init__(ttl)
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get_entry(self, key: str, record: bool = True) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry[1]):
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if record:
+                self._record(entry is not None)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    """On-disk cache that survives restarts and can be shared by processes on one host"""
+    def __init__(self, path: str, table: str = 'cache', ttl: Optional[float] = None):
+        super().__init__(ttl)
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table}")
+        self.path = path
+        self.table = table
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)'
+            )
+            self._conn.commit()
+
+    def get_entry(self, key: str, record: bool = True) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT value, stored_at FROM {self.table} WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and self._is_expired(row[1]):
+                self._conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+                self._conn.commit()
+                self.evictions += 1
+                row = None
+            if record:
+                self._record(row is not None)
+            return (json.loads(row[0]), row[1]) if row is not None else None
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._conn.execute(
+                f'INSERT OR REPLACE INTO {self.table} (key, value, stored_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value), time.time())
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute(f'DELETE FROM {self.table}')
+            self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete all expired rows and return how many were removed"""
+        if self.ttl is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                f'DELETE FROM {self.table} WHERE stored_at < ?', (time.time() - self.ttl,)
+            )
+            self._conn.commit()
+            self.evictions += cursor.rowcount
+            return cursor.rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+@dataclass
+class CachedPage:
+    url: str
+    html: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def validator_headers(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this page"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """Rendered HTML per URL
+
+    Pages younger than fresh_ttl are served without touching the site. Older pages
+    stay in the backend (until its own TTL) so they can be revalidated with
+    ETag/Last-Modified instead of being rendered again.
+    """
+    def __init__(self, backend: CacheBackend, fresh_ttl: float = 900):
+        self.backend = backend
+        self.fresh_ttl = fresh_ttl
+        self.revalidated = 0
+
+    def lookup(self, url: str, record: bool = True) -> Optional[CachedPage]:
+        value = self.backend.get(url, record)
+        return CachedPage(**value) if value is not None else None
+
+    def is_fresh(self, page: Optional[CachedPage]) -> bool:
+        return page is not None and page.age <= self.fresh_ttl
+
+    def get_fresh(self, url: str, record: bool = True) -> Optional[CachedPage]:
+        page = self.lookup(url, record)
+        return page if self.is_fresh(page) else None
+
+    def store(self, url: str, html: str, etag: Optional[str] = None,
+              last_modified: Optional[str] = None) -> CachedPage:
+        page = CachedPage(url=url, html=html, etag=etag, last_modified=last_modified,
+                          fetched_at=time.time())
+        self.backend.set(url, asdict(page))
+        return page
+
+    def mark_revalidated(self, page: CachedPage) -> CachedPage:
+        """Restart the freshness window of a page the site confirmed unchanged (HTTP 304)"""
+        self.revalidated += 1
+        return self.store(page.url, page.html, page.etag, page.last_modified)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.backend.stats(), 'fresh_ttl': self.fresh_ttl, 'revalidated': self.revalidated}
+
+
+def create_cache(backend: str, path: Optional[str] = None, table: str = 'cache',
+                 ttl: Optional[float] = None, max_entries: int = 1000) -> Optional[CacheBackend]:
+    """Build a cache from a backend name ('memory', 'sqlite' or 'off')"""
+    backend = (backend or 'off').lower()
+    if backend == 'memory':
+        return MemoryCache(max_entries=max_entries, ttl=ttl)
+    if backend == 'sqlite':
+        return SQLiteCache(path or 'scraper_cache.db', table=table, ttl=ttl)
+    if backend in ('off', 'none', ''):
+        return None
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -0,0 +1,156 @@
+"""
+Plain HTTP fetching for pages that render server-side, so they can skip the browser
+"""
+
+import asyncio
+import logging
+import re
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1'
+}
+
+# Text found on bot-protection interstitials (Cloudflare, Akamai, PerimeterX, DataDome, Imperva)
+CHALLENGE_PATTERN = re.compile(
+    r'cf-browser-verification|challenge-platform|cf_chl_|<title>\s*Just a moment'
+    r'|_sec/cp_challenge|px-captcha|captcha-delivery\.com|_Incapsula_Resource'
+    r'|Pardon Our Interruption|<title>\s*Access Denied|Please enable JS and disable any ad blocker',
+    re.IGNORECASE
+)
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int
+    html: str = ''
+    headers: Dict[str, str] = field(default_factory=dict)
+    # The body was over max_bytes and was not read
+    truncated: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+
+@dataclass
+class TierStats:
+    http: int = 0
+    browser: int = 0
+    fallbacks: int = 0
+
+
+class HttpFetcher:
+    """Pooled async HTTP client with per-domain records of which fetch tier works
+
+    Clients (keep-alive, HTTP/2 when h2 is installed, gzip/brotli) are bound to the
+    event loop that uses them, so one is kept per loop. A domain whose static HTML
+    was rejected max_fallbacks times without ever succeeding goes straight to the
+    browser from then on.
+    """
+    def __init__(self, timeout: float = 15.0, max_connections: int = 20,
+                 max_fallbacks: int = 3, max_bytes: int = 5_000_000):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_fallbacks = max_fallbacks
+        self.max_bytes = max_bytes
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+        self._domains: Dict[str, TierStats] = {}
+        self._lock = threading.Lock()
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(
+                    http2=HTTP2_AVAILABLE,
+                    headers=BROWSER_HEADERS,
+                    follow_redirects=True,
+                    timeout=self.timeout,
+                    limits=httpx.Limits(max_connections=self.max_connections,
+                                        max_keepalive_connections=self.max_connections)
+                )
+                self._clients[loop] = client
+            return client
+
+    def _tier_stats(self, url: str) -> TierStats:
+        domain = urlparse(url).netloc.lower()
+        with self._lock:
+            return self._domains.setdefault(domain, TierStats())
+
+    def should_try(self, url: str) -> bool:
+        stats = self._tier_stats(url)
+        return stats.http > 0 or stats.fallbacks < self.max_fallbacks
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """GET a page, giving up on bodies over max_bytes without downloading the rest"""
+        async with self._client().stream('GET', url, headers=headers) as response:
+            result = FetchResult(url=str(response.url), status=response.status_code, headers=dict(response.headers))
+            length = response.headers.get('content-length', '')
+            if length.isdigit() and int(length) > self.max_bytes:
+                result.truncated = True
+                return result
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) > self.max_bytes:
+                    result.truncated = True
+                    return result
+            result.html = body.decode(response.encoding or 'utf-8', errors='replace')
+            return result
+
+    def is_challenge(self, result: FetchResult) -> bool:
+        """True when the response looks like a bot check rather than the page"""
+        if result.status in (403, 429, 503) and 'text/html' in result.headers.get('content-type', ''):
+            return True
+        return bool(CHALLENGE_PATTERN.search(result.html[:20000]))
+
+    def record(self, url: str, tier: str):
+        """Record which tier ('http' or 'browser') produced the page"""
+        stats = self._tier_stats(url)
+        with self._lock:
+            setattr(stats, tier, getattr(stats, tier) + 1)
+
+    def record_fallback(self, url: str, reason: str):
+        logger.info(f"HTTP fast path rejected for {url} ({reason}), using the browser")
+        stats = self._tier_stats(url)
+        with self._lock:
+            stats.fallbacks += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'http2': HTTP2_AVAILABLE,
+                'domains': {domain: vars(stats).copy() for domain, stats in self._domains.items()}
+            }
+
+    async def aclose(self):
+        """Close the client bound to the running loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
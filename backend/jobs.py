@@ -0,0 +1,265 @@
+"""
+Scrape jobs and their event logs, run in-process or dispatched to scrape workers
+"""
+
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass, asdict, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from broker import SEARCH_QUEUE, Broker
+from metrics import ScrapeMetrics, ScrapeTimings
+from models import PRODUCT_DATA_FIELDS, ProductData, SearchConfig, rank_results
+from monitor import UNCHANGED
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScrapeJob:
+    job_id: str
+    config: SearchConfig
+    status: str = 'queued'  # queued, running, completed, failed
+    include_timings: bool = False
+    timings: Optional[Dict[str, Any]] = None
+    total: Optional[int] = None
+    results: List[Optional[ProductData]] = field(default_factory=list)
+    # Each result's (rank on its site, site position), for ranking distributed results
+    ranks: Dict[int, Tuple[int, int]] = field(default_factory=dict)
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('completed', 'failed')
+
+    def summary(self) -> Dict[str, Any]:
+        summary = {
+            'job_id': self.job_id,
+            'status': self.status,
+            'total': self.total,
+            'completed': sum(1 for result in self.results if result is not None),
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+        if self.include_timings:
+            summary['timings'] = self.timings
+        return summary
+
+
+class JobManager:
+    """Thread-safe registry of scrape jobs and their event logs
+
+    Jobs are updated from the event loop thread and read from Flask request threads.
+    """
+    def __init__(self, ttl: float = 3600):
+        self.ttl = ttl
+        self.jobs: Dict[str, ScrapeJob] = {}
+        self._condition = threading.Condition()
+
+    def create(self, config: SearchConfig, include_timings: bool = False) -> ScrapeJob:
+        with self._condition:
+            self._purge_expired()
+            job = ScrapeJob(job_id=uuid.uuid4().hex, config=config, include_timings=include_timings)
+            self.jobs[job.job_id] = job
+            return job
+
+    def get(self, job_id: str) -> Optional[ScrapeJob]:
+        with self._condition:
+            return self.jobs.get(job_id)
+
+    def _purge_expired(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job.finished and now - job.finished_at > self.ttl]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def _publish(self, job: ScrapeJob, event: str, data: Dict[str, Any]):
+        job.events.append({'event': event, 'data': data})
+        self._condition.notify_all()
+
+    def set_running(self, job: ScrapeJob):
+        with self._condition:
+            job.status = 'running'
+            self._publish(job, 'status', {'status': job.status})
+
+    def add_search_results(self, job: ScrapeJob, urls: List[str]):
+        """Record a search results page; total grows as later pages arrive"""
+        with self._condition:
+            offset = len(job.results)
+            job.results.extend([None] * len(urls))
+            job.total = len(job.results)
+            self._publish(job, 'search', {'total': job.total, 'offset': offset, 'urls': urls})
+
+    def add_result(self, job: ScrapeJob, index: int, url: str, product: ProductData):
+        with self._condition:
+            job.results[index] = product
+            self._publish(job, 'result', {'index': index, 'url': url, 'data': asdict(product)})
+
+    def finish(self, job: ScrapeJob, error: Optional[str] = None,
+               timings: Optional[Dict[str, Any]] = None):
+        with self._condition:
+            job.status = 'failed' if error else 'completed'
+            job.error = error
+            job.timings = timings
+            job.finished_at = time.time()
+            self._publish(job, 'done', job.summary())
+
+    def wait(self, job: ScrapeJob, timeout: Optional[float] = None) -> bool:
+        """Block until the job finishes; False if timeout passed first"""
+        with self._condition:
+            return self._condition.wait_for(lambda: job.finished, timeout)
+
+    def iter_events(self, job: ScrapeJob, start: int = 0, keepalive: float = 15.0):
+        """Yield (event_id, event) pairs until the job finishes; None events are keep-alives"""
+        index = max(0, start)
+        while True:
+            with self._condition:
+                if index >= len(job.events) and not job.finished:
+                    self._condition.wait(timeout=keepalive)
+                pending = job.events[index:]
+                finished = job.finished
+            if not pending:
+                if finished:
+                    return
+                yield index, None
+                continue
+            for event in pending:
+                yield index, event
+                index += 1
+
+
+@dataclass
+class DispatchedJob:
+    job: ScrapeJob
+    deadline: float
+    timings: ScrapeTimings = field(default_factory=ScrapeTimings)
+    total: Optional[int] = None  # product tasks queued, known once the search finishes
+    received: int = 0
+
+
+class Dispatcher:
+    """Sends jobs to scrape workers through the broker and assembles their results by job id
+
+    Each API process has its own reply queue. A listener thread, running while
+    jobs are out, feeds worker events into the JobManager, so job status, SSE
+    streams and /api/scrape behave as they do in-process. Workers mark cross-site
+    duplicates themselves, claiming part numbers in a per-job index in the broker.
+    """
+    def __init__(self, broker: Broker, jobs: JobManager, metrics: ScrapeMetrics, timeout: float = 300):
+        self.broker = broker
+        self.jobs = jobs
+        self.timeout = timeout
+        self.metrics = metrics
+        self.reply_to = f"scrape:events:{uuid.uuid4().hex}"
+        self._dispatched: Dict[str, DispatchedJob] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, job: ScrapeJob, api_key: str, concurrency: int):
+        """Queue the job's search task; results arrive through the job as workers finish them"""
+        deadline = time.time() + self.timeout
+        with self._lock:
+            self._dispatched[job.job_id] = DispatchedJob(job, deadline)
+        self._start_listener()
+        self.jobs.set_running(job)
+        self.broker.push(SEARCH_QUEUE, {
+            'kind': 'search',
+            'job_id': job.job_id,
+            'reply_to': self.reply_to,
+            'deadline': deadline,
+            'api_key': api_key,
+            'concurrency': concurrency,
+            'config': asdict(job.config)
+        })
+
+    def scrape(self, config: SearchConfig, api_key: str, concurrency: int,
+               include_timings: bool = False) -> Tuple[ScrapeJob, List[ProductData]]:
+        """Dispatch a scrape and block until it finishes; returns the job and its ranked results"""
+        job = self.jobs.create(config, include_timings=include_timings)
+        self.submit(job, api_key, concurrency)
+        self.jobs.wait(job, self.timeout + 30)
+        finished = [index for index, result in enumerate(job.results) if result is not None]
+        return job, rank_results([job.results[index] for index in finished],
+                                 {position: job.ranks.get(index, (index, 0)) for position, index in enumerate(finished)})
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'kind': self.broker.kind, 'reply_to': self.reply_to, 'jobs': len(self._dispatched)}
+
+    def _start_listener(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._listen, name='job-dispatcher', daemon=True)
+                self._thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                popped = self.broker.pop([self.reply_to], timeout=1.0)
+            except Exception as e:
+                logger.error(f"Error reading worker events: {e}")
+                popped = None
+                time.sleep(1.0)
+            if popped is not None:
+                try:
+                    self._handle(popped[1])
+                except Exception as e:
+                    logger.error(f"Error handling worker event: {e}")
+            self._expire()
+            with self._lock:
+                if popped is None and not self._dispatched:
+                    self._thread = None
+                    return
+
+    def _handle(self, event: Dict[str, Any]):
+        with self._lock:
+            dispatched = self._dispatched.get(event.get('job_id'))
+        if dispatched is None:
+            return  # finished or timed out already
+        job = dispatched.job
+        kind = event.get('event')
+        if event.get('timings'):
+            dispatched.timings.merge(event['timings'])
+        if kind == 'search':
+            self.jobs.add_search_results(job, event['urls'])
+        elif kind == 'result':
+            index, url = event['index'], event['url']
+            product_data = ProductData(**{key: value for key, value in event['data'].items()
+                                          if key in PRODUCT_DATA_FIELDS})
+            dispatched.received += 1
+            # Monitoring jobs only report new and changed products
+            reported = not (job.config.monitor and product_data.monitor_status == UNCHANGED)
+            if reported and index < len(job.results):
+                job.ranks[index] = tuple(event.get('rank') or (index, 0))
+                self.jobs.add_result(job, index, url, product_data)
+        elif kind == 'searched':
+            dispatched.total = event['total']
+            if event.get('error'):
+                self._finish(dispatched, event['error'], 'failed')
+                return
+        if dispatched.total is not None and dispatched.received >= dispatched.total:
+            self._finish(dispatched)
+
+    def _expire(self):
+        now = time.time()
+        with self._lock:
+            expired = [dispatched for dispatched in self._dispatched.values() if dispatched.deadline < now]
+        for dispatched in expired:
+            logger.error(f"Job {dispatched.job.job_id} timed out after {self.timeout} seconds")
+            self._finish(dispatched, 'Scraping operation timed out', 'timeout')
+
+    def _finish(self, dispatched: DispatchedJob, error: Optional[str] = None, outcome: str = 'completed'):
+        with self._lock:
+            if self._dispatched.pop(dispatched.job.job_id, None) is None:
+                return
+        timings = dispatched.timings.to_dict()
+        self.metrics.observe_scrape(dispatched.job.config.website_url, timings['wall_seconds'], outcome)
+        self.jobs.finish(dispatched.job, error=error, timings=timings)
+        logger.info(f"Job {dispatched.job.job_id} {outcome} with {dispatched.received} results from workers")
@@ -0,0 +1,268 @@
+"""
+Per-stage timing spans and process metrics in the Prometheus text exposition format
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers cached lookups (ms) through slow renders and LLM calls (tens of seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[Dict[str, str], float]
+
+
+def domain_label(url: Optional[str]) -> str:
+    return (urlparse(url).netloc.lower() if url else '') or 'unknown'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: (count per bucket, +Inf last), sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            values = sorted((key, (counts[:], total[0])) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, 'le': _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Collected(Metric):
+    """Metric read from a callback at scrape time, for values other components already track"""
+    def __init__(self, name: str, documentation: str, kind: str, callback: Callable[[], List[Sample]]):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self.callback = callback
+
+    def samples(self) -> Iterator[Tuple[str, Dict[str, str], float]]:
+        for labels, value in self.callback():
+            yield self.name, labels, value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def collect(self, name: str, documentation: str, kind: str,
+                callback: Callable[[], List[Sample]]) -> Collected:
+        return self._register(Collected(name, documentation, kind, callback))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                lines.append(f"# {metric.name} unavailable: {_escape(str(e))}")
+        return '\n'.join(lines) + '\n'
+
+
+@dataclass
+class StageTotals:
+    count: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    errors: int = 0
+
+
+class ScrapeTimings:
+    """Stage totals and LLM token use of one scrape, for attaching to its response"""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, StageTotals] = {}
+        self.tokens: Dict[str, int] = {'prompt': 0, 'completion': 0}
+
+    def record(self, stage: str, seconds: float = 0.0, error: bool = False, count: bool = True):
+        totals = self.stages.setdefault(stage, StageTotals())
+        if count:
+            totals.count += 1
+            totals.seconds += seconds
+            totals.max_seconds = max(totals.max_seconds, seconds)
+        if error:
+            totals.errors += 1
+
+    def merge(self, other: Dict[str, object]):
+        """Add another scrape's to_dict() totals, e.g. a worker's share of a distributed job"""
+        for stage, totals in other.get('stages', {}).items():
+            mine = self.stages.setdefault(stage, StageTotals())
+            mine.count += totals['count']
+            mine.seconds += totals['seconds']
+            mine.max_seconds = max(mine.max_seconds, totals['max_seconds'])
+            mine.errors += totals['errors']
+        for kind, tokens in other.get('llm_tokens', {}).items():
+            self.tokens[kind] = self.tokens.get(kind, 0) + tokens
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'wall_seconds': round(time.perf_counter() - self.started, 3),
+            'stages': {
+                stage: {'count': totals.count, 'seconds': round(totals.seconds, 3),
+                        'max_seconds': round(totals.max_seconds, 3), 'errors': totals.errors}
+                for stage, totals in self.stages.items()
+            },
+            'llm_tokens': dict(self.tokens)
+        }
+
+
+class ScrapeMetrics:
+    """Process-wide stage histograms, error and token counters, labelled by domain
+
+    Stages: search (results page navigation), navigation (product page fetch or
+    render), rate_limit, readiness, pacing, cleaning, llm and serialization.
+    """
+    def __init__(self, registry: MetricsRegistry, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.registry = registry
+        self.stage_seconds = registry.histogram(
+            'scraper_stage_seconds', 'Time spent in each scraping stage', ('stage', 'domain'), buckets
+        )
+        self.stage_errors = registry.counter(
+            'scraper_stage_errors_total', 'Scraping stages that failed', ('stage', 'domain')
+        )
+        self.scrape_seconds = registry.histogram(
+            'scraper_scrape_seconds', 'Duration of whole scrape requests and jobs', ('domain', 'outcome'), buckets
+        )
+        self.llm_tokens = registry.counter(
+            'scraper_llm_tokens_total', 'OpenAI tokens used', ('model', 'kind')
+        )
+
+    @contextmanager
+    def span(self, stage: str, url: Optional[str], timings: Optional[ScrapeTimings] = None):
+        """Time the block as stage; exceptions escaping it count as stage errors"""
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            domain = domain_label(url)
+            self.stage_seconds.observe(elapsed, stage=stage, domain=domain)
+            if failed:
+                self.stage_errors.inc(stage=stage, domain=domain)
+            if timings is not None:
+                timings.record(stage, elapsed, error=failed)
+
+    def error(self, stage: str, url: Optional[str], timings: Optional[ScrapeTimings] = None):
+        """Count a stage failure that was handled without an exception (e.g. an HTTP error status)"""
+        self.stage_errors.inc(stage=stage, domain=domain_label(url))
+        if timings is not None:
+            timings.record(stage, error=True, count=False)
+
+    def record_tokens(self, model: str, usage, timings: Optional[ScrapeTimings] = None):
+        """Count the prompt/completion tokens of an OpenAI response's usage, when reported"""
+        if usage is None:
+            return
+        for kind in ('prompt', 'completion'):
+            tokens = getattr(usage, f'{kind}_tokens', None) or 0
+            if tokens:
+                self.llm_tokens.inc(tokens, model=model, kind=kind)
+                if timings is not None:
+                    timings.tokens[kind] += tokens
+
+    def observe_scrape(self, url: Optional[str], seconds: float, outcome: str):
+        self.scrape_seconds.observe(seconds, domain=domain_label(url), outcome=outcome)
@@ -0,0 +1,146 @@
+"""
+Search and product data shared by the API, the scraper and the scrape workers
+"""
+
+import re
+from dataclasses import dataclass, asdict, field, fields
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass
+class SearchConfig:
+    website_url: str
+    search_term: str
+    extract_fields: List[str]
+    max_results: int = 5  # per site
+    # Every site searched when comparing across sites; website_url is the first
+    website_urls: List[str] = field(default_factory=list)
+    # Only report products that are new or whose monitored fields changed since the last scrape
+    monitor: bool = False
+
+    @property
+    def sites(self) -> List[str]:
+        return self.website_urls or [self.website_url]
+
+
+@dataclass
+class ProductData:
+    product_name: Optional[str] = None
+    price: Optional[str] = None
+    condition: Optional[str] = None
+    country: Optional[str] = None
+    seller: Optional[str] = None
+    part_number: Optional[str] = None
+    manufacturer: Optional[str] = None
+    availability: Optional[str] = None
+    specifications: Optional[Dict[str, str]] = None
+    price_breaks: Optional[List[Dict[str, str]]] = None
+    datasheet_url: Optional[str] = None
+    confidence_score: Optional[float] = None
+    url: Optional[str] = None
+    # Set on a listing of a part already found on another site (the first listing's URL)
+    duplicate_of: Optional[str] = None
+    # Offers from duplicate listings folded into this one
+    listings: Optional[List[Dict[str, str]]] = None
+    # Monitoring mode: new, changed or unchanged since the last scrape, and the changed fields' old/new values
+    monitor_status: Optional[str] = None
+    changes: Optional[Dict[str, Dict[str, Any]]] = None
+
+
+# JSON example shown to the model for each ProductData field
+PRODUCT_FIELD_EXAMPLES = {
+    "product_name": '"Full product name or title"',
+    "price": '"Main price (include currency symbol)"',
+    "condition": '"New/Used/Refurbished/etc"',
+    "country": '"Country of origin or shipping"',
+    "seller": '"Seller or supplier name"',
+    "part_number": '"Manufacturer part number or model"',
+    "manufacturer": '"Brand or manufacturer name"',
+    "availability": '"In stock/Out of stock/Lead time info"',
+    "specifications": '{"key": "value pairs of technical specs"}',
+    "price_breaks": '[{"quantity": "1", "price": "$X.XX"}, {"quantity": "10", "price": "$Y.YY"}]',
+    "datasheet_url": '"URL to technical datasheet if available"',
+    "confidence_score": '0.95'
+}
+
+# Fields extracted from pages; url, duplicate_of and listings are filled in by the scraper
+PRODUCT_FIELDS = set(PRODUCT_FIELD_EXAMPLES)
+PRODUCT_DATA_FIELDS = {f.name for f in fields(ProductData)}
+
+# Display names the frontend sends in extract_fields, besides the field names themselves
+FIELD_ALIASES = {
+    'name': 'product_name', 'title': 'product_name', 'product': 'product_name',
+    'brand': 'manufacturer', 'mpn': 'part_number', 'model': 'part_number', 'sku': 'part_number',
+    'stock': 'availability', 'supplier': 'seller', 'vendor': 'seller',
+    'country_of_origin': 'country', 'specs': 'specifications',
+    'datasheet': 'datasheet_url', 'quantity_pricing': 'price_breaks', 'price_tiers': 'price_breaks'
+}
+
+
+def product_fields_for(extract_fields: Optional[List[str]], dedupe: bool = False) -> List[str]:
+    """ProductData fields needed to answer the requested extract_fields
+
+    Names that match no field (custom attributes) are looked for in specifications.
+    With no request every field is wanted. dedupe adds the fields cross-site
+    duplicates are matched on, for searches over several sites.
+    """
+    if not extract_fields:
+        return [key for key in PRODUCT_FIELD_EXAMPLES if key != 'confidence_score']
+    wanted = ['part_number', 'manufacturer'] if dedupe else []
+    for name in extract_fields:
+        key = re.sub(r'[^a-z0-9]+', '_', str(name).lower()).strip('_')
+        key = FIELD_ALIASES.get(key, key)
+        if key not in PRODUCT_FIELDS or key == 'confidence_score':
+            key = 'specifications'
+        if key not in wanted:
+            wanted.append(key)
+    return wanted
+
+
+def has_value(value: Any) -> bool:
+    return value not in (None, '', [], {})
+
+
+def missing_fields(product_data: ProductData, wanted: List[str]) -> List[str]:
+    return [key for key in wanted if not has_value(getattr(product_data, key))]
+
+
+def merge_product_data(structured: ProductData, extracted: ProductData) -> ProductData:
+    """Fill the gaps in structured data with LLM results
+
+    Embedded metadata wins where both have a value; the confidence score is the
+    per-field average of both sources.
+    """
+    merged = asdict(extracted)
+    from_structured = 0
+    for key, value in asdict(structured).items():
+        if key != 'confidence_score' and has_value(value):
+            merged[key] = value
+            from_structured += 1
+    from_llm = sum(1 for key, value in merged.items()
+                   if key != 'confidence_score' and has_value(value)) - from_structured
+    scores = [(structured.confidence_score, from_structured), (extracted.confidence_score, from_llm)]
+    scores = [(score, count) for score, count in scores if score is not None and count]
+    if scores:
+        merged['confidence_score'] = round(
+            sum(score * count for score, count in scores) / sum(count for _, count in scores), 2
+        )
+    return ProductData(**merged)
+
+
+def rank_results(results: List[ProductData], search_ranks: Dict[int, Tuple[int, int]]) -> List[ProductData]:
+    """Interleave sites by (search rank, site position) and fold duplicate listings into the first listing"""
+    order = sorted(range(len(results)), key=lambda index: search_ranks.get(index, (index, 0)))
+    first_listings = {results[index].url: results[index] for index in order
+                      if results[index].url and not results[index].duplicate_of}
+    ranked = []
+    for index in order:
+        product_data = results[index]
+        first = first_listings.get(product_data.duplicate_of) if product_data.duplicate_of else None
+        if first is None:
+            ranked.append(product_data)
+            continue
+        listing = {key: getattr(product_data, key) for key in ('url', 'price', 'availability', 'condition', 'seller')
+                   if has_value(getattr(product_data, key))}
+        first.listings = (first.listings or []) + [listing]
+    return ranked
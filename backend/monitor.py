@@ -0,0 +1,126 @@
+"""
+Change detection for re-scraped product pages (price and stock monitoring)
+"""
+
+import difflib
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from cache import CacheBackend
+
+# Fields whose changes are reported, and the only ones a targeted re-extract asks for
+DEFAULT_MONITOR_FIELDS = ('price', 'availability', 'price_breaks')
+
+# Monitor states of a product: first seen, monitored fields changed, or nothing to report
+NEW, CHANGED, UNCHANGED = 'new', 'changed', 'unchanged'
+
+
+def fingerprint(clean_text: str) -> str:
+    """Hash of the cleaned text, ignoring whitespace differences"""
+    return hashlib.sha256(' '.join(clean_text.split()).encode('utf-8')).hexdigest()
+
+
+@dataclass
+class TextChange:
+    changed_chars: int
+    # Changed and inserted lines of the new text, with a line of context on each side
+    excerpt: str
+
+    @property
+    def unchanged(self) -> bool:
+        return self.changed_chars == 0
+
+
+def compare_text(old_lines: List[str], new_text: str, context: int = 1) -> TextChange:
+    """Line diff of a page's previous cleaned text against its new one"""
+    new_lines = new_text.split('\n')
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    changed_chars = 0
+    keep = set()
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        changed_chars += sum(len(line) for line in old_lines[old_start:old_end])
+        changed_chars += sum(len(line) for line in new_lines[new_start:new_end])
+        keep.update(range(max(0, new_start - context), min(len(new_lines), new_end + context)))
+    return TextChange(changed_chars, '\n'.join(new_lines[index] for index in sorted(keep)))
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return ' '.join(value.split()).lower() or None
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True).lower() if value else None
+    return value
+
+
+def diff_fields(old: Dict[str, Any], new: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+    """{field: {'old', 'new'}} for the fields whose values differ beyond case and whitespace"""
+    return {
+        field: {'old': old.get(field), 'new': new.get(field)}
+        for field in fields if _normalize(old.get(field)) != _normalize(new.get(field))
+    }
+
+
+@dataclass
+class Snapshot:
+    fingerprint: str
+    lines: List[str]
+    product: Dict[str, Any]
+    checked_at: float
+    changed_at: float
+
+
+class MonitorStore:
+    """Last cleaned text and extracted product of each URL, for skipping unchanged pages
+
+    Snapshots live in a cache backend (give it no TTL). A page whose text is
+    unchanged needs no LLM call; one whose diff is at most max_diff_chars only
+    has the monitored fields re-extracted from the changed lines.
+    """
+    def __init__(self, backend: CacheBackend, fields: Sequence[str] = DEFAULT_MONITOR_FIELDS,
+                 max_diff_chars: int = 800):
+        self.backend = backend
+        self.fields = tuple(fields)
+        self.max_diff_chars = max_diff_chars
+        self.checks: Dict[str, int] = {'new': 0, 'unchanged': 0, 'targeted': 0, 'full': 0}
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[Snapshot]:
+        value = self.backend.get(f'monitor:{url}')
+        return Snapshot(**value) if value is not None else None
+
+    def compare(self, snapshot: Snapshot, clean_text: str) -> TextChange:
+        if fingerprint(clean_text) == snapshot.fingerprint:
+            return TextChange(0, '')
+        return compare_text(snapshot.lines, clean_text)
+
+    def count(self, check: str):
+        """Record how a page was handled: new, unchanged, targeted or full"""
+        with self._lock:
+            self.checks[check] += 1
+
+    def record(self, url: str, clean_text: str, product: Dict[str, Any],
+               previous: Optional[Snapshot] = None) -> Tuple[str, Dict[str, Dict[str, Any]]]:
+        """Save the page's new snapshot; return its monitor state and the changed fields"""
+        now = time.time()
+        changes = diff_fields(previous.product, product, self.fields) if previous is not None else {}
+        state = NEW if previous is None else CHANGED if changes else UNCHANGED
+        snapshot = Snapshot(
+            fingerprint=fingerprint(clean_text),
+            lines=clean_text.split('\n'),
+            product=product,
+            checked_at=now,
+            changed_at=previous.changed_at if state == UNCHANGED else now
+        )
+        self.backend.set(f'monitor:{url}', asdict(snapshot))
+        return state, changes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            checks = dict(self.checks)
+        return {**self.backend.stats(), 'fields': list(self.fields), 'checks': checks}
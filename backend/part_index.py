@@ -0,0 +1,107 @@
+"""
+Cross-site product identity from normalized manufacturer part numbers
+"""
+
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from broker import Broker
+
+# Legal-form words dropped from manufacturer names
+COMPANY_SUFFIXES = re.compile(
+    r'\b(?:inc|incorporated|corp|corporation|co|company|ltd|limited|llc|gmbh|ag|plc|sa|bv|nv|kg|srl|oy|ab)\b'
+)
+
+# Common short and former names of electronics/automation manufacturers
+MANUFACTURER_ALIASES = {
+    'ti': 'texas instruments',
+    'st': 'stmicroelectronics',
+    'st microelectronics': 'stmicroelectronics',
+    'stmicro': 'stmicroelectronics',
+    'on semi': 'onsemi',
+    'on semiconductor': 'onsemi',
+    'adi': 'analog devices',
+    'maxim': 'analog devices',
+    'maxim integrated': 'analog devices',
+    'linear technology': 'analog devices',
+    'nxp semiconductors': 'nxp',
+    'freescale': 'nxp',
+    'microchip technology': 'microchip',
+    'atmel': 'microchip',
+    'infineon technologies': 'infineon',
+    'allen bradley': 'rockwell automation',
+    'ab': 'rockwell automation',
+    'te': 'te connectivity',
+    'vishay intertechnology': 'vishay',
+}
+
+# Part numbers shorter than this (after normalization) are too ambiguous to merge on
+MIN_PART_NUMBER_LENGTH = 4
+
+
+def normalize_part_number(part_number: Optional[str]) -> Optional[str]:
+    """Upper-case part number without spaces or punctuation, e.g. 'lm317-t' -> 'LM317T'"""
+    if not part_number:
+        return None
+    normalized = re.sub(r'[^A-Z0-9]', '', str(part_number).upper())
+    return normalized if len(normalized) >= MIN_PART_NUMBER_LENGTH else None
+
+
+def normalize_manufacturer(manufacturer: Optional[str]) -> Optional[str]:
+    if not manufacturer:
+        return None
+    name = ' '.join(re.sub(r'[^a-z0-9]+', ' ', str(manufacturer).lower()).split())
+    # Aliases are looked up before suffixes are stripped too, as 'ab' (Allen-Bradley) is one
+    if name in MANUFACTURER_ALIASES:
+        return MANUFACTURER_ALIASES[name]
+    name = ' '.join(COMPANY_SUFFIXES.sub(' ', name).split())
+    name = MANUFACTURER_ALIASES.get(name, name)
+    return name or None
+
+
+class PartIndex:
+    """First listing seen for each (manufacturer, part number) during one search
+
+    A listing is a duplicate of an earlier one with the same normalized part number
+    unless both name a manufacturer and the names differ, so a listing that omits
+    the manufacturer still matches. With a shared broker the listings live there
+    under scope (the job id), so scrape workers see each other's claims; each
+    claim is then a blocking broker call.
+    """
+    def __init__(self, shared: Optional[Broker] = None, scope: str = '', ttl: float = 3600):
+        self.shared = shared
+        self.scope = scope
+        self.ttl = ttl
+        self._listings: Dict[str, List[Tuple[Optional[str], str]]] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, part_number: Optional[str], manufacturer: Optional[str], url: str) -> Optional[str]:
+        """Register url for the part; return the URL of the earlier listing if it is a duplicate"""
+        part = normalize_part_number(part_number)
+        if part is None:
+            return None
+        maker = normalize_manufacturer(manufacturer)
+        if self.shared is not None:
+            return self.shared.update_value(
+                f'parts:{self.scope}:{part}', lambda listings: self._claim(listings or [], maker, url), self.ttl
+            )
+        with self._lock:
+            self._listings[part], duplicate_of = self._claim(self._listings.get(part, []), maker, url)
+        return duplicate_of
+
+    @staticmethod
+    def _claim(listings: List[Tuple[Optional[str], str]], maker: Optional[str],
+               url: str) -> Tuple[List[Tuple[Optional[str], str]], Optional[str]]:
+        """(listings with url added unless it is a duplicate, URL of the listing it duplicates)"""
+        for listed_maker, listed_url in listings:
+            if listed_url == url:
+                return listings, None
+            if listed_maker is None or maker is None or listed_maker == maker:
+                return listings, listed_url
+        return listings + [(maker, url)], None
+
+    def __len__(self) -> int:
+        """Listings claimed through this index when it is not shared"""
+        with self._lock:
+            return sum(len(listings) for listings in self._listings.values())
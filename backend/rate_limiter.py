@@ -0,0 +1,207 @@
+"""
+Per-domain rate limiting for scraper navigations (token buckets with adaptive backoff)
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+import time
+import urllib.request
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+from urllib.robotparser import RobotFileParser
+from urllib.parse import urlparse
+
+from broker import Broker
+
+logger = logging.getLogger(__name__)
+
+# Built-in request rates (requests/second, burst) per site; unknown sites use the default
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    'ebay': (1.0, 2),
+    'digikey': (0.5, 2),
+    'mouser': (0.5, 2),
+    'rs-online': (0.5, 2),
+    'radwell': (0.5, 1),
+    'farnell': (0.5, 2),
+}
+
+
+@dataclass
+class TokenBucket:
+    rate: float
+    burst: int
+    base_rate: float = 0.0
+    tokens: float = 0.0
+    updated: float = 0.0
+    cooldown_until: float = 0.0
+
+    def __post_init__(self):
+        self.base_rate = self.base_rate or self.rate
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Take a token and return how long the caller must wait before using it"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+        return max(wait, self.cooldown_until - now)
+
+
+class DomainRateLimiter:
+    """Process-wide politeness scheduler shared by every scrape job
+
+    Each domain gets a token bucket. 429/503 responses halve the domain's rate and
+    pause it (honouring Retry-After); successful responses slowly restore the rate.
+    A robots.txt Crawl-delay, when stricter than the configured rate, wins.
+
+    With a shared broker the schedule itself lives in the broker, so every
+    process scraping a domain shares its rate and 429/503 pauses; this process's
+    bucket still supplies the (adapted) rate.
+    """
+    def __init__(self, rate_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+                 default_rate: Tuple[float, int] = (1.0, 2), respect_robots: bool = True,
+                 user_agent: str = '*', min_rate: float = 0.05, backoff: float = 30.0,
+                 shared: Optional[Broker] = None):
+        self.rate_limits = dict(DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits)
+        self.default_rate = default_rate
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.min_rate = min_rate
+        self.backoff = backoff
+        self.shared = shared
+        self.throttled = 0
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._robots: Dict[str, concurrent.futures.Future] = {}
+        self._robots_executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix='robots')
+        # Pauses are shared from their own thread so a slow broker never blocks the event loop
+        self._share_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='rate-share')
+        self._lock = threading.Lock()
+
+    def _configured_rate(self, domain: str) -> Tuple[float, int]:
+        for site, rate in self.rate_limits.items():
+            if site in domain:
+                return rate
+        return self.default_rate
+
+    def _bucket(self, domain: str) -> TokenBucket:
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            rate, burst = self._configured_rate(domain)
+            bucket = self._buckets.setdefault(domain, TokenBucket(rate=rate, burst=max(1, burst)))
+        return bucket
+
+    async def acquire(self, url: str):
+        """Wait until a navigation to url is allowed"""
+        parsed = urlparse(url)
+        domain = parsed.netloc.lower()
+        if not domain:
+            return
+        if self.respect_robots:
+            await self._apply_crawl_delay(parsed.scheme or 'https', domain)
+        with self._lock:
+            bucket = self._bucket(domain)
+            if self.shared is None:
+                wait = bucket.reserve()
+            else:
+                rate, burst = bucket.rate, bucket.burst
+                cooldown = bucket.cooldown_until - time.monotonic()
+        if self.shared is not None:
+            try:
+                wait = await asyncio.get_running_loop().run_in_executor(
+                    None, self.shared.reserve_rate, domain, rate, burst
+                )
+            except Exception as e:
+                logger.warning(f"Shared rate limit unavailable for {domain}, using the local one: {e}")
+                with self._lock:
+                    wait = bucket.reserve()
+            wait = max(wait, cooldown)
+        if wait > 0:
+            logger.debug(f"Rate limiting {domain} for {wait:.2f}s")
+            await asyncio.sleep(wait)
+
+    def record_response(self, url: str, status: int, retry_after: Optional[str] = None):
+        """Adapt a domain's rate to the response it just gave"""
+        domain = urlparse(url).netloc.lower()
+        if not domain:
+            return
+        with self._lock:
+            bucket = self._bucket(domain)
+            if status in (429, 503):
+                self.throttled += 1
+                bucket.rate = max(self.min_rate, bucket.rate / 2)
+                pause = self._parse_retry_after(retry_after) or self.backoff
+                bucket.cooldown_until = max(bucket.cooldown_until, time.monotonic() + pause)
+                if self.shared is not None:
+                    self._share_executor.submit(self._share_pause, domain, pause)
+                logger.warning(f"{domain} returned {status}, slowing to {bucket.rate:.2f} req/s "
+                               f"and pausing {pause:.0f}s")
+            elif status < 400 and bucket.rate < bucket.base_rate:
+                bucket.rate = min(bucket.base_rate, bucket.rate * 1.1)
+
+    def _share_pause(self, domain: str, pause: float):
+        try:
+            self.shared.pause_domain(domain, pause)
+        except Exception as e:
+            logger.warning(f"Could not share the pause of {domain}: {e}")
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    async def _apply_crawl_delay(self, scheme: str, domain: str):
+        """Fetch robots.txt once per domain and slow the bucket to its Crawl-delay"""
+        with self._lock:
+            future = self._robots.get(domain)
+            if future is None:
+                future = self._robots_executor.submit(self._fetch_crawl_delay, f'{scheme}://{domain}/robots.txt')
+                self._robots[domain] = future
+        crawl_delay = await asyncio.shield(asyncio.wrap_future(future))
+        if crawl_delay:
+            with self._lock:
+                bucket = self._bucket(domain)
+                robots_rate = 1.0 / crawl_delay
+                if robots_rate < bucket.base_rate:
+                    bucket.base_rate = robots_rate
+                    bucket.rate = min(bucket.rate, robots_rate)
+                    bucket.burst = 1
+                    bucket.tokens = min(bucket.tokens, 1.0)
+
+    def _fetch_crawl_delay(self, robots_url: str) -> Optional[float]:
+        try:
+            request = urllib.request.Request(robots_url, headers={'User-Agent': 'Mozilla/5.0'})
+            with urllib.request.urlopen(request, timeout=10) as response:
+                lines = response.read().decode('utf-8', errors='replace').splitlines()
+            parser = RobotFileParser()
+            parser.parse(lines)
+            delay = parser.crawl_delay(self.user_agent)
+            if delay is None:
+                request_rate = parser.request_rate(self.user_agent)
+                if request_rate and request_rate.requests:
+                    delay = request_rate.seconds / request_rate.requests
+            return float(delay) if delay else None
+        except Exception as e:
+            logger.debug(f"Could not read {robots_url}: {e}")
+            return None
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                domain: {'rate': round(bucket.rate, 3), 'base_rate': round(bucket.base_rate, 3),
+                         'cooling_down': bucket.cooldown_until > time.monotonic()}
+                for domain, bucket in self._buckets.items()
+            }
@@ -0,0 +1,145 @@
+"""
+Scrape worker tasks: searches and product pages taken from the shared broker
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import time
+from dataclasses import asdict
+from typing import Any, Callable, Dict, Optional
+
+from broker import PRODUCT_QUEUE, TASK_QUEUES, Broker
+from models import ProductData, SearchConfig
+from part_index import PartIndex
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeWorker:
+    """Runs search and product page tasks from the broker (started by worker.py)
+
+    A search task reports each results page to the job's dispatcher and queues
+    one product task per URL, so a single search spreads across every worker.
+    A task taken by a worker that dies is lost; its job then times out.
+    create_scraper(api_key, concurrency) builds the UniversalScraper a task runs on.
+    """
+    def __init__(self, broker: Broker, create_scraper: Callable[[str, int], Any], concurrency: int = 4,
+                 poll_interval: float = 1.0, reply_ttl: float = 3600):
+        self.broker = broker
+        self.create_scraper = create_scraper
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.reply_ttl = reply_ttl
+        self.completed = 0
+        self._stopping = False
+        # Broker writes run off the event loop on one thread, so they still arrive in order
+        self._sender = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='broker-send')
+
+    def stop(self):
+        """Stop taking tasks; run() returns once the running ones finish"""
+        self._stopping = True
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        active = set()
+        while not self._stopping:
+            if len(active) >= self.concurrency:
+                _, active = await asyncio.wait(active, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            try:
+                popped = await loop.run_in_executor(None, self.broker.pop, TASK_QUEUES, self.poll_interval)
+            except Exception as e:
+                logger.error(f"Error reading tasks from the broker: {e}")
+                await asyncio.sleep(self.poll_interval)
+                continue
+            if popped is not None:
+                active.add(asyncio.create_task(self._handle(popped[1])))
+            active = {task for task in active if not task.done()}
+        if active:
+            await asyncio.gather(*active, return_exceptions=True)
+
+    def _send(self, queue: str, message: Dict[str, Any], ttl: Optional[float] = None) -> asyncio.Future:
+        return asyncio.get_running_loop().run_in_executor(
+            self._sender, lambda: self.broker.push(queue, message, ttl=ttl)
+        )
+
+    def _reply(self, task: Dict[str, Any], event: str, **data) -> asyncio.Future:
+        # Replies outlive a dispatcher that went away only as long as its jobs would
+        return self._send(task['reply_to'], {'job_id': task['job_id'], 'event': event, **data}, ttl=self.reply_ttl)
+
+    @staticmethod
+    def _log_send_error(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Error sending to the broker: {future.exception()}")
+
+    async def _handle(self, task: Dict[str, Any]):
+        remaining = task.get('deadline', 0) - time.time()
+        if remaining <= 0:
+            logger.info(f"Dropping {task.get('kind')} task of expired job {task.get('job_id')}")
+            return
+        try:
+            if task['kind'] == 'search':
+                await self._search(task, remaining)
+            elif task['kind'] == 'product':
+                await self._product(task, remaining)
+            else:
+                logger.error(f"Unknown task kind: {task['kind']}")
+        except Exception as e:
+            logger.error(f"Error running {task.get('kind')} task of job {task.get('job_id')}: {e}")
+        self.completed += 1
+
+    async def _search(self, task: Dict[str, Any], remaining: float):
+        config = SearchConfig(**task['config'])
+        scraper = self.create_scraper(task['api_key'], task['concurrency'])
+        total, error = 0, None
+        try:
+            async with asyncio.timeout(remaining):
+                async with scraper:
+                    product_urls = scraper.search_product_urls(
+                        config,
+                        on_search=lambda urls: self._reply(task, 'search', urls=urls).add_done_callback(
+                            self._log_send_error
+                        )
+                    )
+                    try:
+                        async for index, url in product_urls:
+                            await self._send(PRODUCT_QUEUE, {
+                                'kind': 'product',
+                                'job_id': task['job_id'],
+                                'reply_to': task['reply_to'],
+                                'deadline': task['deadline'],
+                                'api_key': task['api_key'],
+                                'config': task['config'],
+                                'index': index,
+                                'url': url,
+                                'rank': scraper.search_ranks[index]
+                            })
+                            total = index + 1
+                    finally:
+                        await product_urls.aclose()
+        except asyncio.TimeoutError:
+            error = 'Scraping operation timed out'
+        except Exception as e:
+            logger.error(f"Error searching for {config.search_term}: {e}")
+            error = str(e)
+        await self._reply(task, 'searched', total=total, error=error, timings=scraper.timings.to_dict())
+
+    async def _product(self, task: Dict[str, Any], remaining: float):
+        url = task['url']
+        scraper = self.create_scraper(task['api_key'], 1)
+        # Every worker claims the job's part numbers in one index in the broker,
+        # so a listing of a part another site already had skips the LLM here too
+        part_index = PartIndex(shared=self.broker, scope=task['job_id'], ttl=remaining)
+        try:
+            async with asyncio.timeout(remaining):
+                async with scraper:
+                    # The search's config decides the fields, dedupe and monitoring of each of its products
+                    [product_data] = await scraper.scrape_urls(SearchConfig(**task['config']), [url],
+                                                               part_index=part_index)
+        except Exception as e:
+            logger.error(f"Error scraping {url}: {e}")
+            product_data = ProductData()
+        product_data.url = url
+        await self._reply(task, 'result', index=task['index'], url=url, rank=task['rank'],
+                          data=asdict(product_data), timings=scraper.timings.to_dict())
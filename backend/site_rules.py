@@ -0,0 +1,314 @@
+"""
+Per-site scraping rules (search URLs, result links, field selectors) and selector learning
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, quote, urlencode, urljoin, urlparse, urlunparse
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    HTML_PARSER = 'lxml'
+except ImportError:
+    lxml = None
+    HTML_PARSER = 'html.parser'
+
+logger = logging.getLogger(__name__)
+
+# Fields whose values are short enough to find verbatim in the page
+LEARNABLE_FIELDS = ['product_name', 'price', 'condition', 'country', 'seller',
+                    'part_number', 'manufacturer', 'availability']
+TABLE_FIELDS = {'specifications', 'price_breaks'}
+
+# Query parameters that only track the click, never select the product
+TRACKING_PARAMS = frozenset([
+    'gclid', 'fbclid', 'msclkid', 'dclid', 'yclid', 'srsltid', 'spm', 'ref', 'ref_',
+    '_trksid', '_trkparms', '_from', 'hash', 'mkevt', 'mkcid', 'mkrid', 'campid',
+    'toolid', 'customid', 'itmmeta', 'amdata', 'epid', 'qid', 'sr'
+])
+# Parameters that pick a variant of the same product; ignored when deduplicating
+VARIANT_PARAMS = frozenset(['var', 'variant', 'variation'])
+
+# Class names that are generated or state-dependent make poor selectors
+UNSTABLE_CLASS = re.compile(r'\d{3,}|^(?:active|selected|hover|focus|open|hidden|visible|is-|js-)')
+
+
+class SiteRuleRegistry:
+    """Site rules keyed by domain substring, loaded from JSON or YAML
+
+    Every key contained in a URL's domain applies, more specific (longer) keys
+    overriding shorter ones, on top of the 'default' rule. Rules have:
+
+        context        site description given to the LLM
+        search_url     template with {query}, {origin} and {website_url}
+        result_links   selectors for product links on search result pages
+        next_page      selectors for the link to the next search results page
+        product_id     regex whose first group identifies a product in a URL path
+        fields         ProductData field -> {"css" or "xpath", optional "attr",
+                       optional "type": "table"}
+
+    In learning mode, selectors proposed from LLM results are counted per host and
+    a field's selector is adopted (and saved to learned_path) once it has been
+    confirmed on min_confirmations pages.
+    """
+    def __init__(self, rules: Dict[str, Dict[str, Any]], learned_path: Optional[str] = None,
+                 learning: bool = False, min_confirmations: int = 3):
+        if 'default' not in rules:
+            raise ValueError("Site rules need a 'default' entry")
+        self.rules = rules
+        self.learned_path = learned_path
+        self.learning = learning
+        self.min_confirmations = max(1, min_confirmations)
+        self.learned: Dict[str, Dict[str, Dict[str, str]]] = {}
+        self._proposals: Dict[str, Counter] = {}
+        self._lock = threading.Lock()
+        if learned_path and os.path.exists(learned_path):
+            with open(learned_path, encoding='utf-8') as f:
+                self.learned = json.load(f)
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'SiteRuleRegistry':
+        with open(path, encoding='utf-8') as f:
+            if path.endswith(('.yaml', '.yml')):
+                try:
+                    import yaml
+                except ImportError:
+                    raise ImportError("PyYAML is required for YAML site rules") from None
+                rules = yaml.safe_load(f)
+            else:
+                rules = json.load(f)
+        return cls(rules, **kwargs)
+
+    def rule_for(self, url: str) -> Dict[str, Any]:
+        domain = urlparse(url).netloc.lower()
+        rule = dict(self.rules['default'])
+        matches = sorted((site for site in self.rules if site != 'default' and site in domain), key=len)
+        for site in matches:
+            site_rule = self.rules[site]
+            fields = {**rule.get('fields', {}), **site_rule.get('fields', {})}
+            rule.update(site_rule)
+            rule['fields'] = fields
+        return rule
+
+    def site_context(self, url: str) -> str:
+        return self.rule_for(url).get('context', 'General e-commerce site')
+
+    def search_url(self, website_url: str, search_term: str) -> str:
+        parsed = urlparse(website_url)
+        return self.rule_for(website_url)['search_url'].format(
+            query=quote(search_term),
+            origin=f"{parsed.scheme}://{parsed.netloc}",
+            website_url=website_url.rstrip('/')
+        )
+
+    def result_link_selectors(self, url: str) -> List[str]:
+        return list(self.rule_for(url).get('result_links', []))
+
+    def next_page_selectors(self, url: str) -> List[str]:
+        return list(self.rule_for(url).get('next_page', []))
+
+    def product_key(self, url: str) -> str:
+        """Identity of the product behind a normalized URL, used to drop duplicate results
+
+        A rule's product_id regex (first group) identifies products on that site;
+        otherwise the URL without variant parameters or a trailing slash is used.
+        """
+        parsed = urlparse(url)
+        pattern = self.rule_for(url).get('product_id')
+        if pattern:
+            match = re.search(pattern, parsed.path)
+            if match:
+                return f"{parsed.netloc}:{match.group(1)}"
+        query = [(key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+                 if key.lower() not in VARIANT_PARAMS]
+        return urlunparse(parsed._replace(path=parsed.path.rstrip('/'), query=urlencode(query)))
+
+    def field_rules(self, url: str) -> Dict[str, Dict[str, str]]:
+        """Configured field selectors, plus learned ones for fields without a rule"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            learned = dict(self.learned.get(host, {}))
+        return {**learned, **self.rule_for(url).get('fields', {})}
+
+    def record_proposals(self, url: str, proposals: Dict[str, str]) -> List[str]:
+        """Count selectors that located LLM values; return the fields newly learned"""
+        host = urlparse(url).netloc.lower()
+        adopted = []
+        with self._lock:
+            counts = self._proposals.setdefault(host, Counter())
+            learned = self.learned.setdefault(host, {})
+            for field_name, selector in proposals.items():
+                counts[(field_name, selector)] += 1
+                if field_name in learned or counts[(field_name, selector)] < self.min_confirmations:
+                    continue
+                learned[field_name] = {'css': selector}
+                adopted.append(field_name)
+            if adopted:
+                logger.info(f"Learned selectors for {host}: " +
+                            ", ".join(f"{name}={learned[name]['css']}" for name in adopted))
+                self._save_learned()
+        return adopted
+
+    def _save_learned(self):
+        if not self.learned_path:
+            return
+        temp_path = f"{self.learned_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.learned, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.learned_path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'sites': len(self.rules) - 1,
+                'learning': self.learning,
+                'learned_fields': {host: sorted(fields) for host, fields in self.learned.items() if fields}
+            }
+
+
+def normalize_url(href: str, base_url: str) -> Optional[str]:
+    """Absolute http(s) URL without fragment, default port or tracking parameters"""
+    parsed = urlparse(urljoin(base_url, href.strip()))
+    if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+        return None
+    netloc = parsed.netloc.lower()
+    if (parsed.scheme, parsed.port) in (('http', 80), ('https', 443)):
+        netloc = netloc.rsplit(':', 1)[0]
+    query = [(key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+             if key.lower() not in TRACKING_PARAMS and not key.lower().startswith('utm_')]
+    return urlunparse(parsed._replace(netloc=netloc, query=urlencode(query), fragment=''))
+
+
+def _node_text(element) -> str:
+    return element.get_text(' ', strip=True)
+
+
+def _table_rows(element) -> List[List[str]]:
+    rows = []
+    for row in element.find_all('tr'):
+        cells = [_node_text(cell) for cell in row.find_all(['td', 'th'])]
+        if len(cells) >= 2 and all(cells[:2]):
+            rows.append(cells)
+    return rows
+
+
+def _rule_value(field_name: str, element, rule: Dict[str, str]) -> Any:
+    if rule.get('type') == 'table' or field_name in TABLE_FIELDS:
+        rows = _table_rows(element)
+        if field_name == 'price_breaks':
+            breaks = [{'quantity': cells[0], 'price': cells[1]} for cells in rows
+                      if re.search(r'\d', cells[0]) and re.search(r'\d', cells[1])]
+            return breaks or None
+        return {cells[0]: cells[1] for cells in rows} or None
+    if rule.get('attr'):
+        return element.get(rule['attr']) or None
+    return _node_text(element) or None
+
+
+def apply_field_rules(html_content: str, field_rules: Dict[str, Dict[str, str]]) -> Dict[str, Any]:
+    """ProductData values located by CSS/XPath field rules; module-level for pool workers"""
+    if not field_rules:
+        return {}
+    data: Dict[str, Any] = {}
+    soup = None
+    tree = None
+    for field_name, rule in field_rules.items():
+        try:
+            if 'css' in rule:
+                if soup is None:
+                    soup = BeautifulSoup(html_content, HTML_PARSER)
+                element = soup.select_one(rule['css'])
+                value = _rule_value(field_name, element, rule) if element is not None else None
+            elif 'xpath' in rule and lxml is not None:
+                if tree is None:
+                    tree = lxml.html.fromstring(html_content)
+                found = tree.xpath(rule['xpath'])
+                if not found:
+                    value = None
+                elif isinstance(found[0], str):
+                    value = found[0].strip() or None
+                else:
+                    # Re-parse the matched node so table and attribute rules work the same way
+                    fragment = BeautifulSoup(lxml.html.tostring(found[0], encoding='unicode'), HTML_PARSER)
+                    element = fragment.find(found[0].tag)
+                    value = _rule_value(field_name, element, rule) if element is not None else None
+            else:
+                continue
+        except Exception as e:
+            logger.warning(f"Site rule for {field_name} failed: {e}")
+            continue
+        if value:
+            data[field_name] = value
+    return data
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.split()).casefold()
+
+
+def _simple_selector(element) -> Optional[str]:
+    if element.get('id') and not UNSTABLE_CLASS.search(element['id']):
+        return f"#{element['id']}" if re.fullmatch(r'[A-Za-z][\w-]*', element['id']) else None
+    for attribute in ('itemprop', 'data-testid'):
+        if element.get(attribute):
+            return f'{element.name}[{attribute}="{element[attribute]}"]'
+    classes = [c for c in element.get('class', []) if not UNSTABLE_CLASS.search(c)
+               and re.fullmatch(r'-?[A-Za-z_][\w-]*', c)]
+    return element.name + ''.join(f'.{c}' for c in classes[:2])
+
+
+def _unique_selector(soup: BeautifulSoup, element, max_depth: int = 3) -> Optional[str]:
+    """Shortest selector (up to max_depth ancestors) whose first match is element"""
+    parts = []
+    node = element
+    for _ in range(max_depth):
+        part = _simple_selector(node)
+        if part is None:
+            return None
+        parts.insert(0, part)
+        selector = ' > '.join(parts)
+        if soup.select_one(selector) is element:
+            return selector
+        node = node.parent
+        if node is None or node.name in (None, '[document]', 'html', 'body'):
+            return None
+    return None
+
+
+def propose_selectors(html_content: str, values: Dict[str, Any]) -> Dict[str, str]:
+    """Selectors for the elements whose text equals extracted values; module-level for pool workers"""
+    targets = {name: _normalize(str(value)) for name, value in values.items()
+               if name in LEARNABLE_FIELDS and isinstance(value, (str, int, float)) and str(value).strip()}
+    if not targets:
+        return {}
+    soup = BeautifulSoup(html_content, HTML_PARSER)
+    for tag in soup(['script', 'style', 'noscript', 'template']):
+        tag.decompose()
+    proposals = {}
+    # Climb from each text node to the first element whose whole text is the value
+    for string in soup.find_all(string=True):
+        fragment = _normalize(string)
+        if not fragment:
+            continue
+        for field_name, target in targets.items():
+            if field_name in proposals or fragment not in target:
+                continue
+            node = string.parent
+            while node is not None and node.name not in ('[document]', 'html', 'body'):
+                text = _normalize(_node_text(node))
+                if text == target:
+                    selector = _unique_selector(soup, node)
+                    if selector:
+                        proposals[field_name] = selector
+                    break
+                if len(text) > len(target):
+                    break
+                node = node.parent
+    return proposals
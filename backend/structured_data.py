@@ -0,0 +1,248 @@
+"""
+Deterministic product extraction from embedded metadata (JSON-LD, microdata, OpenGraph)
+"""
+
+import json
+import logging
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+logger = logging.getLogger(__name__)
+
+# How much each source is trusted; a result's confidence is the average over its fields
+SOURCE_CONFIDENCE = {'json-ld': 0.95, 'microdata': 0.9, 'opengraph': 0.7}
+
+JSON_LD_PATTERN = re.compile(
+    r'<script[^>]+type\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script>',
+    re.IGNORECASE | re.DOTALL
+)
+MICRODATA_PATTERN = re.compile(r'itemtype\s*=\s*["\']?https?://schema\.org/Product', re.IGNORECASE)
+OPENGRAPH_PATTERN = re.compile(r'property\s*=\s*["\'](?:og|product):', re.IGNORECASE)
+
+CURRENCY_SYMBOLS = {'USD': '$', 'EUR': '€', 'GBP': '£', 'JPY': '¥', 'INR': '₹'}
+
+AVAILABILITY = {
+    'instock': 'In stock', 'outofstock': 'Out of stock', 'preorder': 'Pre-order',
+    'backorder': 'Backorder', 'limitedavailability': 'Limited availability',
+    'discontinued': 'Discontinued', 'soldout': 'Sold out', 'instoreonly': 'In store only',
+    'onlineonly': 'In stock', 'madetoorder': 'Made to order', 'presale': 'Pre-order'
+}
+
+CONDITION = {
+    'newcondition': 'New', 'new': 'New', 'usedcondition': 'Used', 'used': 'Used',
+    'refurbishedcondition': 'Refurbished', 'refurbished': 'Refurbished',
+    'damagedcondition': 'Damaged', 'damaged': 'Damaged'
+}
+
+
+def _first(value: Any) -> Any:
+    return value[0] if isinstance(value, list) and value else value
+
+
+def _text(value: Any) -> Optional[str]:
+    """Plain string from a literal or a schema.org Thing with a name"""
+    value = _first(value)
+    if isinstance(value, dict):
+        value = value.get('name') or value.get('@id')
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _enum(value: Any, labels: Dict[str, str]) -> Optional[str]:
+    """Map a schema.org enumeration URL (e.g. https://schema.org/InStock) to a label"""
+    value = _text(value)
+    if value is None:
+        return None
+    key = value.rstrip('/').rsplit('/', 1)[-1].replace(' ', '').lower()
+    return labels.get(key, value)
+
+
+def format_price(amount: Any, currency: Optional[str] = None) -> Optional[str]:
+    amount = _text(amount)
+    if amount is None:
+        return None
+    currency = (_text(currency) or '').upper()
+    symbol = CURRENCY_SYMBOLS.get(currency)
+    if symbol:
+        return f"{symbol}{amount}"
+    return f"{amount} {currency}" if currency else amount
+
+
+def _iter_json_ld_nodes(node: Any) -> Iterator[Dict[str, Any]]:
+    if isinstance(node, list):
+        for item in node:
+            yield from _iter_json_ld_nodes(item)
+    elif isinstance(node, dict):
+        yield node
+        for key in ('@graph', 'mainEntity', 'itemOffered'):
+            if key in node:
+                yield from _iter_json_ld_nodes(node[key])
+
+
+def _is_type(node: Dict[str, Any], type_name: str) -> bool:
+    types = node.get('@type')
+    types = types if isinstance(types, list) else [types]
+    return any(isinstance(t, str) and t.rsplit('/', 1)[-1] == type_name for t in types)
+
+
+def _offer_fields(offers: Any) -> Dict[str, Any]:
+    offers = [offer for offer in (offers if isinstance(offers, list) else [offers]) if isinstance(offer, dict)]
+    if not offers:
+        return {}
+    offer = offers[0]
+    currency = offer.get('priceCurrency')
+    price = offer.get('price', offer.get('lowPrice'))
+    price_breaks = []
+    specifications = offer.get('priceSpecification')
+    for spec in specifications if isinstance(specifications, list) else []:
+        quantity = spec.get('eligibleQuantity') if isinstance(spec, dict) else None
+        if isinstance(quantity, dict) and spec.get('price') is not None:
+            price_breaks.append({
+                'quantity': _text(quantity.get('minValue', quantity.get('value'))),
+                'price': format_price(spec.get('price'), spec.get('priceCurrency') or currency)
+            })
+    if price is None and price_breaks:
+        price = price_breaks[0]['price']
+        currency = None
+    return {
+        'price': format_price(price, currency) if currency else _text(price),
+        'availability': _enum(offer.get('availability'), AVAILABILITY),
+        'condition': _enum(offer.get('itemCondition'), CONDITION),
+        'seller': _text(offer.get('seller') or offer.get('offeredBy')),
+        'price_breaks': price_breaks or None
+    }
+
+
+def _product_fields(product: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a schema.org Product (as a dict of property -> value) to ProductData fields"""
+    specifications = {}
+    for prop in product.get('additionalProperty') or []:
+        if isinstance(prop, dict) and _text(prop.get('name')) and _text(prop.get('value')):
+            specifications[_text(prop['name'])] = _text(prop['value'])
+    data = {
+        'product_name': _text(product.get('name')),
+        'part_number': _text(product.get('mpn') or product.get('model')),
+        'manufacturer': _text(product.get('manufacturer') or product.get('brand')),
+        'country': _text(product.get('countryOfOrigin')),
+        'condition': _enum(product.get('itemCondition'), CONDITION),
+        'specifications': specifications or None
+    }
+    for key, value in _offer_fields(product.get('offers')).items():
+        if value is not None:
+            data[key] = value
+    return data
+
+
+def extract_json_ld(html_content: str) -> Dict[str, Any]:
+    for block in JSON_LD_PATTERN.findall(html_content):
+        try:
+            document = json.loads(block.strip(), strict=False)
+        except ValueError:
+            continue
+        for node in _iter_json_ld_nodes(document):
+            if _is_type(node, 'Product'):
+                return _product_fields(node)
+    return {}
+
+
+def _itemprop_value(element) -> Optional[str]:
+    for attribute in ('content', 'href', 'src', 'value', 'datetime'):
+        if element.get(attribute):
+            return element[attribute]
+    return element.get_text(' ', strip=True)
+
+
+def extract_microdata(soup: BeautifulSoup) -> Dict[str, Any]:
+    scope = soup.find(attrs={'itemtype': re.compile(r'schema\.org/Product$', re.IGNORECASE)})
+    if scope is None:
+        return {}
+    product: Dict[str, Any] = {}
+    offers: Dict[str, Any] = {}
+    for element in scope.find_all(attrs={'itemprop': True}):
+        # Properties of nested items other than offers belong to those items
+        owner = element.find_parent(attrs={'itemscope': True})
+        in_offer = owner is not None and owner is not scope and 'Offer' in (owner.get('itemtype') or '')
+        if owner is not None and owner is not scope and not in_offer:
+            continue
+        target = offers if in_offer else product
+        for name in element['itemprop'].split():
+            if element.has_attr('itemscope'):
+                # Nested item (brand, manufacturer, seller...): keep its name
+                name_element = element.find(attrs={'itemprop': 'name'})
+                value = _itemprop_value(name_element) if name_element is not None else None
+            else:
+                value = _itemprop_value(element)
+            if name not in target and value:
+                target[name] = value
+    if offers:
+        product['offers'] = offers
+    elif 'price' in product:
+        product['offers'] = {key: product[key] for key in ('price', 'priceCurrency', 'availability', 'itemCondition')
+                             if key in product}
+    return _product_fields(product)
+
+
+def extract_opengraph(soup: BeautifulSoup) -> Dict[str, Any]:
+    meta = {}
+    for element in soup.find_all('meta', attrs={'property': True, 'content': True}):
+        meta.setdefault(element['property'].lower(), element['content'].strip())
+    if meta.get('og:type', 'product').split('.')[0] != 'product' and 'product:price:amount' not in meta:
+        return {}
+    amount = meta.get('product:price:amount') or meta.get('og:price:amount')
+    currency = meta.get('product:price:currency') or meta.get('og:price:currency')
+    return {
+        'product_name': meta.get('og:title') or None,
+        'price': format_price(amount, currency),
+        'availability': _enum(meta.get('product:availability') or meta.get('og:availability'), AVAILABILITY),
+        'condition': _enum(meta.get('product:condition'), CONDITION),
+        'manufacturer': meta.get('product:brand') or None,
+        'part_number': meta.get('product:mfr_part_no') or None
+    }
+
+
+def extract_structured_data(html_content: str, wanted: Optional[List[str]] = None) -> Dict[str, Any]:
+    """ProductData fields found in embedded metadata, plus a confidence_score
+
+    Sources are merged in order of trust (JSON-LD, microdata, OpenGraph), each only
+    filling fields the previous ones left empty. The HTML is parsed only when the
+    cheaper sources leave wanted fields missing and the page has the markup.
+    """
+    data: Dict[str, Any] = {}
+    sources: Dict[str, str] = {}
+
+    def merge(source: str, found: Dict[str, Any]):
+        for key, value in found.items():
+            if value not in (None, '', [], {}) and key not in data:
+                data[key] = value
+                sources[key] = source
+
+    def complete() -> bool:
+        return wanted is not None and all(key in data for key in wanted)
+
+    try:
+        merge('json-ld', extract_json_ld(html_content))
+        has_microdata = MICRODATA_PATTERN.search(html_content) is not None
+        has_opengraph = OPENGRAPH_PATTERN.search(html_content) is not None
+        if not complete() and (has_microdata or has_opengraph):
+            soup = BeautifulSoup(html_content, HTML_PARSER)
+            if has_microdata:
+                merge('microdata', extract_microdata(soup))
+            if has_opengraph and not complete():
+                merge('opengraph', extract_opengraph(soup))
+    except Exception as e:
+        logger.warning(f"Structured data extraction failed: {e}")
+    if data:
+        data['confidence_score'] = round(
+            sum(SOURCE_CONFIDENCE[source] for source in sources.values()) / len(sources), 2
+        )
+    return data
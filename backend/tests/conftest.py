@@ -0,0 +1,33 @@
+"""
+Shared fixtures; the backend modules are imported from the directory above, as app.py does
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'benchmarks'))
+
+
+class Clock:
+    """Stands in for time.time and time.monotonic so expiry can be tested without sleeping"""
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(time, 'time', fake)
+    monkeypatch.setattr(time, 'monotonic', fake)
+    return fake
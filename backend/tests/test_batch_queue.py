@@ -0,0 +1,116 @@
+import json
+
+import pytest
+
+from batch_queue import BatchQueue
+
+ITEMS = [
+    {'search_term': 'LM317', 'website_urls': ['https://a.example'], 'max_results': 2},
+    {'search_term': 'NE555', 'website_urls': ['https://a.example', 'https://b.example'], 'max_results': 3},
+]
+
+
+@pytest.fixture
+def open_queue(tmp_path):
+    def make(**kwargs):
+        kwargs.setdefault('retry_delay', 10.0)
+        return BatchQueue(str(tmp_path / 'batches.db'), str(tmp_path / 'out'), **kwargs)
+    return make
+
+
+def read_records(queue, batch_id):
+    return [json.loads(line) for line in b''.join(queue.read_results(batch_id)).decode().splitlines()]
+
+
+def test_items_are_claimed_in_order_and_checkpointed(open_queue):
+    queue = open_queue()
+    batch_id = queue.create_batch(ITEMS, {'extract_fields': ['price']})
+    assert queue.get_batch(batch_id)['status'] == 'queued'
+
+    first = queue.claim()
+    assert (first.search_term, first.status, first.attempts) == ('LM317', 'running', 1)
+    assert queue.complete(first, [{'price': '$1'}, {'price': '$2'}])
+    second = queue.claim()
+    assert second.website_urls == ITEMS[1]['website_urls']
+    assert queue.claim() is None
+    assert queue.complete(second, [{'price': '$3'}])
+
+    batch = queue.get_batch(batch_id)
+    assert batch['status'] == 'completed'
+    assert batch['counts']['done'] == 2 and batch['results'] == 3
+    assert [record['price'] for record in read_records(queue, batch_id)] == ['$1', '$2', '$3']
+
+
+def test_claim_only_from_given_batches(open_queue):
+    queue = open_queue()
+    queue.create_batch(ITEMS[:1], {})
+    other = queue.create_batch(ITEMS[1:], {})
+    assert queue.claim([]) is None
+    assert queue.claim([other]).batch_id == other
+
+
+def test_failures_back_off_then_fail(open_queue, clock):
+    queue = open_queue(max_attempts=2)
+    batch_id = queue.create_batch(ITEMS[:1], {})
+    item = queue.claim()
+    assert queue.fail(item, 'timeout') == 'queued'
+    assert queue.claim() is None
+    assert queue.next_due_in() == pytest.approx(10.0)
+    clock.advance(10)
+    item = queue.claim()
+    assert item.attempts == 2
+    assert queue.fail(item, 'timeout') == 'failed'
+    assert queue.get_batch(batch_id)['status'] == 'completed'
+    assert queue.items(batch_id)[0].error == 'timeout'
+
+    assert queue.retry_failed(batch_id) == 1
+    assert queue.claim().attempts == 1
+
+
+def test_recover_trims_writes_after_the_last_checkpoint(open_queue):
+    queue = open_queue()
+    batch_id = queue.create_batch(ITEMS, {})
+    queue.complete(queue.claim(), [{'price': '$1'}])
+    path = queue.get_batch(batch_id)['output_path']
+    with open(path, 'ab') as f:
+        f.write(b'{"price": "half-writ')
+
+    queue.recover()
+    assert [record['price'] for record in read_records(queue, batch_id)] == ['$1']
+    with open(path, 'rb') as f:
+        assert f.read().endswith(b'}\n')
+
+
+def test_recover_requeues_only_items_whose_lease_expired(open_queue, clock):
+    crashed = open_queue(lease_timeout=60)
+    batch_id = crashed.create_batch(ITEMS, {})
+    lost = crashed.claim()
+    live = open_queue(lease_timeout=60)
+    running = live.claim()
+
+    survivor = open_queue(lease_timeout=60)
+    assert survivor.recover() == 0
+    assert survivor.next_lease_expiry_in() == pytest.approx(60)
+    clock.advance(45)
+    live.heartbeat()
+    clock.advance(30)
+    assert survivor.next_lease_expiry_in() == 0
+    assert survivor.recover() == 1
+
+    requeued = survivor.claim()
+    assert requeued.item_id == lost.item_id and requeued.attempts == 1
+    # The crashed process coming back late must not write the item a second time
+    assert not crashed.complete(lost, [{'price': 'late'}])
+    assert crashed.fail(lost, 'late') == 'lost'
+    assert live.complete(running, [{'price': '$2'}])
+    assert survivor.complete(requeued, [{'price': '$1'}])
+    assert sorted(record['price'] for record in read_records(survivor, batch_id)) == ['$1', '$2']
+
+
+def test_pending_batches(open_queue):
+    queue = open_queue()
+    batch_id = queue.create_batch(ITEMS[:1], {})
+    assert queue.pending_batches() == [batch_id]
+    queue.complete(queue.claim(), [])
+    assert queue.pending_batches() == []
+    assert queue.get_batch('unknown') is None
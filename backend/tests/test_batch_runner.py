@@ -0,0 +1,60 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+
+from batch_queue import BatchQueue
+from batch_runner import BatchRunner
+from metrics import MetricsRegistry, ScrapeMetrics
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ITEMS = [{'search_term': 'LM317', 'website_urls': ['https://a.example'], 'max_results': 2}]
+SETTINGS = {'extract_fields': ['price'], 'concurrency': 1}
+
+# Imports app the way the cleaner's process pool does, then reports whether batches were picked up
+IMPORT_APP = """
+import time
+import app
+time.sleep(1)
+print(app.batch_runner._task is None)
+"""
+
+
+def test_importing_app_does_not_resume_batches(tmp_path):
+    queue = BatchQueue(str(tmp_path / 'batches.db'), str(tmp_path / 'out'))
+    batch_id = queue.create_batch(ITEMS, SETTINGS)
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, OPENAI_API_KEY='test-key',
+               BATCH_DB_PATH=str(tmp_path / 'batches.db'), BATCH_OUTPUT_DIR=str(tmp_path / 'out'))
+    result = subprocess.run([sys.executable, '-c', IMPORT_APP], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ['True']
+    assert queue.get_batch(batch_id)['counts']['queued'] == 1
+
+
+class FailingDispatcher:
+    def scrape(self, config, api_key, concurrency):
+        raise ConnectionError('broker unreachable')
+
+
+def failing_scraper(api_key, concurrency):
+    raise RuntimeError('browser failed to launch')
+
+
+@pytest.mark.parametrize('runner_args, error', [
+    ({'dispatcher': FailingDispatcher()}, 'broker unreachable'),
+    ({'create_scraper': failing_scraper}, 'browser failed to launch'),
+])
+def test_errors_outside_the_scrape_requeue_the_item(tmp_path, runner_args, error):
+    queue = BatchQueue(str(tmp_path / 'batches.db'), str(tmp_path / 'out'), retry_delay=10.0)
+    batch_id = queue.create_batch(ITEMS, SETTINGS)
+    item = queue.claim()
+    runner_args.setdefault('create_scraper', None)
+    runner = BatchRunner(lambda: queue, None, metrics=ScrapeMetrics(MetricsRegistry()),
+                         default_api_key='test-key', **runner_args)
+    asyncio.run(runner._process(queue, item))
+    requeued = queue.items(batch_id)[0]
+    assert (requeued.status, requeued.error) == ('queued', error)
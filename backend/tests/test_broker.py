@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from broker import Broker, SQLiteBroker, create_broker
+from rate_limiter import DomainRateLimiter
+
+
+def test_gcra_schedule():
+    now = 100.0
+    tat, waits = None, []
+    for _ in range(4):
+        tat, wait = Broker._schedule(tat, None, rate=1.0, burst=2, now=now)
+        waits.append(wait)
+    assert waits == [0.0, 0.0, 1.0, 2.0]
+    # Idle time refills the burst, but never beyond it
+    tat, wait = Broker._schedule(tat, None, rate=1.0, burst=2, now=now + 100)
+    assert (tat, wait) == (now + 101, 0.0)
+
+
+def test_gcra_schedule_waits_out_a_pause():
+    _, wait = Broker._schedule(None, 130.0, rate=1.0, burst=2, now=100.0)
+    assert wait == pytest.approx(30.0)
+
+
+def test_pauses_are_shared_through_the_broker(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / 'broker.db'))
+    limiter = DomainRateLimiter(default_rate=(100.0, 5), respect_robots=False, shared=broker)
+    limiter.record_response('https://shop.example/p', 429, retry_after='20')
+    limiter._share_executor.shutdown(wait=True)
+    assert broker.reserve_rate('shop.example', 100.0, 5) == pytest.approx(20, abs=1)
+
+
+def test_acquire_uses_the_shared_schedule(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / 'broker.db'))
+    limiter = DomainRateLimiter(default_rate=(1.0, 3), respect_robots=False, shared=broker)
+
+    async def acquire_all():
+        for _ in range(3):
+            await limiter.acquire('https://shop.example/p')
+    asyncio.run(acquire_all())
+    # The burst is spent, so the next request anywhere has to wait about a second
+    assert broker.reserve_rate('shop.example', 1.0, 3) > 0.5
+
+
+def test_sqlite_broker_queues(tmp_path):
+    broker = create_broker(f'sqlite:///{tmp_path}/broker.db')
+    broker.push('search', {'n': 1})
+    broker.push('product', {'n': 2})
+    broker.push('search', {'n': 3})
+    assert [broker.pop(['search', 'product']) for _ in range(4)] == [
+        ('search', {'n': 1}), ('search', {'n': 3}), ('product', {'n': 2}), None
+    ]
+
+
+def test_sqlite_broker_ttl_applies_to_each_message(tmp_path, clock):
+    broker = SQLiteBroker(str(tmp_path / 'broker.db'))
+    broker.push('replies', {'n': 1}, ttl=10)
+    clock.advance(8)
+    broker.push('replies', {'n': 2}, ttl=10)
+    clock.advance(4)
+    assert broker.pop(['replies']) == ('replies', {'n': 2})
+    assert broker.pop(['replies']) is None
+
+
+def test_sqlite_broker_updates_values_atomically(tmp_path, clock):
+    broker = SQLiteBroker(str(tmp_path / 'broker.db'))
+
+    def increment(value):
+        return (value or 0) + 1, value
+    assert [broker.update_value('count', increment, ttl=10) for _ in range(3)] == [None, 1, 2]
+    # Another process's handle sees the same value, until it expires
+    assert SQLiteBroker(str(tmp_path / 'broker.db')).update_value('count', increment, ttl=10) == 3
+    clock.advance(11)
+    assert broker.update_value('count', increment, ttl=10) is None
+
+
+def test_create_broker_rejects_unknown_schemes():
+    assert create_broker('') is None
+    with pytest.raises(ValueError):
+        create_broker('amqp://localhost')
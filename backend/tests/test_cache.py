@@ -0,0 +1,95 @@
+import pytest
+
+from cache import MemoryCache, PageCache, SQLiteCache, create_cache
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    def make(ttl=None):
+        if request.param == 'memory':
+            return MemoryCache(max_entries=10, ttl=ttl)
+        return SQLiteCache(str(tmp_path / 'cache.db'), ttl=ttl)
+    return make
+
+
+def test_set_get_and_counters(backend):
+    cache = backend()
+    cache.set('a', {'x': 1})
+    assert cache.get('a') == {'x': 1}
+    assert cache.get('missing') is None
+    assert cache.get('a', record=False) == {'x': 1}
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.stats()['hit_rate'] == 0.5
+
+
+def test_entries_expire_after_ttl(backend, clock):
+    cache = backend(ttl=60)
+    cache.set('a', 1)
+    clock.advance(59)
+    assert cache.get('a') == 1
+    clock.advance(2)
+    assert cache.get('a') is None
+    assert cache.evictions == 1
+    assert len(cache) == 0
+
+
+def test_delete_and_clear(backend):
+    cache = backend()
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.delete('a')
+    assert cache.get('a') is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.evictions == 1
+
+
+def test_sqlite_cache_purges_expired_rows(tmp_path, clock):
+    cache = SQLiteCache(str(tmp_path / 'cache.db'), ttl=10)
+    cache.set('old', 1)
+    clock.advance(20)
+    cache.set('new', 2)
+    assert cache.purge_expired() == 1
+    assert len(cache) == 1
+
+
+def test_sqlite_cache_survives_reopening(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    SQLiteCache(path, table='pages').set('a', [1, 2])
+    assert SQLiteCache(path, table='pages').get('a') == [1, 2]
+
+
+def test_sqlite_cache_rejects_invalid_table(tmp_path):
+    with pytest.raises(ValueError):
+        SQLiteCache(str(tmp_path / 'cache.db'), table='pages; DROP TABLE x')
+
+
+def test_page_cache_freshness_and_revalidation(clock):
+    pages = PageCache(MemoryCache(), fresh_ttl=100)
+    page = pages.store('https://example.com/p', '<html></html>', etag='"v1"')
+    assert pages.get_fresh(page.url) == page
+    assert page.validator_headers() == {'If-None-Match': '"v1"'}
+    clock.advance(101)
+    assert pages.get_fresh(page.url) is None
+    stale = pages.lookup(page.url)
+    assert stale is not None and not pages.is_fresh(stale)
+    pages.mark_revalidated(stale)
+    assert pages.get_fresh(page.url) is not None
+    assert pages.revalidated == 1
+
+
+def test_create_cache():
+    assert create_cache('off') is None
+    assert isinstance(create_cache('memory', max_entries=3), MemoryCache)
+    with pytest.raises(ValueError):
+        create_cache('memcached')
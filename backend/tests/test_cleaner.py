@@ -0,0 +1,45 @@
+import pytest
+
+from app import ContentCleaner, LxmlContentCleaner
+from bench_cleaner import PARITY_PAGES
+from corpus_server import synthetic_page
+
+PAGES = PARITY_PAGES + [
+    '<html><body><div class="product-info"><h1>LM317T</h1><p>Price $0.89</p></div>'
+    '<div class="product-info"><p>In stock</p></div><p>Outside the product</p></body></html>',
+    '<html><body><div id="main"><p>Main text</p><!-- hidden comment --></div><p>Other</p></body></html>',
+    '<html><body><p>Follow us on social media</p><template>Template text</template><p>Kept</p></body></html>',
+    '<html><body><table><tr><td>Qty</td><td>Price</td></tr><tr><td>10</td><td>$1.00</td></tr></table></body></html>',
+    '<div><p>No body tag</p></div>',
+    synthetic_page(1),
+    synthetic_page(2),
+]
+
+
+@pytest.fixture(scope='module')
+def cleaners():
+    return ContentCleaner(), LxmlContentCleaner()
+
+
+@pytest.mark.parametrize('html', PAGES)
+def test_lxml_cleaner_matches_beautifulsoup(cleaners, html):
+    bs4_cleaner, lxml_cleaner = cleaners
+    url = 'https://example.com/p'
+    assert lxml_cleaner.extract_clean_text(html, url) == bs4_cleaner.extract_clean_text(html, url)
+
+
+@pytest.mark.parametrize('engine', [ContentCleaner, LxmlContentCleaner])
+def test_removed_elements_keep_surrounding_words_apart(engine):
+    text = engine().extract_clean_text(PARITY_PAGES[0], 'https://example.com/p')
+    assert text == 'alpha beta gamma delta'
+
+
+@pytest.mark.parametrize('engine', [ContentCleaner, LxmlContentCleaner])
+def test_product_selectors_win_over_the_page(engine):
+    text = engine().extract_clean_text(PAGES[len(PARITY_PAGES)], 'https://example.com/p')
+    assert text.split('\n') == ['LM317T', 'Price $0.89', 'In stock']
+
+
+def test_empty_documents(cleaners):
+    for cleaner in cleaners:
+        assert cleaner.extract_clean_text('', 'https://example.com/p') == ''
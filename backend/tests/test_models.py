@@ -0,0 +1,30 @@
+from models import ProductData, merge_product_data, missing_fields, product_fields_for, rank_results
+
+
+def test_product_fields_for_resolves_aliases_and_custom_attributes():
+    assert product_fields_for(['Name', 'price', 'MPN', 'Operating Temperature']) == [
+        'product_name', 'price', 'part_number', 'specifications'
+    ]
+    assert product_fields_for(['price'], dedupe=True) == ['part_number', 'manufacturer', 'price']
+    assert 'confidence_score' not in product_fields_for(None)
+
+
+def test_merge_prefers_structured_data_and_averages_confidence():
+    structured = ProductData(price='$1.00', part_number='LM317T', confidence_score=0.95)
+    extracted = ProductData(price='$2.00', product_name='Regulator', confidence_score=0.5)
+    merged = merge_product_data(structured, extracted)
+    assert (merged.price, merged.part_number, merged.product_name) == ('$1.00', 'LM317T', 'Regulator')
+    assert merged.confidence_score == round((0.95 * 2 + 0.5) / 3, 2)
+    assert missing_fields(merged, ['price', 'availability']) == ['availability']
+
+
+def test_rank_results_interleaves_sites_and_folds_duplicates():
+    results = [
+        ProductData(url='https://a.example/1', price='$1'),
+        ProductData(url='https://a.example/2'),
+        ProductData(url='https://b.example/1', price='$2', duplicate_of='https://a.example/1'),
+        ProductData(url='https://b.example/2'),
+    ]
+    ranked = rank_results(results, {0: (0, 0), 1: (1, 0), 2: (0, 1), 3: (1, 1)})
+    assert [product.url for product in ranked] == ['https://a.example/1', 'https://a.example/2', 'https://b.example/2']
+    assert ranked[0].listings == [{'url': 'https://b.example/1', 'price': '$2'}]
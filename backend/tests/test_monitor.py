@@ -0,0 +1,50 @@
+from cache import MemoryCache
+from monitor import CHANGED, NEW, UNCHANGED, MonitorStore, compare_text, diff_fields, fingerprint
+
+
+def test_fingerprint_ignores_whitespace():
+    assert fingerprint('Price  $5\n In stock') == fingerprint('Price $5 In stock')
+    assert fingerprint('Price $5') != fingerprint('Price $6')
+
+
+def test_compare_text_counts_changes_with_context():
+    old = ['LM317T', 'Price $1.20', 'In stock', 'Footer']
+    change = compare_text(old, 'LM317T\nPrice $1.35\nIn stock\nFooter')
+    assert change.changed_chars == len('Price $1.20') + len('Price $1.35')
+    assert change.excerpt == 'LM317T\nPrice $1.35\nIn stock'
+    assert compare_text(old, '\n'.join(old)).unchanged
+
+
+def test_diff_fields_ignores_case_and_whitespace():
+    old = {'price': '$1.20', 'availability': 'In  Stock', 'price_breaks': [{'quantity': '10', 'price': '$1'}]}
+    new = {'price': '$1.35', 'availability': 'in stock', 'price_breaks': [{'price': '$1', 'quantity': '10'}]}
+    assert diff_fields(old, new, ['price', 'availability', 'price_breaks']) == {
+        'price': {'old': '$1.20', 'new': '$1.35'}
+    }
+    assert diff_fields({'price': ''}, {'price': None}, ['price']) == {}
+
+
+def test_record_reports_new_changed_and_unchanged(clock):
+    store = MonitorStore(MemoryCache(), fields=['price'])
+    url = 'https://a.example/p'
+    assert store.record(url, 'Price $1', {'price': '$1'}) == (NEW, {})
+    first = store.get(url)
+
+    clock.advance(60)
+    assert store.compare(first, 'Price  $1').unchanged
+    assert store.record(url, 'Price $1', {'price': '$1'}, previous=first) == (UNCHANGED, {})
+    second = store.get(url)
+    assert second.changed_at == first.changed_at and second.checked_at == clock.now
+
+    clock.advance(60)
+    assert not store.compare(second, 'Price $2').unchanged
+    state, changes = store.record(url, 'Price $2', {'price': '$2'}, previous=second)
+    assert (state, changes) == (CHANGED, {'price': {'old': '$1', 'new': '$2'}})
+    assert store.get(url).changed_at == clock.now
+
+
+def test_checks_are_counted():
+    store = MonitorStore(MemoryCache())
+    store.count('unchanged')
+    store.count('targeted')
+    assert store.stats()['checks'] == {'new': 0, 'unchanged': 1, 'targeted': 1, 'full': 0}
@@ -0,0 +1,52 @@
+from broker import SQLiteBroker
+from part_index import PartIndex, normalize_manufacturer, normalize_part_number
+
+
+def test_normalize_part_number():
+    assert normalize_part_number('lm317-t') == 'LM317T'
+    assert normalize_part_number(' 1756-L72 / B ') == '1756L72B'
+    assert normalize_part_number('A-1') is None
+    assert normalize_part_number(None) is None
+
+
+def test_normalize_manufacturer():
+    assert normalize_manufacturer('Texas Instruments Inc.') == 'texas instruments'
+    assert normalize_manufacturer('TI') == 'texas instruments'
+    assert normalize_manufacturer('ON Semiconductor, LLC') == 'onsemi'
+    assert normalize_manufacturer('Allen-Bradley') == 'rockwell automation'
+    assert normalize_manufacturer('AB') == 'rockwell automation'
+    assert normalize_manufacturer('Ericsson AB') == 'ericsson'
+    assert normalize_manufacturer('Inc.') is None
+
+
+def test_duplicates_point_at_the_first_listing():
+    index = PartIndex()
+    assert index.claim('LM317T', 'Texas Instruments', 'https://a.example/1') is None
+    assert index.claim('lm317-t', 'TI', 'https://b.example/9') == 'https://a.example/1'
+    assert index.claim('LM317T', None, 'https://c.example/3') == 'https://a.example/1'
+    # Claiming the same URL again is not a duplicate of itself
+    assert index.claim('LM317T', 'TI', 'https://a.example/1') is None
+
+
+def test_different_manufacturers_are_different_parts():
+    index = PartIndex()
+    index.claim('BC547B', 'onsemi', 'https://a.example/1')
+    assert index.claim('BC547B', 'NXP Semiconductors', 'https://b.example/2') is None
+    assert len(index) == 2
+
+
+def test_short_part_numbers_are_never_merged():
+    index = PartIndex()
+    index.claim('R1', 'Vishay', 'https://a.example/1')
+    assert index.claim('R1', 'Vishay', 'https://b.example/2') is None
+    assert len(index) == 0
+
+
+def test_shared_indexes_see_each_others_claims(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / 'broker.db'))
+    first, second = PartIndex(shared=broker, scope='job-1'), PartIndex(shared=broker, scope='job-1')
+    assert first.claim('LM317T', 'TI', 'https://a.example/1') is None
+    assert second.claim('LM317T', 'Texas Instruments', 'https://b.example/2') == 'https://a.example/1'
+    assert second.claim('LM317T', 'onsemi', 'https://c.example/3') is None
+    # Other jobs keep their own claims
+    assert PartIndex(shared=broker, scope='job-2').claim('LM317T', 'TI', 'https://b.example/2') is None
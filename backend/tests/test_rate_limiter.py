@@ -0,0 +1,45 @@
+import pytest
+
+from rate_limiter import DomainRateLimiter, TokenBucket
+
+
+def test_token_bucket_allows_a_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+    clock.advance(10)
+    assert bucket.reserve() == 0.0
+
+
+def test_token_bucket_honours_cooldown(clock):
+    bucket = TokenBucket(rate=10.0, burst=5)
+    bucket.cooldown_until = clock.now + 30
+    assert bucket.reserve() == pytest.approx(30)
+
+
+def test_throttling_halves_the_rate_and_recovers(clock):
+    limiter = DomainRateLimiter(default_rate=(2.0, 1), respect_robots=False, min_rate=0.5)
+    limiter.record_response('https://shop.example/p/1', 429, retry_after='12')
+    bucket = limiter._bucket('shop.example')
+    assert bucket.rate == 1.0
+    assert bucket.cooldown_until == pytest.approx(clock.now + 12)
+    limiter.record_response('https://shop.example/p/2', 503)
+    limiter.record_response('https://shop.example/p/3', 503)
+    assert bucket.rate == 0.5 and limiter.throttled == 3
+    for _ in range(20):
+        limiter.record_response('https://shop.example/p/4', 200)
+    assert bucket.rate == 2.0
+
+
+def test_configured_rates_match_by_site_name():
+    limiter = DomainRateLimiter(rate_limits={'digikey': (0.5, 3)}, respect_robots=False)
+    assert limiter._bucket('www.digikey.com').burst == 3
+    assert limiter._bucket('other.example').rate == limiter.default_rate[0]
+
+
+def test_retry_after_parsing(clock):
+    assert DomainRateLimiter._parse_retry_after('7') == 7.0
+    assert DomainRateLimiter._parse_retry_after(None) is None
+    assert DomainRateLimiter._parse_retry_after('soon') is None
+    assert DomainRateLimiter._parse_retry_after('Thu, 01 Jan 1970 00:00:00 GMT') == 0.0
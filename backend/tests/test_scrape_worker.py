@@ -0,0 +1,62 @@
+import asyncio
+
+from app import UniversalScraper
+from broker import SQLiteBroker
+from jobs import Dispatcher, JobManager
+from metrics import MetricsRegistry, ScrapeMetrics
+from models import ProductData, SearchConfig
+from scrape_worker import ScrapeWorker
+
+SEARCH_RESULTS = [(0, ['https://a.example/lm317']), (1, ['https://b.example/LM317T'])]
+
+
+class FakeBrowserPool:
+    async def get_browser(self):
+        return None
+
+
+def test_workers_skip_the_llm_for_parts_another_worker_claimed(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / 'broker.db'))
+    metrics = ScrapeMetrics(MetricsRegistry())
+    llm_calls = []
+
+    async def harvest_sites(config):
+        for site_index, urls in SEARCH_RESULTS:
+            yield site_index, urls
+
+    async def fetch_page(url):
+        # Both sites' structured data name the part, so it is known before the LLM
+        return '<html></html>', 'LM317T adjustable regulator', ProductData(part_number='LM317T', manufacturer='TI')
+
+    async def extract(clean_text, url, fields=None):
+        llm_calls.append(url)
+        return ProductData(price='$0.89', confidence_score=0.9)
+
+    def create_scraper(api_key, concurrency):
+        scraper = UniversalScraper(api_key, max_concurrency=concurrency, browser_pool=FakeBrowserPool(),
+                                   metrics=metrics)
+        scraper._harvest_sites = harvest_sites
+        scraper._fetch_page = fetch_page
+        scraper.llm_extractor.aextract_product_data = extract
+        return scraper
+
+    dispatcher = Dispatcher(broker, JobManager(), metrics, timeout=30)
+    worker = ScrapeWorker(broker, create_scraper, concurrency=2, poll_interval=0.05)
+    config = SearchConfig(website_url='https://a.example', search_term='LM317', extract_fields=['price'],
+                          website_urls=['https://a.example', 'https://b.example'])
+
+    async def scrape_with_a_worker():
+        running = asyncio.create_task(worker.run())
+        try:
+            return await asyncio.to_thread(dispatcher.scrape, config, 'test-key', 2)
+        finally:
+            worker.stop()
+            await running
+
+    job, results = asyncio.run(scrape_with_a_worker())
+    assert job.status == 'completed'
+    assert len(llm_calls) == 1
+    [first] = results
+    assert first.url == llm_calls[0] and first.price == '$0.89'
+    other = next(url for _, [url] in SEARCH_RESULTS if url != first.url)
+    assert [listing['url'] for listing in first.listings] == [other]
@@ -0,0 +1,102 @@
+import json
+
+from structured_data import extract_json_ld, extract_structured_data, format_price
+
+
+def page(head: str = '', body: str = '') -> str:
+    return f'<html><head>{head}</head><body>{body}</body></html>'
+
+
+def json_ld(document) -> str:
+    return f'<script type="application/ld+json">{json.dumps(document)}</script>'
+
+
+PRODUCT = {
+    '@context': 'https://schema.org',
+    '@type': 'Product',
+    'name': 'LM317T Voltage Regulator',
+    'mpn': 'LM317T',
+    'brand': {'@type': 'Brand', 'name': 'Texas Instruments'},
+    'additionalProperty': [{'@type': 'PropertyValue', 'name': 'Output Current', 'value': '1.5 A'}],
+    'offers': {
+        '@type': 'Offer',
+        'price': '0.89',
+        'priceCurrency': 'USD',
+        'availability': 'https://schema.org/InStock',
+        'itemCondition': 'https://schema.org/NewCondition',
+        'priceSpecification': [
+            {'@type': 'UnitPriceSpecification', 'price': '0.89', 'eligibleQuantity': {'minValue': 1}},
+            {'@type': 'UnitPriceSpecification', 'price': '0.61', 'eligibleQuantity': {'minValue': 100}},
+        ],
+    },
+}
+
+
+def test_format_price():
+    assert format_price('12.50', 'usd') == '$12.50'
+    assert format_price('12.50', 'CHF') == '12.50 CHF'
+    assert format_price(None, 'USD') is None
+
+
+def test_json_ld_product():
+    data = extract_json_ld(page(json_ld(PRODUCT)))
+    assert data['product_name'] == 'LM317T Voltage Regulator'
+    assert data['part_number'] == 'LM317T'
+    assert data['manufacturer'] == 'Texas Instruments'
+    assert data['price'] == '$0.89'
+    assert data['availability'] == 'In stock'
+    assert data['condition'] == 'New'
+    assert data['specifications'] == {'Output Current': '1.5 A'}
+    assert data['price_breaks'] == [{'quantity': '1', 'price': '$0.89'}, {'quantity': '100', 'price': '$0.61'}]
+
+
+def test_json_ld_product_inside_a_graph():
+    document = {'@context': 'https://schema.org', '@graph': [{'@type': 'WebPage'}, PRODUCT]}
+    assert extract_json_ld(page(json_ld(document)))['part_number'] == 'LM317T'
+
+
+def test_broken_json_ld_is_skipped():
+    html = page('<script type="application/ld+json">{not json</script>' + json_ld(PRODUCT))
+    assert extract_json_ld(html)['part_number'] == 'LM317T'
+
+
+def test_microdata_product():
+    html = page(body='''
+        <div itemscope itemtype="https://schema.org/Product">
+          <h1 itemprop="name">NE555 Timer</h1>
+          <span itemprop="mpn">NE555P</span>
+          <div itemprop="brand" itemscope itemtype="https://schema.org/Brand"><span itemprop="name">TI</span></div>
+          <div itemprop="offers" itemscope itemtype="https://schema.org/Offer">
+            <meta itemprop="priceCurrency" content="EUR"><span itemprop="price" content="0.42">0,42 €</span>
+            <link itemprop="availability" href="https://schema.org/OutOfStock">
+          </div>
+        </div>''')
+    data = extract_structured_data(html)
+    assert data['product_name'] == 'NE555 Timer'
+    assert data['part_number'] == 'NE555P'
+    assert data['manufacturer'] == 'TI'
+    assert data['price'] == '€0.42'
+    assert data['availability'] == 'Out of stock'
+    assert data['confidence_score'] == 0.9
+
+
+def test_opengraph_fills_gaps_left_by_json_ld():
+    head = json_ld({'@type': 'Product', 'name': 'LM317T', 'mpn': 'LM317T'}) + '''
+        <meta property="og:type" content="product">
+        <meta property="og:title" content="Other title">
+        <meta property="product:price:amount" content="1.10">
+        <meta property="product:price:currency" content="GBP">'''
+    data = extract_structured_data(page(head))
+    assert data['product_name'] == 'LM317T'
+    assert data['price'] == '£1.10'
+    assert data['confidence_score'] == round((0.95 * 2 + 0.7) / 3, 2)
+
+
+def test_markup_is_only_parsed_for_missing_wanted_fields():
+    head = json_ld(PRODUCT) + '<meta property="og:title" content="Other title">'
+    data = extract_structured_data(page(head), wanted=['product_name', 'price'])
+    assert data['confidence_score'] == 0.95
+
+
+def test_pages_without_metadata():
+    assert extract_structured_data(page(body='<p>LM317T $0.89</p>')) == {}
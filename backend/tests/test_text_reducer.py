@@ -0,0 +1,60 @@
+from text_reducer import BlockBuilder, TextBlock, TextReducer
+
+
+def build(events):
+    builder = BlockBuilder()
+    for kind, value in events:
+        getattr(builder, kind)(value)
+    return builder.finish()
+
+
+def test_block_builder_splits_blocks_and_keeps_table_rows():
+    blocks = build([
+        ('start', 'h1'), ('text', 'LM317T'), ('end', 'h1'),
+        ('start', 'p'), ('text', 'Adjustable'), ('start', 'b'), ('text', 'regulator'), ('end', 'b'), ('end', 'p'),
+        ('start', 'table'),
+        ('start', 'tr'), ('start', 'th'), ('text', 'Qty'), ('end', 'th'),
+        ('start', 'th'), ('text', 'Price'), ('end', 'th'), ('end', 'tr'),
+        ('start', 'tr'), ('start', 'td'), ('start', 'div'), ('text', '100'), ('end', 'div'), ('end', 'td'),
+        ('start', 'td'), ('text', '$0.61'), ('end', 'td'), ('end', 'tr'),
+        ('end', 'table'),
+    ])
+    assert blocks == [
+        TextBlock('LM317T', 'heading'),
+        TextBlock('Adjustable regulator'),
+        TextBlock('Qty | Price\n100 | $0.61', 'table'),
+    ]
+
+
+def test_unclosed_tables_are_flushed():
+    blocks = build([('start', 'table'), ('start', 'tr'), ('start', 'td'), ('text', 'x'), ('end', 'td'), ('end', 'tr')])
+    assert blocks == [TextBlock('x', 'table')]
+
+
+def test_text_within_budget_is_only_deduplicated():
+    reducer = TextReducer(token_budget=1000)
+    blocks = [TextBlock('In stock'), TextBlock('IN  STOCK!'), TextBlock('Price $1')]
+    assert reducer.reduce(blocks) == 'In stock\nPrice $1'
+
+
+def test_relevant_blocks_are_kept_in_page_order():
+    noise = [TextBlock(f'Customers also viewed similar items and reviews {i}') for i in range(30)]
+    blocks = [*noise[:15], TextBlock('Unit price $0.89 each, MPN LM317T'), *noise[15:],
+              TextBlock('Availability: In stock, lead time 2 weeks')]
+    reducer = TextReducer(token_budget=40)
+    reduced = reducer.reduce(blocks)
+    assert reduced.split('\n') == ['Unit price $0.89 each, MPN LM317T', 'Availability: In stock, lead time 2 weeks']
+    assert reducer.count_tokens(reduced) <= 40
+
+
+def test_oversized_blocks_are_truncated_to_the_budget():
+    rows = '\n'.join(f'{quantity} | ${quantity / 1000:.3f}' for quantity in range(1, 400))
+    reducer = TextReducer(token_budget=60)
+    reduced = reducer.reduce([TextBlock(rows, 'table')])
+    assert reduced and rows.startswith(reduced)
+    assert reducer.count_tokens(reduced) <= 60
+
+
+def test_take_finds_the_longest_prefix():
+    assert TextReducer._take(['a', 'bb', 'ccc'], ' ', 4, len) == 'a bb'
+    assert TextReducer._take(['abcdef'], ' ', 3, len) == ''
@@ -0,0 +1,233 @@
+"""
+Relevance-ranked reduction of page text to a token budget
+"""
+
+import logging
+import math
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Elements that start a new block of text
+BLOCK_TAGS = frozenset([
+    'address', 'article', 'aside', 'blockquote', 'br', 'caption', 'dd', 'details', 'div',
+    'dl', 'dt', 'fieldset', 'figcaption', 'figure', 'form', 'h1', 'h2', 'h3', 'h4', 'h5',
+    'h6', 'hr', 'li', 'main', 'ol', 'p', 'pre', 'section', 'summary', 'table', 'tbody',
+    'td', 'tfoot', 'th', 'thead', 'tr', 'ul'
+])
+HEADING_TAGS = frozenset(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+
+
+@dataclass
+class TextBlock:
+    text: str
+    kind: str = 'text'  # 'text', 'heading' or 'table' (rows on lines, cells joined by ' | ')
+
+
+class BlockBuilder:
+    """Turns a document-order stream of start/end/text events into TextBlocks
+
+    Tables become one block per table with a line per row, so quantity/price
+    columns stay aligned. Everything inside a table cell is inline text.
+    """
+    def __init__(self):
+        self.blocks: List[TextBlock] = []
+        self._parts: List[str] = []
+        self._kind = 'text'
+        self._tables: List[List[str]] = []
+        self._row: Optional[List[str]] = None
+        self._cell: Optional[List[str]] = None
+        self._cell_depth = 0
+
+    def text(self, string: str):
+        string = string.strip()
+        if string:
+            (self._cell if self._cell is not None else self._parts).append(string)
+
+    def start(self, tag: str):
+        if self._cell is not None:
+            self._cell_depth += 1
+        elif tag == 'table':
+            self._flush()
+            self._tables.append([])
+        elif tag == 'tr' and self._tables:
+            self._flush()
+            self._row = []
+        elif tag in ('td', 'th') and self._row is not None:
+            self._cell = []
+            self._cell_depth = 0
+        elif tag in BLOCK_TAGS:
+            self._flush()
+            if tag in HEADING_TAGS:
+                self._kind = 'heading'
+
+    def end(self, tag: str):
+        if self._cell is not None:
+            if self._cell_depth:
+                self._cell_depth -= 1
+            else:
+                self._row.append(' '.join(self._cell))
+                self._cell = None
+        elif tag == 'table' and self._tables:
+            self._flush()
+            rows = self._tables.pop()
+            if rows:
+                self.blocks.append(TextBlock('\n'.join(rows), 'table'))
+        elif tag == 'tr' and self._row is not None:
+            if any(self._row):
+                self._tables[-1].append(' | '.join(self._row))
+            self._row = None
+        elif tag in BLOCK_TAGS:
+            self._flush()
+
+    def _flush(self):
+        if self._parts:
+            self.blocks.append(TextBlock(' '.join(self._parts), self._kind))
+            self._parts = []
+        self._kind = 'text'
+
+    def finish(self) -> List[TextBlock]:
+        while self._tables:
+            self.end('table')
+        self._flush()
+        return self.blocks
+
+
+PRICE = re.compile(
+    r'[$€£¥₹]\s?\d[\d,]*(?:\.\d+)?|\b\d[\d,]*(?:\.\d+)?\s?(?:USD|EUR|GBP|CAD|AUD|JPY)\b'
+    r'|\b(?:price|unit price|each|ea)\b',
+    re.IGNORECASE
+)
+PART_NUMBER = re.compile(r'\b(?=[A-Z0-9./-]*\d)(?=[A-Z0-9./-]*[A-Z])[A-Z0-9][A-Z0-9./-]{3,}\b')
+KEY_VALUE = re.compile(r'^[^:|\n]{2,40}:\s*\S')
+PRODUCT_TERMS = re.compile(
+    r'\b(?:in stock|out of stock|availability|available|lead time|manufacturer|mfr|brand'
+    r'|part (?:no|number)|mpn|model|condition|refurbished|datasheet|specifications?|quantity'
+    r'|qty|warranty|seller|sold by|ships? from|country of origin|packaging|series)\b',
+    re.IGNORECASE
+)
+NOISE_TERMS = re.compile(
+    r'\b(?:sign in|log in|cart|wish ?list|share|reviews?|ratings?|similar items|you may also like'
+    r'|related products|recently viewed|subscribe|copyright|all rights reserved)\b|©',
+    re.IGNORECASE
+)
+
+
+def _dedupe_key(text: str) -> str:
+    return re.sub(r'[\W_]+', '', text.casefold())
+
+
+_warned_estimated = False
+
+
+def _warn_estimated(reason: str):
+    """Warn once per process that token budgets are only estimated"""
+    global _warned_estimated
+    if not _warned_estimated:
+        _warned_estimated = True
+        logger.warning(f"{reason}; token budgets are estimated at {TextReducer.CHARS_PER_TOKEN} "
+                       f"characters per token instead of counted (pip install tiktoken)")
+
+
+class TextReducer:
+    """Packs the most product-relevant blocks of a page into a token budget
+
+    Blocks are deduplicated (ignoring case, whitespace and punctuation), scored
+    for prices, part numbers, spec tables and product terms, and packed greedily
+    by score. The kept blocks are returned in page order. Tokens are counted with
+    tiktoken for the model when it is installed, otherwise estimated from length.
+    """
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, token_budget: int = 1500, model: str = 'gpt-3.5-turbo'):
+        self.token_budget = max(1, token_budget)
+        self.model = model
+        self._encoding = None
+        if tiktoken is None:
+            _warn_estimated("tiktoken is not installed")
+            return
+        try:
+            try:
+                self._encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._encoding = tiktoken.get_encoding('cl100k_base')
+        except Exception as e:  # the encoding files are downloaded on first use
+            _warn_estimated(f"the {model} encoding could not be loaded ({e})")
+
+    def count_tokens(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / self.CHARS_PER_TOKEN)
+
+    def score(self, block: TextBlock, position: int, total: int) -> float:
+        text = block.text
+        score = 1.0 - position / max(total, 1)  # earlier blocks are usually the product
+        if block.kind == 'heading':
+            score += 2
+        if block.kind == 'table':
+            score += 3
+        score += 3 * min(2, len(PRICE.findall(text)))
+        score += 2 * min(3, len(PART_NUMBER.findall(text)))
+        score += min(4, len(PRODUCT_TERMS.findall(text)))
+        if KEY_VALUE.match(text):
+            score += 1
+        score -= 2 * min(3, len(NOISE_TERMS.findall(text)))
+        return score
+
+    def reduce(self, blocks: List[TextBlock]) -> str:
+        unique: List[TextBlock] = []
+        seen = set()
+        for block in blocks:
+            key = _dedupe_key(block.text)
+            if key and key not in seen:
+                seen.add(key)
+                unique.append(block)
+
+        tokens = [self.count_tokens(block.text) for block in unique]
+        if sum(tokens) + len(unique) <= self.token_budget:
+            return '\n'.join(block.text for block in unique)
+
+        scores = [self.score(block, position, len(unique)) for position, block in enumerate(unique)]
+        ranked = sorted(range(len(unique)), key=lambda i: (-scores[i], i))
+        kept: Dict[int, str] = {}
+        remaining = self.token_budget
+        for i in ranked:
+            if remaining <= 0:
+                break
+            if scores[i] <= 0 and kept:
+                break
+            cost = tokens[i] + 1  # the joining newline
+            if cost <= remaining:
+                kept[i] = unique[i].text
+                remaining -= cost
+            elif remaining >= 50 or not kept:
+                # Too big to fit whole: keep its leading rows or words
+                truncated = self._truncate(unique[i], remaining - 1)
+                if truncated:
+                    kept[i] = truncated
+                    remaining -= self.count_tokens(truncated) + 1
+        return '\n'.join(kept[i] for i in sorted(kept))
+
+    def _truncate(self, block: TextBlock, budget: int) -> str:
+        separator = '\n' if block.kind == 'table' else ' '
+        pieces = block.text.split(separator)
+        return self._take(pieces, separator, budget, self.count_tokens)
+
+    @staticmethod
+    def _take(pieces: List[str], separator: str, budget: int, count: Callable[[str], int]) -> str:
+        # Binary search for the longest prefix that fits
+        low, high = 0, len(pieces)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if count(separator.join(pieces[:middle])) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        return separator.join(pieces[:low])
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Scrape worker: runs search and product page tasks from the shared broker
+
+Start any number of these, on this machine or others, alongside an API server
+using the same SCRAPER_BROKER:
+
+    SCRAPER_BROKER=redis://localhost:6379/0 python worker.py --concurrency 4
+"""
+
+import argparse
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def serve_metrics(app, port: int) -> ThreadingHTTPServer:
+    """Serve this worker's Prometheus metrics on /metrics in a background thread"""
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = app.metrics_registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', app.METRICS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('0.0.0.0', port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='worker-metrics', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--broker', help='broker URL, e.g. redis://localhost:6379/0 or sqlite:///queue.db '
+                                         '(default: SCRAPER_BROKER)')
+    parser.add_argument('--concurrency', type=int, help='tasks run at once (default: WORKER_CONCURRENCY)')
+    parser.add_argument('--metrics-port', type=int, help='serve Prometheus metrics on this port')
+    args = parser.parse_args()
+
+    # The app reads its settings, the broker included, at import
+    if args.broker:
+        os.environ['SCRAPER_BROKER'] = args.broker
+    import app
+    from scrape_worker import ScrapeWorker
+
+    if app.broker is None:
+        parser.error('set SCRAPER_BROKER or pass --broker')
+    worker = ScrapeWorker(app.broker, app.create_scraper, concurrency=args.concurrency or app.WORKER_CONCURRENCY,
+                          reply_ttl=app.JOB_TTL)
+    if args.metrics_port:
+        serve_metrics(app, args.metrics_port)
+    app.logger.info(f"Worker taking up to {worker.concurrency} tasks at once from the {app.broker.kind} broker")
+
+    future = app.event_loop.submit(worker.run())
+    try:
+        future.result()
+    except KeyboardInterrupt:
+        app.logger.info("Finishing running tasks; press Ctrl+C again to stop now")
+        app.event_loop.loop.call_soon_threadsafe(worker.stop)
+        future.result()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+"""
+WSGI entry point, e.g. `gunicorn wsgi:app`; resumes interrupted batches once the app is loaded
+"""
+
+from app import app, resume_batches
+
+resume_batches()